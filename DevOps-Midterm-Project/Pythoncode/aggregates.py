@@ -0,0 +1,117 @@
+"""
+Aggregates module for the Bank Loan Management System.
+Contains running portfolio totals kept up to date on every loan change.
+"""
+import logging
+import math
+
+import numpy as np
+
+from loan_table import LOAN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def empty_breakdown():
+    """Return a zeroed per-status breakdown."""
+    return {status: {"count": 0, "principal": 0.0, "interest": 0.0} for status in LOAN_STATUSES}
+
+
+def breakdown_from_columns(columns):
+    """Compute the per-status breakdown from loan columns in one vectorized pass."""
+    breakdown = empty_breakdown()
+    amount = np.asarray(columns["amount"], dtype=np.float64)
+    interest = amount * (np.asarray(columns["interest_rate"], dtype=np.float64) / 100)
+    status = np.asarray(columns["status"])
+    for name in LOAN_STATUSES:
+        mask = status == name
+        breakdown[name] = {
+            "count": int(mask.sum()),
+            "principal": float(amount[mask].sum()),
+            "interest": float(interest[mask].sum()),
+        }
+    return breakdown
+
+
+class PortfolioAggregates:
+    """Loan count plus per-status principal and simple interest, updated in O(1).
+
+    ``source`` returns a from-scratch per-status breakdown (for example
+    ``breakdown_from_columns(repo.loan_columns())``) and is only called at
+    start-up and on verification. With ``verify_every`` set, every N-th
+    mutation recomputes from scratch, logs any drift and adopts the fresh
+    values.
+    """
+
+    def __init__(self, source, verify_every=0):
+        self._source = source
+        self.verify_every = verify_every
+        self.mutations = 0
+        self.by_status = source()
+
+    @property
+    def count(self):
+        """Return the number of loans of any status."""
+        return sum(entry["count"] for entry in self.by_status.values())
+
+    def totals(self):
+        """Return (total amount, total simple interest) of active loans."""
+        active = self.by_status["active"]
+        return active["principal"], active["interest"]
+
+    def summary(self):
+        """Return a copy of the per-status breakdown plus the overall count."""
+        return {"count": self.count, "by_status": {s: dict(e) for s, e in self.by_status.items()}}
+
+    # Updates
+
+    def add(self, loan):
+        """Account for a newly stored loan."""
+        self._apply(loan, 1)
+        self._tick()
+
+    def remove(self, loan):
+        """Account for a removed loan."""
+        self._apply(loan, -1)
+        self._tick()
+
+    def replace(self, old, new):
+        """Account for a loan whose fields changed from old to new."""
+        self._apply(old, -1)
+        self._apply(new, 1)
+        self._tick()
+
+    def add_columns(self, columns):
+        """Account for a batch of newly stored loans given as columns."""
+        for status, entry in breakdown_from_columns(columns).items():
+            for key, value in entry.items():
+                self.by_status[status][key] += value
+        self._tick()
+
+    # Verification
+
+    def verify(self):
+        """Recompute from the source, log any drift, adopt the fresh values and return the drift."""
+        fresh = self._source()
+        drift = []
+        for status, entry in fresh.items():
+            for key, value in entry.items():
+                current = self.by_status[status][key]
+                if not math.isclose(current, value, rel_tol=1e-9, abs_tol=1e-6):
+                    drift.append({"status": status, "field": key, "running": current, "recomputed": value})
+        for item in drift:
+            logger.warning("Aggregate drift in %s %s: running %s, recomputed %s",
+                           item["status"], item["field"], item["running"], item["recomputed"])
+        self.by_status = fresh
+        return drift
+
+    def _apply(self, loan, sign):
+        entry = self.by_status[loan["status"]]
+        entry["count"] += sign
+        entry["principal"] += sign * loan["amount"]
+        entry["interest"] += sign * loan["amount"] * (loan["interest_rate"] / 100)
+
+    def _tick(self):
+        self.mutations += 1
+        if self.verify_every and self.mutations % self.verify_every == 0:
+            self.verify()
@@ -0,0 +1,260 @@
+"""
+Amortization module for the Bank Loan Management System.
+Contains the vectorized annuity engine shared by the CLI and the web UI.
+"""
+import math
+
+import numpy as np
+
+SCHEDULE_COLUMNS = ("month", "payment", "principal", "interest", "balance")
+DEFAULT_CHUNK_LOANS = 10_000
+DEFAULT_SHOCKS_BP = np.arange(-300, 301, 25)
+SHOCK_MEASURES = ("payment", "total_interest", "balance")
+POSITION_MEASURES = ("payment", "balance", "interest_paid", "principal_paid", "remaining_interest")
+
+
+def loan_arrays(amounts, interest_rates, term_months):
+    """Return (amounts, monthly rates, terms) as validated float/int arrays, ready for annuity_payments."""
+    amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+    monthly_rates = np.atleast_1d(np.asarray(interest_rates, dtype=np.float64)) / 1200
+    terms = np.atleast_1d(np.asarray(term_months, dtype=np.int64))
+    if np.any(amounts < 0) or np.any(monthly_rates < 0) or np.any(terms <= 0):
+        raise ValueError("Amount and interest rate must be non-negative, term must be positive.")
+    return amounts, monthly_rates, terms
+
+
+def _growth_minus_one(monthly_rates, months):
+    """Return (1 + r) ** n - 1 without losing precision for tiny rates."""
+    return np.expm1(months * np.log1p(monthly_rates))
+
+
+def _annuity_factor(monthly_rates, months):
+    """Return the sum of (1 + r) ** i for i < n, which is n when r is zero."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = _growth_minus_one(monthly_rates, months) / monthly_rates
+    return np.where(monthly_rates > 0, factor, months)
+
+
+def annuity_payments(amounts, monthly_rates, terms):
+    """Return annuity payments for arrays already converted by loan_arrays."""
+    return amounts * np.exp(terms * np.log1p(monthly_rates)) / _annuity_factor(monthly_rates, terms)
+
+
+def monthly_payment(amount, interest_rate, term_months):
+    """Return the annuity payment for one loan, or an array of payments for many."""
+    payments = annuity_payments(*loan_arrays(amount, interest_rate, term_months))
+    if np.ndim(amount) == 0 and np.ndim(interest_rate) == 0 and np.ndim(term_months) == 0:
+        return float(payments[0])
+    return payments
+
+
+def batch_schedules(amounts, interest_rates, term_months):
+    """Build the schedules of many loans as flat column arrays.
+
+    Rows are grouped by loan in input order; ``loan_index`` points back into
+    the input arrays. Balances use the closed-form annuity identity, so no
+    per-month Python loop is needed.
+    """
+    amounts, monthly_rates, terms = loan_arrays(amounts, interest_rates, term_months)
+    payments = annuity_payments(amounts, monthly_rates, terms)
+
+    loan_index = np.repeat(np.arange(len(terms)), terms)
+    starts = np.repeat(np.cumsum(terms) - terms, terms)
+    month = np.arange(len(loan_index), dtype=np.int64) - starts + 1
+
+    rate = monthly_rates[loan_index]
+    payment = payments[loan_index]
+    elapsed = month - 1
+    opening = (amounts[loan_index] * np.exp(elapsed * np.log1p(rate))
+               - payment * _annuity_factor(rate, elapsed))
+    interest = opening * rate
+    principal = payment - interest
+    balance = np.maximum(opening - principal, 0.0)
+    balance[month == terms[loan_index]] = 0.0  # Absorb rounding drift on the last payment
+
+    return {
+        "loan_index": loan_index,
+        "month": month,
+        "payment": payment,
+        "principal": principal,
+        "interest": interest,
+        "balance": balance,
+    }
+
+
+def iter_batch_schedules(amounts, interest_rates, term_months, chunk_loans=DEFAULT_CHUNK_LOANS):
+    """Yield batch schedules for consecutive chunks of loans to bound memory."""
+    amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+    interest_rates = np.atleast_1d(np.asarray(interest_rates, dtype=np.float64))
+    terms = np.atleast_1d(np.asarray(term_months, dtype=np.int64))
+    for start in range(0, len(terms), chunk_loans):
+        stop = start + chunk_loans
+        chunk = batch_schedules(amounts[start:stop], interest_rates[start:stop], terms[start:stop])
+        chunk["loan_index"] += start
+        yield chunk
+
+
+def loan_schedule(loan):
+    """Return the schedule columns (month, payment, principal, interest, balance) for one loan."""
+    schedule = batch_schedules(loan["amount"], loan["interest_rate"], loan["term_months"])
+    return {column: schedule[column] for column in SCHEDULE_COLUMNS}
+
+
+def portfolio_cash_flow(loans, by_client=False):
+    """Project what a set of loans collects each month, combined into one series.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``).
+    Loans are walked month by month as vectors, longest term first, so only
+    the current month's balances are held in memory. Returns columns month,
+    payment, principal, interest and balance (outstanding after the month);
+    with ``by_client`` also a ``by_client`` dict of per-client
+    months x clients arrays for principal, interest and balance.
+    """
+    amounts, monthly_rates, terms = loan_arrays(loans["amount"], loans["interest_rate"], loans["term_months"])
+    order = np.argsort(-terms, kind="stable")
+    monthly_rates, terms = monthly_rates[order], terms[order]
+    balance = amounts[order].copy()
+    payments = annuity_payments(balance, monthly_rates, terms)
+    horizon = int(terms[0]) if len(terms) else 0
+    # alive[m] = number of loans whose term is at least m + 1 (a prefix after sorting)
+    alive = np.searchsorted(-terms, -np.arange(1, horizon + 1), side="right")
+
+    series = {column: np.zeros(horizon) for column in ("payment", "principal", "interest", "balance")}
+    series["month"] = np.arange(1, horizon + 1)
+    if by_client:
+        client_ids, client_index = np.unique(np.asarray(loans["client_id"])[order], return_inverse=True)
+        per_client = {column: np.zeros((horizon, len(client_ids))) for column in ("principal", "interest", "balance")}
+
+    for m in range(horizon):
+        k = alive[m]
+        interest = balance[:k] * monthly_rates[:k]
+        principal = payments[:k] - interest
+        last = terms[:k] == m + 1
+        principal[last] = balance[:k][last]  # Close out each loan exactly on its final payment
+        balance[:k] -= principal
+        series["principal"][m] = principal.sum()
+        series["interest"][m] = interest.sum()
+        series["payment"][m] = series["principal"][m] + series["interest"][m]
+        series["balance"][m] = balance[:k].sum()
+        if by_client:
+            idx = client_index[:k]
+            for column, values in (("principal", principal), ("interest", interest), ("balance", balance[:k])):
+                per_client[column][m] = np.bincount(idx, weights=values, minlength=len(client_ids))
+
+    if by_client:
+        series["by_client"] = {"client_id": client_ids, **per_client}
+    return series
+
+
+def _position_measures(amounts, monthly_rates, terms, months):
+    """Return POSITION_MEASURES after months payments (clipped to the term) from the annuity identities."""
+    paid = np.clip(months, 0, terms)
+    payment = annuity_payments(amounts, monthly_rates, terms)
+    balance = _remaining_balance(amounts, monthly_rates, payment, paid, terms)
+    principal_paid = amounts - balance
+    return payment, balance, payment * paid - principal_paid, principal_paid, payment * (terms - paid) - balance
+
+
+def _scalar_annuity_factor(monthly_rate, months):
+    return math.expm1(months * math.log1p(monthly_rate)) / monthly_rate if monthly_rate > 0 else months
+
+
+def _remaining_balance(amounts, monthly_rates, payments, paid, terms):
+    """Return the balance left after paid of terms payments, from the annuity identity.
+
+    Broadcasts over numpy arrays; a plain float monthly rate takes the
+    scalar math path used for single loans.
+    """
+    scalar = isinstance(monthly_rates, float)
+    xp, annuity_factor = (math, _scalar_annuity_factor) if scalar else (np, _annuity_factor)
+    balance = amounts * xp.exp(paid * xp.log1p(monthly_rates)) - payments * annuity_factor(monthly_rates, paid)
+    if scalar:
+        return max(balance, 0.0) if paid < terms else 0.0
+    return np.where(paid < terms, np.maximum(balance, 0.0), 0.0)
+
+
+def loan_position(loan, month):
+    """Return one loan's state after month payments in O(1), without building its schedule.
+
+    ``balance`` is also the amount needed to pay the loan off at that point
+    and ``remaining_interest`` the interest such a payoff saves. Months past
+    the term report the fully repaid loan. Uses scalar math, which for a
+    single loan is far cheaper than numpy's per-call overhead.
+    """
+    amount, monthly_rate, term = float(loan["amount"]), float(loan["interest_rate"]) / 1200, int(loan["term_months"])
+    if amount < 0 or monthly_rate < 0 or term <= 0:
+        raise ValueError("Amount and interest rate must be non-negative, term must be positive.")
+    if month < 0:
+        raise ValueError("Month must not be negative.")
+    paid = min(int(month), term)
+    payment = amount * math.exp(term * math.log1p(monthly_rate)) / _scalar_annuity_factor(monthly_rate, term)
+    balance = _remaining_balance(amount, monthly_rate, payment, paid, term)
+    principal_paid = amount - balance
+    return {
+        "month": paid,
+        "payment": payment,
+        "balance": balance,
+        "interest_paid": payment * paid - principal_paid,
+        "principal_paid": principal_paid,
+        "remaining_interest": payment * (term - paid) - balance,
+    }
+
+
+def portfolio_position(loans, month):
+    """Return every loan's state after month payments, plus portfolio totals.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``);
+    month counts payments made on each loan. Each measure is one vectorized
+    pass over the book. Returns per-loan arrays keyed by measure (with
+    ``id``) and their sums under ``"totals"``.
+    """
+    if month < 0:
+        raise ValueError("Month must not be negative.")
+    values = _position_measures(*loan_arrays(loans["amount"], loans["interest_rate"], loans["term_months"]), month)
+    position = {"id": np.asarray(loans["id"]), **dict(zip(POSITION_MEASURES, values))}
+    position["totals"] = {measure: float(position[measure].sum()) for measure in POSITION_MEASURES}
+    return position
+
+
+def _shock_measures(amounts, monthly_rates, terms, at_month):
+    """Return payment, total interest and balance after at_month payments (broadcasting over rate rows)."""
+    payment = annuity_payments(amounts, monthly_rates, terms)
+    balance = _remaining_balance(amounts, monthly_rates, payment, np.minimum(at_month, terms), terms)
+    return payment, payment * terms - amounts, balance
+
+
+def rate_shock_grid(loans, shocks_bp=DEFAULT_SHOCKS_BP, at_month=12, per_loan=False,
+                    chunk_loans=DEFAULT_CHUNK_LOANS):
+    """Reprice a set of loans under parallel interest-rate shocks.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``)
+    and ``shocks_bp`` the shifts in basis points; shocked rates are floored
+    at zero. Each chunk of loans is evaluated as one scenarios x loans
+    broadcast. Returns per-scenario portfolio sums of monthly payment, total
+    interest over the term and balance outstanding after ``at_month``
+    payments, plus their change against the unshocked book; with
+    ``per_loan`` also scenarios x loans arrays under ``"loans"``.
+    """
+    amounts, monthly_rates, terms = loan_arrays(loans["amount"], loans["interest_rate"], loans["term_months"])
+    shocks = np.atleast_1d(np.asarray(shocks_bp, dtype=np.float64))
+    shifts = np.concatenate([[0.0], shocks])[:, None] / 120_000  # Row 0 is the unshocked base
+    sums = {measure: np.zeros(len(shifts)) for measure in SHOCK_MEASURES}
+    if per_loan:
+        per = {measure: np.empty((len(shocks), len(terms))) for measure in SHOCK_MEASURES}
+
+    for start in range(0, len(terms), chunk_loans):
+        stop = start + chunk_loans
+        rates = np.maximum(monthly_rates[start:stop] + shifts, 0.0)
+        values = _shock_measures(amounts[start:stop], rates, terms[start:stop], at_month)
+        for measure, value in zip(SHOCK_MEASURES, values):
+            sums[measure] += value.sum(axis=1)
+            if per_loan:
+                per[measure][:, start:stop] = value[1:]
+
+    grid = {"shock_bp": shocks}
+    for measure in SHOCK_MEASURES:
+        grid[measure] = sums[measure][1:]
+        grid[f"{measure}_change"] = sums[measure][1:] - sums[measure][0]
+    if per_loan:
+        grid["loans"] = {"id": np.asarray(loans["id"]), **per}
+    return grid
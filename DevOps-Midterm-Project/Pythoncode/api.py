@@ -0,0 +1,209 @@
+"""
+JSON API module for the Bank Loan Management System.
+Serves the loan service over HTTP/1.1 with asyncio and keep-alive connections.
+
+Run with: python api.py [--db loans.db] [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from journal import Journal
+from repository import open_repository
+from schedule_cache import schedule_cache
+from service import LoanService, NotFoundError
+
+MAX_BODY = 1 << 20
+KEEP_ALIVE_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """Error that maps directly to an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _query_number(query, key, convert):
+    return convert(query[key]) if query.get(key) not in (None, "") else None
+
+
+def build_routes(service):
+    """Return the (method, path regex, handler) routing table for a service.
+
+    Handlers take (match, query, body) and return JSON-serializable data.
+    """
+    def page(query):
+        return {"offset": int(query.get("offset", 0)), "limit": int(query.get("limit", 100))}
+
+    routes = [
+        ("GET", r"/health", lambda m, q, b: {"status": "ok"}),
+        ("GET", r"/totals", lambda m, q, b: service.totals()),
+        ("GET", r"/clients", lambda m, q, b: service.list_clients(**page(q))),
+        ("POST", r"/clients", lambda m, q, b: service.create_client(b.get("name", ""), b.get("email", ""),
+                                                                     b.get("phone", ""))),
+        ("GET", r"/clients/(\d+)", lambda m, q, b: service.get_client(int(m[1]))),
+        ("PATCH", r"/clients/(\d+)", lambda m, q, b: service.update_client(int(m[1]), **b)),
+        ("DELETE", r"/clients/(\d+)", lambda m, q, b: service.delete_client(int(m[1]))),
+        ("GET", r"/clients/(\d+)/loans", lambda m, q, b: service.client_loans(int(m[1]))),
+        ("GET", r"/loans", lambda m, q, b: service.list_loans(
+            **page(q), status=q.get("status"), client_id=_query_number(q, "client_id", int),
+            min_amount=_query_number(q, "min_amount", float), max_amount=_query_number(q, "max_amount", float))),
+        ("POST", r"/loans", lambda m, q, b: service.create_loan(**b)),
+        ("GET", r"/loans/(\d+)", lambda m, q, b: service.get_loan(int(m[1]))),
+        ("PATCH", r"/loans/(\d+)", lambda m, q, b: service.update_loan(int(m[1]), **b)),
+        ("DELETE", r"/loans/(\d+)", lambda m, q, b: service.delete_loan(int(m[1]))),
+        ("GET", r"/loans/(\d+)/amortization", lambda m, q, b: service.amortization(int(m[1]))),
+    ]
+    return [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in routes]
+
+
+class LoanAPI:
+    """Minimal HTTP/1.1 server exposing a LoanService as JSON.
+
+    Connections are kept alive by default (HTTP/1.1) and requests on one
+    connection are answered in order, so pipelining works too. Every handler
+    runs on the event loop without awaiting, so each mutation is atomic with
+    respect to other requests.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.routes = build_routes(service)
+
+    def dispatch(self, method, target, body):
+        """Route one request and return (status, payload)."""
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                status = HTTPStatus.CREATED if method == "POST" else HTTPStatus.OK
+                return status, handler(match, query, data)
+            except NotFoundError as e:
+                return HTTPStatus.NOT_FOUND, {"error": str(e)}
+            except (ValueError, TypeError, OverflowError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        if allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Method {method} not allowed."}
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {url.path}."}
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it or asks to."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    break
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                    length = self._content_length(headers)
+                    if length > MAX_BODY:
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload, version, headers = e.status, {"error": str(e)}, "HTTP/1.1", {"connection": "close"}
+                except Exception:
+                    logger.exception("Unhandled error while serving a request")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error."}
+                    version, headers = "HTTP/1.1", {"connection": "close"}
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line.") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+        return method.upper(), target, version, headers
+
+    @staticmethod
+    def _content_length(headers):
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length must be a whole number.") from None
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length must not be negative.")
+        return length
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def serve(self, host, port):
+        """Listen on host:port until cancelled."""
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"Loan API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bank Loan Management System JSON API")
+    parser.add_argument("--db", help="SQLite database file (default: in-memory)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--journal", metavar="DIR", help="journal changes to the in-memory store in this directory")
+    args = parser.parse_args(argv)
+    if args.journal and args.db:
+        parser.error("--journal applies to the in-memory store; a --db database is already persistent")
+    repo = open_repository(args.db)
+    schedule_cache.watch(repo)
+    journal = Journal(args.journal) if args.journal else None
+    if journal:
+        journal.open(repo)
+    try:
+        import uvloop  # Optional: faster event loop when installed
+        uvloop.install()
+    except ImportError:
+        pass
+    try:
+        asyncio.run(LoanAPI(LoanService(repo)).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if journal:
+            journal.close()
+
+
+if __name__ == "__main__":
+    main()
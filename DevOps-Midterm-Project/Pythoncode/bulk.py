@@ -0,0 +1,144 @@
+"""
+Bulk import/export module for the Bank Loan Management System.
+Contains streaming CSV/JSONL readers and writers for clients and loans.
+"""
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from itertools import islice
+
+from loan_table import LOAN_FIELDS
+from repository import validate_client, validate_id, validate_loan
+
+CLIENT_FIELDS = ("id", "name", "email", "phone")
+FIELDS = {"clients": CLIENT_FIELDS, "loans": LOAN_FIELDS}
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def detect_format(path):
+    """Guess the file format from its extension, defaulting to CSV."""
+    return "jsonl" if str(path).endswith((".jsonl", ".json")) else "csv"
+
+
+@contextmanager
+def open_text(path, mode):
+    """Open a text file, treating '-' as stdin/stdout."""
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        yield f
+
+
+def read_records(f, fmt):
+    """Yield (line number, record) pairs from a CSV or JSONL stream.
+
+    JSONL lines are yielded undecoded so that a malformed line is rejected on
+    its own instead of aborting the whole import.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_num, line in enumerate(f, 1):
+            if line.strip():
+                yield line_num, line
+
+
+def parse_id(value, kind):
+    """Convert a raw ID field to a validated int, or None if it is empty."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{kind} ID must be a whole number.")
+    try:
+        record_id = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{kind} ID must be a whole number.") from None
+    validate_id(record_id, kind)
+    return record_id
+
+
+def _require_object(record):
+    if not isinstance(record, dict):
+        raise ValueError("Each record must be an object with named fields.")
+
+
+def parse_client(record):
+    """Convert and validate a raw client record, returning add_client() arguments."""
+    _require_object(record)
+    name = str(record.get("name") or "").strip()
+    email = str(record.get("email") or "").strip()
+    phone = str(record.get("phone") or "").strip()
+    validate_client(name, email, phone)
+    client_id = parse_id(record.get("id"), "Client")
+    return {"name": name, "email": email, "phone": phone, "client_id": client_id}
+
+
+def parse_loan(record):
+    """Convert and validate a raw loan record, returning add_loan() arguments."""
+    _require_object(record)
+    try:
+        client_id = parse_id(record["client_id"], "Client")
+        amount = float(record["amount"])
+        interest_rate = float(record["interest_rate"])
+        term_months = int(record["term_months"])
+    except KeyError as e:
+        raise ValueError(f"Missing field {e}.") from None
+    except OverflowError:
+        raise ValueError("Term must be a whole number of months.") from None
+    if client_id is None:
+        raise ValueError("Missing field 'client_id'.")
+    status = str(record.get("status") or "").strip().lower()
+    validate_loan(amount, interest_rate, term_months, status)
+    loan_id = parse_id(record.get("id"), "Loan")
+    return {"client_id": client_id, "amount": amount, "interest_rate": interest_rate,
+            "term_months": term_months, "status": status, "loan_id": loan_id}
+
+
+def import_records(repo, records, kind, chunk_size=DEFAULT_CHUNK_SIZE, on_reject=None):
+    """Validate and store records chunk by chunk, one transaction per chunk.
+
+    ``records`` yields (line number, record) pairs; only one chunk is held in
+    memory at a time. Rejected rows are passed to ``on_reject(line, record,
+    error)``. Returns an {"accepted": n, "rejected": n} summary.
+    """
+    parse, add = (parse_client, repo.add_client) if kind == "clients" else (parse_loan, repo.add_loan)
+    summary = {"accepted": 0, "rejected": 0}
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return summary
+        with repo.batch():
+            for line_num, record in chunk:
+                try:
+                    add(**parse(json.loads(record) if isinstance(record, str) else record))
+                except (ValueError, TypeError, OverflowError, MemoryError) as e:
+                    summary["rejected"] += 1
+                    if on_reject:
+                        on_reject(line_num, record, e)
+                else:
+                    summary["accepted"] += 1
+
+
+def export_records(repo, kind, fmt, f):
+    """Stream every client or loan to f as CSV or JSONL, returning the row count."""
+    fields = FIELDS[kind]
+    rows = repo.list_clients() if kind == "clients" else repo.iter_loans()
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([row[field] for field in fields])
+            count += 1
+    else:
+        for row in rows:
+            f.write(json.dumps({field: row[field] for field in fields}, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
@@ -0,0 +1,169 @@
+"""
+Client index module for the Bank Loan Management System.
+Contains prefix search and uniqueness indexes over client names, emails and phones.
+"""
+import re
+from bisect import bisect_left, insort
+
+# Appended to a prefix to get an exclusive upper bound for every key that starts with it
+PREFIX_END = "\U0010ffff"
+NON_DIGITS = re.compile(r"\D")
+
+
+def name_key(name):
+    """Return the case-insensitive search key of a name."""
+    return name.strip().casefold()
+
+
+def email_key(email):
+    """Return the normalized form of an email used for search and uniqueness."""
+    return email.strip().casefold()
+
+
+def phone_key(phone):
+    """Return the digits of a phone number, so formatting does not hide duplicates."""
+    return NON_DIGITS.sub("", phone) or phone.strip().casefold()
+
+
+class PrefixIndex:
+    """Sorted (key, client ID) pairs answering prefix queries with bisect.
+
+    Entries are kept in sorted chunks of at most 2 * CHUNK pairs (the layout
+    of a B-tree leaf level), so an insert or delete shifts one small list
+    instead of the whole index.
+    """
+
+    CHUNK = 512
+
+    def __init__(self):
+        self._chunks = []
+        self._maxes = []
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def add(self, key, client_id):
+        entry = (key, client_id)
+        if not self._chunks:
+            self._chunks.append([entry])
+            self._maxes.append(entry)
+            return
+        i = min(bisect_left(self._maxes, entry), len(self._chunks) - 1)
+        chunk = self._chunks[i]
+        insort(chunk, entry)
+        self._maxes[i] = chunk[-1]
+        if len(chunk) > 2 * self.CHUNK:
+            self._chunks[i:i + 1] = [chunk[:self.CHUNK], chunk[self.CHUNK:]]
+            self._maxes[i:i + 1] = [chunk[self.CHUNK - 1], chunk[-1]]
+
+    def extend(self, entries):
+        """Add many (key, client ID) pairs with one sort instead of an insert each."""
+        merged = sorted([entry for chunk in self._chunks for entry in chunk] + list(entries))
+        self._chunks = [merged[i:i + self.CHUNK] for i in range(0, len(merged), self.CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def remove(self, key, client_id):
+        entry = (key, client_id)
+        i = bisect_left(self._maxes, entry)
+        if i == len(self._chunks):
+            return
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, entry)
+        if j < len(chunk) and chunk[j] == entry:
+            del chunk[j]
+            if chunk:
+                self._maxes[i] = chunk[-1]
+            else:
+                del self._chunks[i], self._maxes[i]
+
+    def ids(self, prefix=""):
+        """Return the IDs whose key starts with prefix, in key order."""
+        stop = (prefix + PREFIX_END,)
+        found = []
+        for i in range(bisect_left(self._maxes, (prefix,)), len(self._chunks)):
+            chunk = self._chunks[i]
+            end = bisect_left(chunk, stop)
+            found.extend(client_id for _, client_id in chunk[bisect_left(chunk, (prefix,)):end])
+            if end < len(chunk):
+                break
+        return found
+
+
+class ClientIndex:
+    """Name/email prefix indexes plus email/phone hash indexes for one client store.
+
+    The hash indexes map normalized email and phone to a client ID, so a
+    duplicate is found with one dict lookup when a client is added or edited.
+    """
+
+    def __init__(self):
+        self.names = PrefixIndex()
+        self.emails = PrefixIndex()
+        self.by_email = {}
+        self.by_phone = {}
+
+    def check(self, email, phone, client_id=None):
+        """Raise ValueError if another client already uses this email or phone."""
+        owner = self.by_email.get(email_key(email))
+        if owner is not None and owner != client_id:
+            raise ValueError(f"Email {email} is already used by client ID {owner}.")
+        owner = self.by_phone.get(phone_key(phone))
+        if owner is not None and owner != client_id:
+            raise ValueError(f"Phone {phone} is already used by client ID {owner}.")
+
+    def check_many(self, rows):
+        """Raise ValueError if any (name, email, phone) row clashes with a client or an earlier row."""
+        email_keys = {email_key(email) for _, email, _ in rows}
+        phone_keys = {phone_key(phone) for _, _, phone in rows}
+        if (len(email_keys) == len(phone_keys) == len(rows)
+                and self.by_email.keys().isdisjoint(email_keys) and self.by_phone.keys().isdisjoint(phone_keys)):
+            return
+        emails, phones = set(), set()  # Slow path: find the first offending row for the message
+        for _, email, phone in rows:
+            self.check(email, phone)
+            if email_key(email) in emails:
+                raise ValueError(f"Email {email} appears more than once.")
+            if phone_key(phone) in phones:
+                raise ValueError(f"Phone {phone} appears more than once.")
+            emails.add(email_key(email))
+            phones.add(phone_key(phone))
+
+    def add_many(self, clients):
+        """Index many new clients at once."""
+        clients = list(clients)
+        ids = [client["id"] for client in clients]
+        email_keys = [email_key(client["email"]) for client in clients]
+        self.names.extend(zip([name_key(client["name"]) for client in clients], ids))
+        self.emails.extend(zip(email_keys, ids))
+        self.by_email.update(zip(email_keys, ids))
+        self.by_phone.update(zip([phone_key(client["phone"]) for client in clients], ids))
+
+    def add(self, client):
+        self.names.add(name_key(client["name"]), client["id"])
+        self.emails.add(email_key(client["email"]), client["id"])
+        self.by_email[email_key(client["email"])] = client["id"]
+        self.by_phone[phone_key(client["phone"])] = client["id"]
+
+    def remove(self, client):
+        self.names.remove(name_key(client["name"]), client["id"])
+        self.emails.remove(email_key(client["email"]), client["id"])
+        if self.by_email.get(email_key(client["email"])) == client["id"]:
+            del self.by_email[email_key(client["email"])]
+        if self.by_phone.get(phone_key(client["phone"])) == client["id"]:
+            del self.by_phone[phone_key(client["phone"])]
+
+    def search(self, query, name_of):
+        """Return IDs whose name or email starts with query, ordered by name then ID.
+
+        ``name_of(client_id)`` returns a client's name for ordering the email
+        matches; an empty query lists every client straight from the name index.
+        """
+        prefix = query.strip().casefold()
+        by_name = self.names.ids(prefix)
+        if not prefix:
+            return by_name
+        matched = set(by_name)
+        extra = [client_id for client_id in self.emails.ids(prefix) if client_id not in matched]
+        if not extra:
+            return by_name
+        return sorted(by_name + extra, key=lambda client_id: (name_key(name_of(client_id)), client_id))
@@ -0,0 +1,158 @@
+"""
+Exposure module for the Bank Loan Management System.
+Contains per-client exposure rollups kept current on every loan change, and a top-N concentration report.
+"""
+import heapq
+import weakref
+from operator import itemgetter
+
+import numpy as np
+
+import amortization
+
+# Running sums per client: loans, active loans, active principal, principal x rate, scheduled interest
+_LOANS, _ACTIVE, _PRINCIPAL, _RATE_WEIGHT, _INTEREST = range(5)
+_MEASURES = {
+    "scheduled_repayment": lambda sums: sums[_PRINCIPAL] + sums[_INTEREST],
+    "principal": itemgetter(_PRINCIPAL),
+    "interest": itemgetter(_INTEREST),
+    "loans": itemgetter(_LOANS),
+    "active_loans": itemgetter(_ACTIVE),
+    "avg_rate": lambda sums: sums[_RATE_WEIGHT] / sums[_PRINCIPAL] if sums[_PRINCIPAL] > 0 else 0.0,
+}
+EXPOSURE_MEASURES = tuple(_MEASURES)
+MONEY_MEASURES = ("scheduled_repayment", "principal", "interest")
+
+_books = weakref.WeakKeyDictionary()
+
+
+def _contribution(loan):
+    """Return one loan's contribution to its client's running sums."""
+    if loan["status"] != "active":
+        return (1, 0, 0.0, 0.0, 0.0)
+    amount = loan["amount"]
+    payment = amortization.loan_position(loan, 0)["payment"]
+    return (1, 1, amount, amount * loan["interest_rate"], payment * loan["term_months"] - amount)
+
+
+class ExposureBook:
+    """Per-client loan count, active principal, weighted average rate and scheduled repayment.
+
+    Only active loans count towards exposure: ``interest`` is the interest
+    scheduled over their full terms and ``scheduled_repayment`` is principal
+    plus that interest, i.e. the total of their scheduled payments. Loans
+    carry no start date, so this is not an outstanding balance (see
+    ``amortization.loan_position`` for the balance after a given month).
+    ``avg_rate`` is the principal-weighted average interest rate. The book
+    is built in one grouped pass over loan columns and then adjusted in
+    O(1) per loan event, so reports and drill-downs never rescan the loans.
+    """
+
+    def __init__(self):
+        self.by_client = {}
+
+    @classmethod
+    def from_columns(cls, loans):
+        """Build a book from loan columns (as returned by ``loan_columns()``) with one grouped pass."""
+        book = cls()
+        if not len(loans["id"]):
+            return book
+        amount = np.asarray(loans["amount"], dtype=np.float64)
+        rate = np.asarray(loans["interest_rate"], dtype=np.float64)
+        terms = np.asarray(loans["term_months"])
+        active = np.asarray(loans["status"]) == "active"
+        interest = np.where(active, amortization.monthly_payment(amount, rate, terms) * terms - amount, 0.0)
+        client_ids, group = np.unique(np.asarray(loans["client_id"]), return_inverse=True)
+        weights = (None, active, amount * active, amount * rate * active, interest)
+        sums = np.column_stack([np.bincount(group, weights=w, minlength=len(client_ids)) for w in weights])
+        book.by_client = {client_id: [int(row[0]), int(row[1]), *row[2:]]
+                          for client_id, row in zip(client_ids.tolist(), sums.tolist())}
+        return book
+
+    @classmethod
+    def watch(cls, repo):
+        """Build a book from repo and keep it current from repo's change events."""
+        book = cls.from_columns(repo.loan_columns())
+        repo.subscribe(book._on_change)
+        return book
+
+    # Updates
+
+    def add(self, loan):
+        sums = self.by_client.setdefault(loan["client_id"], [0, 0, 0.0, 0.0, 0.0])
+        for i, value in enumerate(_contribution(loan)):
+            sums[i] += value
+
+    def remove(self, loan):
+        sums = self.by_client.get(loan["client_id"])
+        if sums is None:
+            return
+        for i, value in enumerate(_contribution(loan)):
+            sums[i] -= value
+        if not sums[_LOANS]:
+            del self.by_client[loan["client_id"]]  # Also discards any floating-point residue
+
+    def _on_change(self, event, old, new):
+        if not event.startswith("loan_"):
+            return
+        if old is not None:
+            self.remove(old)
+        if new is not None:
+            self.add(new)
+
+    # Queries
+
+    def client(self, client_id):
+        """Return the exposure of one client (zeros if they have no loans)."""
+        return self._row(client_id, self.by_client.get(client_id, (0, 0, 0.0, 0.0, 0.0)))
+
+    def totals(self):
+        """Return the exposure summed over every client."""
+        sums = np.sum(list(self.by_client.values()), axis=0) if self.by_client else np.zeros(5)
+        return self._row(None, sums.tolist())
+
+    def top(self, n=10, by="scheduled_repayment"):
+        """Return the n clients with the largest measure by, largest first."""
+        if by not in EXPOSURE_MEASURES:
+            raise ValueError(f"Rank by must be one of {', '.join(EXPOSURE_MEASURES)}.")
+        if n <= 0:
+            raise ValueError("Number of clients must be positive.")
+        measure = _MEASURES[by]
+        best = heapq.nlargest(n, self.by_client.items(), key=lambda item: (measure(item[1]), -item[0]))
+        return [self._row(client_id, sums) for client_id, sums in best]
+
+    def concentration(self, n=10, by="scheduled_repayment"):
+        """Return the top n clients by a money measure with their share of the book.
+
+        Each row gains ``share`` and ``cumulative_share`` (fractions of the
+        portfolio total); the report also gives the top-n share and the
+        Herfindahl-Hirschman index (sum of squared shares over all clients).
+        """
+        if by not in MONEY_MEASURES:
+            raise ValueError(f"Concentration is measured on one of {', '.join(MONEY_MEASURES)}.")
+        values = _MEASURES[by](np.array(list(self.by_client.values())).T) if self.by_client else np.zeros(0)
+        total = float(values.sum())
+        cumulative = 0.0
+        rows = self.top(n, by)
+        for row in rows:
+            row["share"] = row[by] / total if total else 0.0
+            cumulative += row["share"]
+            row["cumulative_share"] = cumulative
+        hhi = float(((values / total) ** 2).sum()) if total else 0.0
+        return {"by": by, "total": total, "clients": len(self.by_client), "top": rows,
+                "top_share": cumulative, "hhi": hhi}
+
+    @staticmethod
+    def _row(client_id, sums):
+        row = {"client_id": client_id}
+        row.update((name, measure(sums)) for name, measure in _MEASURES.items())
+        row["loans"], row["active_loans"] = int(row["loans"]), int(row["active_loans"])
+        return row
+
+
+def book_for(repo):
+    """Return the ExposureBook following repo, building it on first use."""
+    book = _books.get(repo)
+    if book is None:
+        book = _books[repo] = ExposureBook.watch(repo)
+    return book
@@ -2,225 +2,277 @@
 Functions module for the Bank Loan Management System.
 Contains reusable logic for managing clients and loans.
 """
-def add_client(clients):
+import amortization
+import exposure
+import render
+from metrics import prompt
+from repository import SORT_KEYS
+from schedule_cache import schedule_cache
+
+def add_client(repo):
     """Add a new client to the system."""
     try:
-        client_id = len(clients) + 1
-        name = input("Enter client name: ").strip()
+        name = prompt("Enter client name: ").strip()
         if not name:
             raise ValueError("Name cannot be empty.")
-        email = input("Enter client email: ").strip()
+        email = prompt("Enter client email: ").strip()
         if "@" not in email or "." not in email:
             raise ValueError("Invalid email format.")
-        phone = input("Enter client phone (e.g., 052-45-55-78): ").strip()
-        if not phone:
-            raise ValueError("Phone cannot be empty.")
-        
-        client = {
-            "id": client_id,
-            "name": name,
-            "email": email,
-            "phone": phone
-        }
-        clients.append(client)
-        print(f"Client '{name}' added successfully!")
+        phone = prompt("Enter client phone (e.g., 052-45-55-78): ").strip()
+
+        client = repo.add_client(name, email, phone)
+        print(f"Client '{client['name']}' added successfully!")
     except ValueError as e:
         print(f"Error: {e}")
 
-def remove_client(clients, loans):
+def remove_client(repo):
     """Remove a client and their associated loans by ID."""
     try:
-        client_id = int(input("Enter client ID to remove: "))
-        client = next((c for c in clients if c["id"] == client_id), None)
-        if not client:
+        client_id = int(prompt("Enter client ID to remove: "))
+        if not repo.get_client(client_id):
             print(f"Client ID {client_id} not found.")
             return
-        # Remove associated loans
-        loans[:] = [loan for loan in loans if loan["client_id"] != client_id]
-        clients.remove(client)
+        repo.remove_client(client_id)
         print(f"Client ID {client_id} and their loans removed successfully!")
     except ValueError:
         print("Error: Invalid ID. Please enter a number.")
 
-def edit_client(clients):
+def edit_client(repo):
     """Edit an existing client's details."""
     try:
-        client_id = int(input("Enter client ID to edit: "))
-        client = next((c for c in clients if c["id"] == client_id), None)
+        client_id = int(prompt("Enter client ID to edit: "))
+        client = repo.get_client(client_id)
         if not client:
             print(f"Client ID {client_id} not found.")
             return
         print(f"Editing client: {client['name']}")
-        client["name"] = input("Enter new name (or press Enter to keep current): ").strip() or client["name"]
-        client["email"] = input("Enter new email (or press Enter to keep current): ").strip() or client["email"]
-        client["phone"] = input("Enter new phone (or press Enter to keep current): ").strip() or client["phone"]
-        if "@" not in client["email"] or "." not in client["email"]:
-            raise ValueError("Invalid email format.")
+        name = prompt("Enter new name (or press Enter to keep current): ").strip() or client["name"]
+        email = prompt("Enter new email (or press Enter to keep current): ").strip() or client["email"]
+        phone = prompt("Enter new phone (or press Enter to keep current): ").strip() or client["phone"]
+        repo.update_client(client_id, name=name, email=email, phone=phone)
         print(f"Client ID {client_id} updated successfully!")
     except ValueError as e:
         print(f"Error: {e}")
 
-def display_clients(clients):
+def display_clients(clients, options=None):
     """Display all clients in the system."""
     if not clients:
         print("No clients in the system.")
         return
-    print("\nClients:")
-    print("ID | Name | Email | Phone")
-    print("-" * 50)
-    for client in clients:
-        print(f"{client['id']} | {client['name']} | {client['email']} | {client['phone']}")
+    render.render_rows(clients, render.client_row, ("\nClients:", "ID | Name | Email | Phone", "-" * 50), options)
+
+def search_clients(repo, options=None):
+    """Find clients whose name or email starts with the entered text."""
+    query = prompt("Search by name or email prefix: ").strip()
+    if not query:
+        print("Search text cannot be empty.")
+        return
+    clients = repo.search_clients(query)
+    if not clients:
+        print(f"No clients match '{query}'.")
+        return
+    print(f"{len(clients)} client(s) match '{query}'.")
+    display_clients(clients, options)
 
-def add_loan(loans, clients):
+def add_loan(repo):
     """Add a new loan for a client."""
     try:
-        client_id = int(input("Enter client ID for the loan: "))
-        client = next((c for c in clients if c["id"] == client_id), None)
+        client_id = int(prompt("Enter client ID for the loan: "))
+        client = repo.get_client(client_id)
         if not client:
             print(f"Client ID {client_id} not found.")
             return
-        loan_id = len(loans) + 1
-        amount = float(input("Enter loan amount: "))
-        interest_rate = float(input("Enter interest rate (%): "))
-        term_months = int(input("Enter loan term (months): "))
-        status = input("Enter loan status (active/paid): ").lower()
-        
-        if amount < 0 or interest_rate < 0 or term_months <= 0:
-            raise ValueError("Amount and interest rate must be non-negative, term must be positive.")
-        if status not in ["active", "paid"]:
-            raise ValueError("Status must be 'active' or 'paid'.")
-        
-        loan = {
-            "id": loan_id,
-            "client_id": client_id,
-            "amount": amount,
-            "interest_rate": interest_rate,
-            "term_months": term_months,
-            "status": status
-        }
-        loans.append(loan)
-        print(f"Loan ID {loan_id} added successfully for {client['name']}!")
+        amount = float(prompt("Enter loan amount: "))
+        interest_rate = float(prompt("Enter interest rate (%): "))
+        term_months = int(prompt("Enter loan term (months): "))
+        status = prompt("Enter loan status (active/paid): ").lower()
+
+        loan = repo.add_loan(client_id, amount, interest_rate, term_months, status)
+        print(f"Loan ID {loan['id']} added successfully for {client['name']}!")
     except ValueError as e:
         print(f"Error: {e}")
 
-def remove_loan(loans):
+def remove_loan(repo):
     """Remove a loan by ID."""
     try:
-        loan_id = int(input("Enter loan ID to remove: "))
-        loan = next((l for l in loans if l["id"] == loan_id), None)
-        if not loan:
+        loan_id = int(prompt("Enter loan ID to remove: "))
+        if not repo.get_loan(loan_id):
             print(f"Loan ID {loan_id} not found.")
             return
-        loans.remove(loan)
+        repo.remove_loan(loan_id)
         print(f"Loan ID {loan_id} removed successfully!")
     except ValueError:
         print("Error: Invalid ID. Please enter a number.")
 
-def edit_loan(loans, clients):
+def edit_loan(repo):
     """Edit an existing loan's details."""
     try:
-        loan_id = int(input("Enter loan ID to edit: "))
-        loan = next((l for l in loans if l["id"] == loan_id), None)
+        loan_id = int(prompt("Enter loan ID to edit: "))
+        loan = repo.get_loan(loan_id)
         if not loan:
             print(f"Loan ID {loan_id} not found.")
             return
-        client = next((c for c in clients if c["id"] == loan["client_id"]), None)
-        print(f"Editing loan ID {loan_id} for {client['name']}")
-        loan["amount"] = float(input("Enter new amount (or press Enter to keep current): ") or loan["amount"])
-        loan["interest_rate"] = float(input("Enter new interest rate (or press Enter to keep current): ") or loan["interest_rate"])
-        loan["term_months"] = int(input("Enter new term in months (or press Enter to keep current): ") or loan["term_months"])
-        loan["status"] = input("Enter new status (active/paid, or press Enter to keep current): ").lower() or loan["status"]
-        if loan["amount"] < 0 or loan["interest_rate"] < 0 or loan["term_months"] <= 0:
-            raise ValueError("Amount and interest rate must be non-negative, term must be positive.")
-        if loan["status"] not in ["active", "paid"]:
-            raise ValueError("Status must be 'active' or 'paid'.")
+        print(f"Editing loan ID {loan_id} for {repo.client_name(loan['client_id'])}")
+        amount = float(prompt("Enter new amount (or press Enter to keep current): ") or loan["amount"])
+        interest_rate = float(prompt("Enter new interest rate (or press Enter to keep current): ") or loan["interest_rate"])
+        term_months = int(prompt("Enter new term in months (or press Enter to keep current): ") or loan["term_months"])
+        status = prompt("Enter new status (active/paid, or press Enter to keep current): ").lower() or loan["status"]
+        repo.update_loan(loan_id, amount=amount, interest_rate=interest_rate, term_months=term_months, status=status)
         print(f"Loan ID {loan_id} updated successfully!")
     except ValueError as e:
         print(f"Error: {e}")
 
-def display_loans(loans, clients):
+def display_loans(loans, repo, options=None):
     """Display all loans with client information."""
     if not loans:
         print("No loans in the system.")
         return
-    print("\nLoans:")
-    print("ID | Client | Amount | Interest Rate | Term (Months) | Status")
-    print("-" * 70)
-    for loan in loans:
-        client = next((c for c in clients if c["id"] == loan["client_id"]), None)
-        client_name = client["name"] if client else "Unknown"
-        print(f"{loan['id']} | {client_name} | ${loan['amount']:.2f} | {loan['interest_rate']}% | {loan['term_months']} | {loan['status']}")
+    header = ("\nLoans:", "ID | Client | Amount | Interest Rate | Term (Months) | Status", "-" * 70)
+    render.render_rows(loans, render.loan_formatter(repo.client_names()), header, options)
 
-def sort_clients(clients):
-    """Sort clients by name."""
-    if not clients:
+def sort_clients(repo, options=None):
+    """Display clients sorted by name."""
+    if not repo.client_count():
         print("No clients to sort.")
         return
-    sort_key = input("Sort by (name): ").lower()
+    sort_key = prompt("Sort by (name): ").lower()
     if sort_key != "name":
         print("Invalid sort key. Only 'name' is supported.")
         return
-    clients.sort(key=lambda x: x["name"].lower())
     print("Clients sorted by name.")
-    display_clients(clients)
+    display_clients(repo.search_clients(), options)
 
-def sort_loans(loans):
-    """Sort loans by a chosen key (amount, interest_rate, term_months)."""
-    if not loans:
+def sort_loans(repo, options=None):
+    """Display loans sorted by a chosen key (amount, interest_rate, term_months)."""
+    if not repo.loan_count():
         print("No loans to sort.")
         return
-    sort_key = input("Sort by (amount/interest_rate/term_months): ").lower()
-    valid_keys = ["amount", "interest_rate", "term_months"]
-    if sort_key not in valid_keys:
+    sort_key = prompt("Sort by (amount/interest_rate/term_months): ").lower()
+    if sort_key not in SORT_KEYS:
         print("Invalid sort key. Choose from: amount, interest_rate, term_months")
         return
-    loans.sort(key=lambda x: x[sort_key])
     print(f"Loans sorted by {sort_key}.")
-    display_loans(loans, [])
+    display_loans(repo.sorted_loans(sort_key), repo, options)
 
-def calculate_total_loans(loans):
+def calculate_total_loans(repo):
     """Calculate the total amount and interest of all active loans."""
-    if not loans:
+    if not repo.loan_count():
         print("No loans in the system.")
         return
-    total_amount = sum(loan["amount"] for loan in loans if loan["status"] == "active")
-    total_interest = sum(loan["amount"] * (loan["interest_rate"] / 100) for loan in loans if loan["status"] == "active")
+    total_amount, total_interest = repo.totals()
     print(f"Total active loan amount: ${total_amount:.2f}")
     print(f"Total interest on active loans: ${total_interest:.2f}")
+    for status, entry in repo.aggregates.by_status.items():
+        print(f"{status.capitalize()} loans: {entry['count']} | Principal: ${entry['principal']:.2f} | Interest: ${entry['interest']:.2f}")
 
-def generate_amortization_schedule(loans, clients):
+def display_schedule(loan, repo, options=None):
+    """Display the amortization schedule of one loan."""
+    schedule = schedule_cache.schedule_for(loan)
+    monthly_payment = amortization.monthly_payment(loan["amount"], loan["interest_rate"], loan["term_months"])
+    header = (f"\nAmortization Schedule for Loan ID {loan['id']} ({repo.client_name(loan['client_id'])})",
+              f"Loan Amount: ${loan['amount']:.2f}, Interest Rate: {loan['interest_rate']}%, Term: {loan['term_months']} months",
+              "Month | Payment | Principal | Interest | Balance",
+              "-" * 50)
+    rows = zip(*(schedule[c].tolist() for c in amortization.SCHEDULE_COLUMNS))
+    render.render_rows(rows, render.schedule_row, header, options)
+    print(f"Total Payment: ${monthly_payment * loan['term_months']:.2f}", file=options.out if options else None)
+
+def generate_amortization_schedule(repo, options=None):
     """Generate an amortization schedule for a selected loan."""
     try:
-        loan_id = int(input("Enter loan ID to generate amortization schedule: "))
-        loan = next((l for l in loans if l["id"] == loan_id), None)
+        loan_id = int(prompt("Enter loan ID to generate amortization schedule: "))
+        loan = repo.get_loan(loan_id)
         if not loan:
             print(f"Loan ID {loan_id} not found.")
             return
-        client = next((c for c in clients if c["id"] == loan["client_id"]), None)
-        client_name = client["name"] if client else "Unknown"
-        
-        principal = loan["amount"]
-        annual_rate = loan["interest_rate"] / 100
-        monthly_rate = annual_rate / 12
-        term_months = loan["term_months"]
-        
-        # Calculate monthly payment using annuity formula
-        monthly_payment = principal * (monthly_rate * (1 + monthly_rate) ** term_months) / ((1 + monthly_rate) ** term_months - 1)
-        
-        print(f"\nAmortization Schedule for Loan ID {loan_id} ({client_name})")
-        print(f"Loan Amount: ${principal:.2f}, Interest Rate: {loan['interest_rate']}%, Term: {term_months} months")
-        print("Month | Payment | Principal | Interest | Balance")
-        print("-" * 50)
-        
-        balance = principal
-        for month in range(1, term_months + 1):
-            interest = balance * monthly_rate
-            principal_payment = monthly_payment - interest
-            balance -= principal_payment
-            print(f"{month:2} | ${monthly_payment:.2f} | ${principal_payment:.2f} | ${interest:.2f} | ${balance:.2f}")
-            if balance < 0:
-                balance = 0  # Prevent negative balance due to rounding
-        
-        print(f"Total Payment: ${monthly_payment * term_months:.2f}")
+        display_schedule(loan, repo, options)
+    except ValueError:
+        print("Error: Invalid ID or calculation error.")
+
+def balance_at_month(repo):
+    """Show the balance, cumulative interest and principal, and payoff cost of a loan or the active book after a month."""
+    target = prompt("Enter loan ID (or 'all' for every active loan): ").strip().lower()
+    try:
+        loan_id = None if target == "all" else int(target)
+        month = int(prompt("After how many monthly payments? "))
+    except ValueError:
+        print("Error: Loan ID and month must be whole numbers.")
+        return
+    try:
+        if loan_id is None:
+            loans = repo.loan_columns(status="active")
+            if not len(loans["id"]):
+                print("No active loans in the system.")
+                return
+            position = amortization.portfolio_position(loans, month)["totals"]
+            print(f"\nActive portfolio ({len(loans['id'])} loans) after {month} payments:")
+        else:
+            loan = repo.get_loan(loan_id)
+            if not loan:
+                print(f"Loan ID {loan_id} not found.")
+                return
+            position = amortization.loan_position(loan, month)
+            print(f"\nLoan ID {loan_id} after {position['month']} of {loan['term_months']} payments:")
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Monthly payment: ${position['payment']:.2f}")
+    print(f"Remaining balance (payoff amount): ${position['balance']:.2f}")
+    print(f"Interest paid so far: ${position['interest_paid']:.2f}")
+    print(f"Principal repaid so far: ${position['principal_paid']:.2f}")
+    print(f"Interest saved by paying off now: ${position['remaining_interest']:.2f}")
+
+def display_exposure(report, repo, options=None):
+    """Display a top-N client concentration report."""
+    out = options.out if options else None
+    label = report["by"].replace("_", " ")
+    names = {row["client_id"]: repo.client_name(row["client_id"]) for row in report["top"]}
+    header = (f"\nTop {len(report['top'])} of {report['clients']} clients by {label} (portfolio total ${report['total']:.2f})",
+              "ID | Client | Loans | Active Principal | Avg Rate | Scheduled Interest | Scheduled Repayment | Share | Cumulative",
+              "-" * 110)
+    render.render_rows(report["top"], render.exposure_formatter(names), header, options)
+    print(f"Top {len(report['top'])} clients hold {report['top_share']:.2%} of {label}; "
+          f"Herfindahl index {report['hhi']:.4f}", file=out)
+
+def display_client_exposure(client_id, repo, options=None):
+    """Display one client's exposure rollup and their loans."""
+    out = options.out if options else None
+    client = repo.get_client(client_id)
+    if not client:
+        print(f"Client ID {client_id} not found.", file=out)
+        return
+    row = exposure.book_for(repo).client(client_id)
+    print(f"\nExposure of {client['name']} (ID {client_id}):", file=out)
+    print(f"Loans: {row['loans']} ({row['active_loans']} active)", file=out)
+    print(f"Active principal: ${row['principal']:.2f} at a weighted average rate of {row['avg_rate']:.2f}%", file=out)
+    print(f"Scheduled interest: ${row['interest']:.2f}", file=out)
+    print(f"Scheduled repayment: ${row['scheduled_repayment']:.2f}", file=out)
+    header = ("ID | Client | Amount | Interest Rate | Term (Months) | Status", "-" * 70)
+    render.render_rows(repo.loans_for_client(client_id), render.loan_formatter({client_id: client["name"]}), header, options)
+
+def exposure_report(repo, options=None):
+    """Show the clients with the largest exposure and their share of the portfolio, then one client's details."""
+    try:
+        count = int(prompt("How many clients? (press Enter for 10): ") or 10)
+    except ValueError:
+        print("Error: Invalid number. Please enter a whole number.")
+        return
+    by = prompt("Rank by (scheduled_repayment/principal/interest, press Enter for scheduled_repayment): ").strip().lower()
+    try:
+        report = exposure.book_for(repo).concentration(count, by or "scheduled_repayment")
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not report["clients"]:
+        print("No loans in the system.")
+        return
+    display_exposure(report, repo, options)
+    target = prompt("Enter a client ID for details (or press Enter to skip): ").strip()
+    if not target:
+        return
+    try:
+        client_id = int(target)
     except ValueError:
-        print("Error: Invalid ID or calculation error.")
\ No newline at end of file
+        print("Error: Invalid ID. Please enter a number.")
+        return
+    display_client_exposure(client_id, repo, options)
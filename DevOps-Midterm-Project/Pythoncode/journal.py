@@ -0,0 +1,260 @@
+"""
+Journal module for the Bank Loan Management System.
+Contains an append-only change journal with snapshot compaction for the in-memory store.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from loan_table import LOAN_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "snapshot-"
+SEGMENT_PREFIX = "journal-"
+CLIENT_FIELDS = ("id", "name", "email", "phone")
+DEFAULT_SYNC_EVERY = 256
+DEFAULT_SYNC_INTERVAL = 0.2
+DEFAULT_SNAPSHOT_EVERY = 50_000
+
+
+def _numbered_files(directory, prefix, suffix):
+    """Return [(sequence number, path)] for files named prefix + number + suffix, oldest first."""
+    found = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix) and name[len(prefix):-len(suffix)].isdigit():
+            found.append((int(name[len(prefix):-len(suffix)]), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _segment_path(directory, seq):
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{seq:012d}.jsonl")
+
+
+def _fsync_directory(directory):
+    """Make renames and new files in directory durable (a no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def make_entry(seq, event, old, new):
+    """Return the compact journal record of one change event.
+
+    Additions keep the new record, removals the removed one and updates only
+    the fields that changed (before and after), which is all replay needs
+    and doubles as the audit trail.
+    """
+    entry = {"seq": seq, "ts": round(time.time(), 3), "event": event}
+    if old is None:
+        entry["new"] = new
+    elif new is None:
+        entry["old"] = old
+    else:
+        changed = [field for field in new if new[field] != old.get(field)]
+        entry["id"] = new["id"]
+        entry["old"] = {field: old[field] for field in changed}
+        entry["new"] = {field: new[field] for field in changed}
+    return entry
+
+
+def apply_entry(repo, entry):
+    """Re-apply one journal record to repo.
+
+    Removals of records that are already gone are skipped, so a snapshot
+    taken part-way through a cascading client removal replays cleanly.
+    """
+    event = entry["event"]
+    if event == "client_added":
+        client = entry["new"]
+        repo.add_client(client["name"], client["email"], client["phone"], client_id=client["id"])
+    elif event == "client_updated":
+        repo.update_client(entry["id"], **entry["new"])
+    elif event == "client_removed":
+        if repo.get_client(entry["old"]["id"]):
+            repo.remove_client(entry["old"]["id"])
+    elif event == "loan_added":
+        loan = entry["new"]
+        repo.add_loan(loan["client_id"], loan["amount"], loan["interest_rate"], loan["term_months"],
+                      loan["status"], loan_id=loan["id"])
+    elif event == "loan_updated":
+        repo.update_loan(entry["id"], **entry["new"])
+    elif event == "loan_removed":
+        if repo.get_loan(entry["old"]["id"]):
+            repo.remove_loan(entry["old"]["id"])
+    else:
+        raise ValueError(f"Unknown journal event {event!r}.")
+
+
+def save_snapshot(repo, path):
+    """Atomically write repo's clients and loans to an .npz snapshot."""
+    clients, loans, next_client_id, next_loan_id = repo.snapshot_columns()
+    arrays = {f"client_{field}": np.asarray(clients[field], dtype=np.int64 if field == "id" else str)
+              for field in CLIENT_FIELDS}
+    arrays.update({f"loan_{field}": loans[field].astype(str) if field == "status" else loans[field]
+                   for field in LOAN_FIELDS})
+    arrays["next_ids"] = np.array([next_client_id, next_loan_id], dtype=np.int64)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(repo, path):
+    """Bulk-load a snapshot written by save_snapshot into an empty repo."""
+    with np.load(path) as data:
+        clients = {field: data[f"client_{field}"] for field in CLIENT_FIELDS}
+        loans = {field: data[f"loan_{field}"] for field in LOAN_FIELDS}
+        next_client_id, next_loan_id = data["next_ids"].tolist()
+    repo.load_snapshot(clients, loans, next_client_id, next_loan_id)
+
+
+def read_entries(directory):
+    """Yield every complete journal record still on disk, oldest first."""
+    last = 0
+    for _, path in _numbered_files(directory, SEGMENT_PREFIX, ".jsonl"):
+        for entry, _ in _read_segment(path):
+            if entry["seq"] > last:
+                last = entry["seq"]
+                yield entry
+
+
+def _read_segment(path):
+    """Yield (record, end offset) for each complete line, stopping at a torn tail."""
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("missing newline")
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring torn journal tail in %s after byte %d", path, offset)
+                return
+            offset += len(line)
+            yield entry, offset
+
+
+class Journal:
+    """Append-only record of every change to an in-memory repository.
+
+    ``snapshot-N.npz`` holds the store after entry N and ``journal-N.jsonl``
+    the entries after it, one JSON object per line, so a restart loads the
+    newest snapshot and replays only its segment. Entries are written
+    through a buffer and fsynced in groups: after ``sync_every`` entries, or
+    by a background thread within ``sync_interval`` seconds, so a crash loses
+    at most that window. Every ``snapshot_every`` entries a new snapshot is
+    written and older snapshots and segments are deleted; ``keep_history``
+    keeps the old segments as an audit trail.
+    """
+
+    def __init__(self, directory, sync_every=DEFAULT_SYNC_EVERY, sync_interval=DEFAULT_SYNC_INTERVAL,
+                 snapshot_every=DEFAULT_SNAPSHOT_EVERY, keep_history=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.keep_history = keep_history
+        self.seq = 0
+        self._snapshot_seq = 0
+        self._pending = 0
+        self._file = None
+        self._repo = None
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._flusher = None
+
+    def open(self, repo):
+        """Restore repo from the newest snapshot and journal tail, then start recording.
+
+        repo must be an empty in-memory store. Returns the number of
+        entries replayed.
+        """
+        snapshots = _numbered_files(self.directory, SNAPSHOT_PREFIX, ".npz")
+        if snapshots:
+            self._snapshot_seq, path = snapshots[-1]
+            load_snapshot(repo, path)
+        self.seq = self._snapshot_seq
+        replayed = 0
+        path = _segment_path(self.directory, self._snapshot_seq)
+        if os.path.exists(path):
+            good = 0
+            for entry, good in _read_segment(path):
+                if entry["seq"] > self.seq:
+                    apply_entry(repo, entry)
+                    self.seq = entry["seq"]
+                    replayed += 1
+            if good < os.path.getsize(path):
+                os.truncate(path, good)  # Drop a torn tail so new entries start on a clean line
+        self._file = open(path, "ab")
+        self._repo = repo
+        repo.subscribe(self._record)
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True)
+        self._flusher.start()
+        return replayed
+
+    def snapshot(self):
+        """Write a snapshot of the current store, start a new segment and drop what it supersedes."""
+        with self._lock:
+            self._sync()
+            seq = self.seq
+            save_snapshot(self._repo, os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{seq:012d}.npz"))
+            self._file.close()
+            self._file = open(_segment_path(self.directory, seq), "ab")
+            _fsync_directory(self.directory)
+            self._snapshot_seq = seq
+            for old_seq, path in _numbered_files(self.directory, SNAPSHOT_PREFIX, ".npz"):
+                if old_seq < seq:
+                    os.remove(path)
+            if not self.keep_history:
+                for old_seq, path in _numbered_files(self.directory, SEGMENT_PREFIX, ".jsonl"):
+                    if old_seq < seq:
+                        os.remove(path)
+
+    def close(self):
+        """Stop recording and make every entry durable."""
+        if self._file is None:
+            return
+        self._stopped.set()
+        self._flusher.join()
+        self._repo.unsubscribe(self._record)
+        with self._lock:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _record(self, event, old, new):
+        with self._lock:
+            self.seq += 1
+            line = json.dumps(make_entry(self.seq, event, old, new), ensure_ascii=False, separators=(",", ":"))
+            self._file.write(line.encode("utf-8") + b"\n")
+            self._pending += 1
+            if self._pending >= self.sync_every:
+                self._sync()
+            if self.snapshot_every and self.seq - self._snapshot_seq >= self.snapshot_every:
+                self.snapshot()
+
+    def _sync(self):
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.sync_interval):
+            with self._lock:
+                self._sync()
@@ -0,0 +1,132 @@
+"""
+Loan index module for the Bank Loan Management System.
+Contains maintained sorted indexes over loan columns for ordered, top-k and range queries.
+"""
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+CHUNK = 2048
+
+
+class SortedColumnIndex:
+    """(value, loan ID) pairs kept in ascending order in sorted chunks.
+
+    Values and IDs live in typed ``array`` chunks of at most 2 * CHUNK pairs
+    (16 bytes per loan), and ``_maxes`` records the last pair of every chunk.
+    Locating a value is a bisect over the chunks plus a bisect inside one
+    chunk, and an insert or delete only shifts that chunk in place. Ties are
+    ordered by loan ID. Query results are returned as numpy ID arrays.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._values = []
+        self._ids = []
+        self._maxes = []
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._ids)
+
+    # Mutation
+
+    def add(self, value, loan_id):
+        if not self._ids:
+            self._values.append(array(self.dtype.char, [value]))
+            self._ids.append(array("q", [loan_id]))
+            self._maxes.append((value, loan_id))
+            return
+        c = min(bisect_left(self._maxes, (value, loan_id)), len(self._ids) - 1)
+        values, ids = self._values[c], self._ids[c]
+        p = self._position(values, ids, value, loan_id)
+        values.insert(p, value)
+        ids.insert(p, loan_id)
+        if len(ids) > 2 * CHUNK:
+            self._values[c:c + 1] = [values[:CHUNK], values[CHUNK:]]
+            self._ids[c:c + 1] = [ids[:CHUNK], ids[CHUNK:]]
+            self._maxes[c:c + 1] = [(values[CHUNK - 1], ids[CHUNK - 1]), (values[-1], ids[-1])]
+        else:
+            self._maxes[c] = (values[-1], ids[-1])
+
+    def extend(self, values, loan_ids):
+        """Add many pairs; large batches are merged with one vectorized sort."""
+        values = np.asarray(values, dtype=self.dtype)
+        loan_ids = np.asarray(loan_ids, dtype=np.int64)
+        if len(loan_ids) <= max(CHUNK, len(self) // 16):
+            for value, loan_id in zip(values.tolist(), loan_ids.tolist()):
+                self.add(value, loan_id)
+            return
+        values = np.concatenate([np.frombuffer(chunk, dtype=self.dtype) for chunk in self._values] + [values])
+        loan_ids = np.concatenate([np.frombuffer(chunk, dtype=np.int64) for chunk in self._ids] + [loan_ids])
+        order = np.lexsort((loan_ids, values))
+        values, loan_ids = values[order], loan_ids[order]
+        bounds = range(0, len(loan_ids), CHUNK)
+        self._values = [array(self.dtype.char, values[i:i + CHUNK].tobytes()) for i in bounds]
+        self._ids = [array("q", loan_ids[i:i + CHUNK].tobytes()) for i in bounds]
+        self._maxes = [(chunk_values[-1], chunk_ids[-1]) for chunk_values, chunk_ids in zip(self._values, self._ids)]
+
+    def remove(self, value, loan_id):
+        c = bisect_left(self._maxes, (value, loan_id))
+        if c == len(self._ids):
+            return
+        values, ids = self._values[c], self._ids[c]
+        p = self._position(values, ids, value, loan_id)
+        if p == len(ids) or ids[p] != loan_id:
+            return
+        if len(ids) == 1:
+            del self._values[c], self._ids[c], self._maxes[c]
+            return
+        del values[p], ids[p]
+        self._maxes[c] = (values[-1], ids[-1])
+
+    # Queries
+
+    def ascending(self):
+        """Yield loan ID arrays chunk by chunk in ascending value order."""
+        for ids in self._ids:
+            yield np.array(ids, dtype=np.int64)
+
+    def descending(self):
+        """Yield loan ID arrays chunk by chunk in descending value order."""
+        for ids in reversed(self._ids):
+            yield np.array(ids, dtype=np.int64)[::-1]
+
+    def top(self, k, largest=True, accept=None):
+        """Return up to k loan IDs with the largest (or smallest) values.
+
+        ``accept(ids)`` may return a boolean mask to skip loans; only as many
+        chunks as needed to find k accepted loans are looked at.
+        """
+        found, needed = [], k
+        for ids in (self.descending() if largest else self.ascending()):
+            if needed <= 0:
+                break
+            if accept is not None:
+                ids = ids[accept(ids)]
+            found.append(ids[:needed])
+            needed -= len(found[-1])
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def between(self, low=None, high=None):
+        """Return loan IDs with low <= value <= high in ascending value order."""
+        if not self._ids:
+            return np.empty(0, dtype=np.int64)
+        first = 0 if low is None else bisect_left(self._maxes, (low,))
+        last = len(self._ids) - 1 if high is None else min(bisect_left(self._maxes, (high, math.inf)),
+                                                            len(self._ids) - 1)
+        found = []
+        for c in range(first, last + 1):
+            values = self._values[c]
+            start = 0 if low is None else bisect_left(values, low)
+            stop = len(values) if high is None else bisect_right(values, high)
+            found.append(np.array(self._ids[c][start:stop], dtype=np.int64))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    # Helpers
+
+    @staticmethod
+    def _position(values, ids, value, loan_id):
+        lo = bisect_left(values, value)
+        return bisect_left(ids, loan_id, lo, bisect_right(values, value, lo))
@@ -0,0 +1,246 @@
+"""
+Loan table module for the Bank Loan Management System.
+Contains the columnar, NumPy-backed storage used for loans.
+"""
+from collections.abc import MutableMapping
+
+import numpy as np
+
+LOAN_FIELDS = ("id", "client_id", "amount", "interest_rate", "term_months", "status")
+LOAN_STATUSES = ("active", "paid")
+FREE = -1
+# The ID -> slot index is a dense array (8 bytes per ID up to the largest), so loan IDs are capped
+MAX_ID = 100_000_000
+STATUS_CODES = {status: code for code, status in enumerate(LOAN_STATUSES)}
+COLUMN_DTYPES = {
+    "id": np.int64,
+    "client_id": np.int64,
+    "amount": np.float64,
+    "interest_rate": np.float64,
+    "term_months": np.int32,
+    "status": np.int8,
+}
+_PY_TYPES = {"id": int, "client_id": int, "amount": float, "interest_rate": float, "term_months": int}
+
+
+class LoanRow(MutableMapping):
+    """Dict-like view of one loan stored in a LoanTable.
+
+    Reads and writes go straight to the table's arrays. The view remembers
+    its loan ID, so it raises KeyError instead of silently showing another
+    loan if its slot is deleted and reused.
+    """
+
+    __slots__ = ("_table", "_slot", "_id")
+
+    def __init__(self, table, slot, loan_id):
+        self._table = table
+        self._slot = slot
+        self._id = loan_id
+
+    def _check(self):
+        if self._table._columns["id"][self._slot] != self._id or self._table._columns["status"][self._slot] == FREE:
+            raise KeyError(f"Loan ID {self._id} no longer exists.")
+
+    def __getitem__(self, field):
+        if field not in COLUMN_DTYPES:
+            raise KeyError(field)
+        self._check()
+        value = self._table._columns[field][self._slot]
+        if field == "status":
+            return LOAN_STATUSES[value]
+        return _PY_TYPES[field](value)
+
+    def __setitem__(self, field, value):
+        if field == "id" or field not in COLUMN_DTYPES:
+            raise KeyError(f"Field '{field}' cannot be assigned.")
+        self._check()
+        self._table._columns[field][self._slot] = STATUS_CODES[value] if field == "status" else value
+
+    def __delitem__(self, field):
+        raise TypeError("Loan fields cannot be deleted.")
+
+    def __iter__(self):
+        return iter(LOAN_FIELDS)
+
+    def __len__(self):
+        return len(LOAN_FIELDS)
+
+    def __repr__(self):
+        return f"LoanRow({dict(self)!r})"
+
+
+class LoanTable:
+    """Columnar loan storage with typed arrays and free-slot reuse.
+
+    Each loan costs about 45 bytes (five numeric columns, a one-byte status
+    code and a dense ID -> slot index) instead of a several-hundred-byte dict.
+    Slots of deleted loans are marked FREE and handed out again on append.
+    Loan IDs must be from 1 to MAX_ID; anything else is rejected before the
+    table changes.
+    """
+
+    def __init__(self, capacity=1024):
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._columns["status"][:] = FREE
+        self._slot_of_id = np.full(capacity, FREE, dtype=np.int64)
+        self._size = 0
+        self._count = 0
+        self._free = []
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, loan_id):
+        return self._slot(loan_id) != FREE
+
+    def __iter__(self):
+        """Yield row views ordered by loan ID."""
+        for slot in self.slots_by_id():
+            yield LoanRow(self, int(slot), int(self._columns["id"][slot]))
+
+    # Mutation
+
+    def append(self, loan_id, client_id, amount, interest_rate, term_months, status):
+        """Store one loan, reusing a free slot if there is one, and return its slot."""
+        if not 1 <= loan_id <= MAX_ID:
+            raise ValueError(f"Loan ID must be from 1 to {MAX_ID}.")
+        if loan_id in self:
+            raise ValueError(f"Loan ID {loan_id} already exists.")
+        slot = self._free.pop() if self._free else self._take_tail(1)
+        self._reserve_ids(loan_id + 1)
+        values = (loan_id, client_id, amount, interest_rate, term_months, STATUS_CODES[status])
+        for name, value in zip(COLUMN_DTYPES, values):
+            self._columns[name][slot] = value
+        self._slot_of_id[loan_id] = slot
+        self._count += 1
+        return slot
+
+    def extend(self, ids, client_ids, amounts, interest_rates, term_months, statuses):
+        """Store many loans from column arrays in one vectorized step.
+
+        ``statuses`` may hold status names or status codes.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        statuses = np.asarray(statuses)
+        if statuses.dtype.kind in "US":
+            statuses = np.array([STATUS_CODES[s] for s in statuses.tolist()], dtype=np.int8)
+        if len(ids) and (ids.min() < 1 or ids.max() > MAX_ID):
+            raise ValueError(f"Loan IDs must be from 1 to {MAX_ID}.")
+        if len(np.unique(ids)) != len(ids) or np.any(self._slot_of_id[ids[ids < len(self._slot_of_id)]] != FREE):
+            raise ValueError("Loan IDs must be unique.")
+        reused = min(len(self._free), len(ids))
+        slots = np.empty(len(ids), dtype=np.int64)
+        if reused:
+            slots[:reused] = self._free[-reused:]
+            del self._free[-reused:]
+        start = self._take_tail(len(ids) - reused)
+        slots[reused:] = np.arange(start, start + len(ids) - reused)
+        if len(ids):
+            self._reserve_ids(int(ids.max()) + 1)
+        for name, values in zip(COLUMN_DTYPES, (ids, client_ids, amounts, interest_rates, term_months, statuses)):
+            self._columns[name][slots] = values
+        self._slot_of_id[ids] = slots
+        self._count += len(ids)
+        return slots
+
+    def update(self, loan_id, **changes):
+        """Overwrite fields of an existing loan."""
+        row = self.row(loan_id)
+        if row is None:
+            raise ValueError(f"Loan ID {loan_id} not found.")
+        for field, value in changes.items():
+            row[field] = value
+        return row
+
+    def delete(self, loan_id):
+        """Remove a loan and return its values as a plain dict."""
+        slot = self._slot(loan_id)
+        if slot == FREE:
+            raise ValueError(f"Loan ID {loan_id} not found.")
+        loan = dict(LoanRow(self, slot, loan_id))
+        self._columns["status"][slot] = FREE
+        self._slot_of_id[loan_id] = FREE
+        self._free.append(slot)
+        self._count -= 1
+        return loan
+
+    # Access
+
+    def row(self, loan_id):
+        """Return a dict-like view of a loan, or None."""
+        slot = self._slot(loan_id)
+        return LoanRow(self, slot, loan_id) if slot != FREE else None
+
+    def status_codes(self, loan_ids):
+        """Return the status codes of existing loans, vectorized over an ID array."""
+        return self._columns["status"][self._slot_of_id[loan_ids]]
+
+    def live_mask(self):
+        """Return a boolean mask of occupied slots."""
+        return self._columns["status"][:self._size] != FREE
+
+    def slots_by_id(self, mask=None, offset=0, limit=None):
+        """Return occupied slot numbers (optionally filtered) ordered by loan ID.
+
+        With ``offset``/``limit`` only that window is returned; the IDs before
+        its end are selected with a partition, so a page near the start does
+        not pay for sorting every match.
+        """
+        if mask is None:
+            mask = self.live_mask()
+        slots = np.flatnonzero(mask)
+        ids = self._columns["id"][slots]
+        end = len(slots) if limit is None else min(len(slots), offset + limit)
+        if end <= offset:
+            return slots[:0]
+        if end < len(slots):
+            first = np.argpartition(ids, end - 1)[:end]
+            return slots[first[np.argsort(ids[first])]][offset:]
+        return slots[np.argsort(ids, kind="stable")][offset:]
+
+    def columns(self, slots=None):
+        """Return copies of every column for the given slots (all loans by default)."""
+        if slots is None:
+            slots = self.slots_by_id()
+        return {name: column[slots] for name, column in self._columns.items()}
+
+    def filter(self, status=None, client_id=None, min_amount=None, max_amount=None):
+        """Return a slot mask for loans matching every given condition."""
+        mask = self.live_mask()
+        amount = self._columns["amount"][:self._size]
+        if status is not None:
+            mask &= self._columns["status"][:self._size] == STATUS_CODES[status]
+        if client_id is not None:
+            mask &= self._columns["client_id"][:self._size] == client_id
+        if min_amount is not None:
+            mask &= amount >= min_amount
+        if max_amount is not None:
+            mask &= amount <= max_amount
+        return mask
+
+    # Helpers
+
+    def _slot(self, loan_id):
+        if not 0 <= loan_id < len(self._slot_of_id):
+            return FREE
+        return int(self._slot_of_id[loan_id])
+
+    def _take_tail(self, n):
+        start = self._size
+        if start + n > len(self._columns["id"]):
+            capacity = max(2 * len(self._columns["id"]), start + n)
+            for name, column in self._columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:start] = column[:start]
+                if name == "status":
+                    grown[start:] = FREE
+                self._columns[name] = grown
+        self._size += n
+        return start
+
+    def _reserve_ids(self, n):
+        if n > len(self._slot_of_id):
+            grown = np.full(max(2 * len(self._slot_of_id), n), FREE, dtype=np.int64)
+            grown[:len(self._slot_of_id)] = self._slot_of_id
+            self._slot_of_id = grown
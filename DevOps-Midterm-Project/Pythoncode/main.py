@@ -3,9 +3,33 @@ Main module for the Bank Loan Management System.
 Handles the user interface and program flow.
 """
 
+import argparse
+import csv
+import json
+import sys
+import bulk
+import exposure
 import functions 
+import render
+import schedule_export
+import simulation
+from portfolio_snapshot import write_snapshot
+from datetime import datetime
+from journal import DEFAULT_SNAPSHOT_EVERY, Journal, read_entries
+from metrics import PROFILE_MODES, Capture, metrics
+from repository import open_repository
+from schedule_cache import schedule_cache
 #streamlit run app.py
 
+# Operation names used for timings, --profile and the metrics file
+MENU_OPERATIONS = {
+    "1": "add_client", "2": "remove_client", "3": "edit_client", "4": "display_clients",
+    "5": "add_loan", "6": "remove_loan", "7": "edit_loan", "8": "display_loans",
+    "9": "sort_clients", "10": "sort_loans", "11": "calculate_total_loans",
+    "12": "generate_amortization_schedule", "13": "search_clients", "14": "balance_at_month",
+    "15": "exposure_report",
+}
+
 
 def display_welcome():
     """Display the welcome screen."""
@@ -27,60 +51,347 @@ def display_menu():
     print("10. Sort loans")
     print("11. Calculate total loan amounts")
     print("12. Generate amortization schedule")
-    print("13. Exit")
+    print("13. Search clients")
+    print("14. Balance and payoff at a month")
+    print("15. Client exposure report")
+    print("16. Exit")
 
-def initialize_test_data(clients, loans):
+def initialize_test_data(repo):
     """Initialize test data for demonstration."""
-    clients.extend([
-        {"id": 1, "name": "אלי דרוד", "email": "elid@campus.technion.ac.il", "phone": "052-55-66-77"},
-        {"id": 2, "name": "איליה מקס", "email": "iliama@campus.technion.ac.il", "phone": "052-55-55-55"}
-    ])
-    loans.extend([
-        {"id": 1, "client_id": 1, "amount": 5000.00, "interest_rate": 5.0, "term_months": 36, "status": "active"},
-        {"id": 2, "client_id": 1, "amount": 10000.00, "interest_rate": 4.5, "term_months": 24, "status": "paid"},
-        {"id": 3, "client_id": 2, "amount": 7500.00, "interest_rate": 6.0, "term_months": 48, "status": "active"}
-    ])
+    repo.add_client("אלי דרוד", "elid@campus.technion.ac.il", "052-55-66-77", client_id=1)
+    repo.add_client("איליה מקס", "iliama@campus.technion.ac.il", "052-55-55-55", client_id=2)
+    repo.add_loan(1, 5000.00, 5.0, 36, "active", loan_id=1)
+    repo.add_loan(1, 10000.00, 4.5, 24, "paid", loan_id=2)
+    repo.add_loan(2, 7500.00, 6.0, 48, "active", loan_id=3)
     print("Test data initialized for demonstration.")
 
-def main():
-    clients = []  # Initialize empty client list
-    loans = []    # Initialize empty loan list
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Bank Loan Management System")
+    parser.add_argument("--db", help="SQLite database file to persist clients and loans (default: in-memory)")
+    parser.add_argument("--verify-aggregates", type=int, default=0, metavar="N",
+                        help="recompute portfolio totals from scratch every N changes and report drift")
+    parser.add_argument("--page-size", type=int, default=50, metavar="N",
+                        help="pause menu listings every N rows when attached to a terminal (0 = never)")
+    parser.add_argument("--journal", metavar="DIR",
+                        help="record every change in this directory and restore from it on start (in-memory store only)")
+    parser.add_argument("--snapshot-every", type=int, default=DEFAULT_SNAPSHOT_EVERY, metavar="N",
+                        help="write a journal snapshot and compact the log every N changes (0 = only on demand)")
+    parser.add_argument("--keep-history", action="store_true",
+                        help="keep compacted journal segments so 'history' can show every change")
+    parser.add_argument("--timings", action="store_true",
+                        help="print each operation's duration and record count to stderr")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write per-operation latency metrics in Prometheus text format to FILE on exit")
+    parser.add_argument("--profile", metavar="OPERATION",
+                        help="profile every run of this operation (e.g. display_loans, list, or all)")
+    parser.add_argument("--profile-mode", choices=PROFILE_MODES, default="cpu",
+                        help="cpu: cProfile by cumulative time; memory: tracemalloc allocations by line")
+    commands = parser.add_subparsers(dest="command")
+
+    import_parser = commands.add_parser("import", help="load clients or loans from a CSV/JSONL file")
+    import_parser.add_argument("file", help="input file, or - for stdin")
+    import_parser.add_argument("--kind", choices=bulk.FIELDS, help="record type (default: guessed from the file name)")
+    import_parser.add_argument("--format", choices=bulk.FORMATS, help="file format (default: from the extension)")
+    import_parser.add_argument("--chunk-size", type=int, default=bulk.DEFAULT_CHUNK_SIZE,
+                               help="rows validated and committed per transaction")
+    import_parser.add_argument("--rejects", help="write rejected rows with their errors to this JSONL file")
+
+    export_parser = commands.add_parser("export", help="write clients or loans to a CSV/JSONL file")
+    export_parser.add_argument("--kind", choices=bulk.FIELDS, default="loans", help="record type (default: loans)")
+    export_parser.add_argument("--format", choices=bulk.FORMATS, default="csv", help="file format (default: csv)")
+    export_parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+
+    list_parser = commands.add_parser("list", help="print a client, loan or amortization listing")
+    list_parser.add_argument("kind", choices=["clients", "loans", "schedule"])
+    list_parser.add_argument("--sort", choices=functions.SORT_KEYS, help="order loans by this key (default: ID)")
+    list_parser.add_argument("--status", choices=["active", "paid"], help="only list loans with this status")
+    list_parser.add_argument("--top", type=int, metavar="K", help="list the K largest loans by --sort (default: amount)")
+    list_parser.add_argument("--min", type=float, help="only loans whose --sort value (default: amount) is at least this")
+    list_parser.add_argument("--max", type=float, help="only loans whose --sort value (default: amount) is at most this")
+    list_parser.add_argument("--loan-id", type=int, help="loan to list the schedule of (required for schedule)")
+    list_parser.add_argument("--offset", type=int, default=0, help="skip this many rows")
+    list_parser.add_argument("--limit", type=int, help="print at most this many rows")
+    list_parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+
+    sim_parser = commands.add_parser("simulate", help="Monte Carlo default/prepayment simulation of active loans")
+    sim_parser.add_argument("--paths", type=int, default=simulation.DEFAULT_PATHS, help="number of simulated paths")
+    sim_parser.add_argument("--seed", type=int, default=0, help="random seed (results do not depend on --workers)")
+    sim_parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    sim_parser.add_argument("--default-rate", type=float, default=2.0, help="annual default probability in %%")
+    sim_parser.add_argument("--prepay-rate", type=float, default=6.0, help="annual prepayment probability in %%")
+    sim_parser.add_argument("--recovery-rate", type=float, default=40.0, help="share of a defaulted balance recovered in %%")
+    sim_parser.add_argument("-o", "--output", help="write the monthly cash-flow bands to this CSV file")
+
+    schedules_parser = commands.add_parser("schedules", help="stream the full amortization schedule of every loan to a file")
+    schedules_parser.add_argument("-o", "--output", default="-", help="output file, .gz to compress (default: stdout)")
+    schedules_parser.add_argument("--format", choices=schedule_export.SCHEDULE_FORMATS,
+                                  help="file format (default: from the extension; parquet needs pyarrow)")
+    schedules_parser.add_argument("--gzip", action="store_true", help="gzip the output even without a .gz name")
+    schedules_parser.add_argument("--status", choices=["active", "paid", "all"], default="active",
+                                  help="which loans to export (default: active)")
+    schedules_parser.add_argument("--chunk-rows", type=int, default=schedule_export.DEFAULT_CHUNK_ROWS,
+                                  help="schedule rows generated per chunk; bounds memory use")
+    schedules_parser.add_argument("--workers", type=int, help="formatting processes for CSV/JSONL (default: CPU count)")
+
+    snapshot_parser = commands.add_parser("snapshot", help="write a read-only, memory-mapped portfolio snapshot "
+                                                           "(serve it with LOAN_SNAPSHOT_PATH=FILE streamlit run app.py)")
+    snapshot_parser.add_argument("-o", "--output", required=True, help="snapshot file to write (replaced atomically)")
+
+    exposure_parser = commands.add_parser("exposure", help="print the clients with the largest exposure and their share "
+                                                           "of the portfolio")
+    exposure_parser.add_argument("--top", type=int, default=10, metavar="N", help="number of clients (default: 10)")
+    exposure_parser.add_argument("--by", choices=exposure.MONEY_MEASURES, default="scheduled_repayment",
+                                 help="measure to rank and compute shares on (default: scheduled_repayment)")
+    exposure_parser.add_argument("--client-id", type=int, help="print this client's exposure and loans instead")
+    exposure_parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+
+    history_parser = commands.add_parser("history", help="print the changes recorded in the --journal directory")
+    history_parser.add_argument("--client-id", type=int, help="only changes to this client")
+    history_parser.add_argument("--loan-id", type=int, help="only changes to this loan")
+    args = parser.parse_args(argv)
+    if args.journal and args.db:
+        parser.error("--journal applies to the in-memory store; a --db database is already persistent")
+    if args.command == "history" and not args.journal:
+        parser.error("history requires --journal")
+    return args
+
+def run_import(repo, args):
+    """Stream a CSV/JSONL file into the store and report rejected rows."""
+    fmt = args.format or bulk.detect_format(args.file)
+    kind = args.kind or ("clients" if "client" in args.file.rsplit("/", 1)[-1].lower() else "loans")
+    rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+
+    def report(line_num, record, error):
+        if rejects:
+            rejects.write(json.dumps({"line": line_num, "error": str(error), "record": record}, ensure_ascii=False) + "\n")
+        else:
+            print(f"Line {line_num} rejected: {error}", file=sys.stderr)
+
+    try:
+        with bulk.open_text(args.file, "r") as f:
+            summary = bulk.import_records(repo, bulk.read_records(f, fmt), kind, args.chunk_size, report)
+    finally:
+        if rejects:
+            rejects.close()
+    metrics.count_records(summary["accepted"] + summary["rejected"])
+    print(f"Imported {summary['accepted']} {kind}, rejected {summary['rejected']}.", file=sys.stderr)
+    return 1 if summary["rejected"] else 0
+
+def run_export(repo, args):
+    """Stream every client or loan to a CSV/JSONL file."""
+    with bulk.open_text(args.output, "w") as f:
+        count = bulk.export_records(repo, args.kind, args.format, f)
+    metrics.count_records(count)
+    print(f"Exported {count} {args.kind}.", file=sys.stderr)
+    return 0
+
+def run_list(repo, args):
+    """Print a window of a listing without paging, to stdout or a file."""
+    with bulk.open_text(args.output, "w") as f:
+        options = render.RenderOptions(args.offset, args.limit, out=f)
+        if args.kind == "clients":
+            functions.display_clients(repo.list_clients(), options)
+        elif args.kind == "loans":
+            key = args.sort or "amount"
+            if args.top is not None:
+                loans = repo.top_loans(key, args.top, args.status)
+            elif args.min is not None or args.max is not None:
+                loans = repo.loans_between(key, args.min, args.max, args.status)
+            else:
+                loans = repo.sorted_loans(args.sort) if args.sort else repo.iter_loans()
+                if args.status:
+                    loans = (loan for loan in loans if loan["status"] == args.status)
+            functions.display_loans(loans if repo.loan_count() else [], repo, options)
+        else:
+            if args.loan_id is None:
+                print("Error: --loan-id is required for schedule listings.", file=sys.stderr)
+                return 2
+            loan = repo.get_loan(args.loan_id)
+            if not loan:
+                print(f"Loan ID {args.loan_id} not found.", file=sys.stderr)
+                return 1
+            functions.display_schedule(loan, repo, options)
+    return 0
+
+def run_simulate(repo, args):
+    """Simulate the active portfolio and print loss percentiles."""
+    loans = repo.loan_columns(status="active")
+    if not len(loans["id"]):
+        print("No active loans to simulate.", file=sys.stderr)
+        return 1
+    try:
+        result = simulation.simulate_portfolio(loans, args.paths, args.seed, args.default_rate, args.prepay_rate,
+                                               args.recovery_rate, args.workers)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Simulated {result['paths']} paths over {result['loans']} active loans (${result['principal']:.2f} principal)")
+    print(f"Expected loss: ${result['expected_loss']:.2f}")
+    for q, loss in result["loss_percentiles"].items():
+        print(f"P{q} loss: ${loss:.2f}")
+    if args.output:
+        bands = result["cash_flow"]
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(bands)
+            writer.writerows(zip(*(bands[column].tolist() for column in bands)))
+        print(f"Cash-flow bands written to {args.output}.", file=sys.stderr)
+    return 0
+
+def run_schedules(repo, args):
+    """Stream every selected loan's schedule to a file, reporting progress on stderr."""
+    loans = repo.loan_columns(status=None if args.status == "all" else args.status)
+    last_report = [0.0]
+
+    def report(summary, final=False):
+        if not final and (summary["seconds"] - last_report[0] < 1 or summary["loans"] == summary["total_loans"]):
+            return
+        last_report[0] = summary["seconds"]
+        rate = summary["rows"] / summary["seconds"] if summary["seconds"] else 0
+        live = sys.stderr.isatty()  # Rewrite one status line on a terminal, log lines otherwise
+        print("\r" if live else "", end="", file=sys.stderr)
+        print(f"{summary['loans']}/{summary['total_loans']} loans, {summary['rows']} rows, "
+              f"{summary['seconds']:.1f}s ({rate:,.0f} rows/s)", end="" if live and not final else "\n",
+              file=sys.stderr, flush=True)
+
+    try:
+        summary = schedule_export.export_schedules(loans, args.output, args.format, args.gzip or None,
+                                                   args.chunk_rows, args.workers, report)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    report(summary, final=True)
+    metrics.count_records(summary["rows"])
+    return 0
+
+def run_snapshot(repo, args):
+    """Write the current store to a portfolio snapshot file."""
+    write_snapshot(repo, args.output)
+    metrics.count_records(repo.client_count() + repo.loan_count())
+    print(f"Wrote {repo.client_count()} clients and {repo.loan_count()} loans to {args.output}.", file=sys.stderr)
+    return 0
+
+def run_exposure(repo, args):
+    """Print the top-N client concentration report, or one client's exposure."""
+    with bulk.open_text(args.output, "w") as f:
+        options = render.RenderOptions(out=f)
+        if args.client_id is not None:
+            functions.display_client_exposure(args.client_id, repo, options)
+            return 0
+        try:
+            report = exposure.book_for(repo).concentration(args.top, args.by)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        functions.display_exposure(report, repo, options)
+    return 0
+
+def run_history(args):
+    """Print the journaled changes, oldest first."""
+    wanted = ("client", args.client_id) if args.client_id is not None else ("loan", args.loan_id)
+    for entry in read_entries(args.journal):
+        kind = entry["event"].split("_", 1)[0]
+        record_id = entry.get("id") or (entry.get("new") or entry["old"])["id"]
+        if wanted[1] is not None and (kind, record_id) != wanted:
+            continue
+        when = datetime.fromtimestamp(entry["ts"]).isoformat(sep=" ", timespec="seconds")
+        if "id" in entry:
+            details = ", ".join(f"{field}: {entry['old'][field]} -> {value}" for field, value in entry["new"].items())
+        else:
+            details = json.dumps(entry.get("new") or entry["old"], ensure_ascii=False)
+        print(f"#{entry['seq']} {when} {entry['event']} {kind} {record_id}: {details}")
+    return 0
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "history":
+        return run_history(args)
+    repo = open_repository(args.db, args.verify_aggregates)  # Open the client/loan store
+    schedule_cache.watch(repo)
+    journal = None
+    if args.journal:
+        journal = Journal(args.journal, snapshot_every=args.snapshot_every, keep_history=args.keep_history)
+        replayed = journal.open(repo)
+        print(f"Restored {repo.client_count()} clients and {repo.loan_count()} loans from {args.journal} "
+              f"({replayed} journal entries replayed).", file=sys.stderr)
+    try:
+        return run(repo, args)
+    finally:
+        if journal:
+            journal.close()
+        if args.metrics:
+            with open(args.metrics, "w", encoding="utf-8") as f:
+                f.write(metrics.prometheus())
+
+def run_operation(name, args, action):
+    """Run action() as the timed operation name, profiling it if --profile selects it."""
+    capture = Capture(args.profile_mode).start() if args.profile in (name, "all") else None
+    try:
+        with metrics.timed(name) as timer:
+            result = action()
+    finally:
+        if capture:
+            print(f"\nProfile of {name}:\n{capture.stop()}", file=sys.stderr)
+    if args.timings:
+        print(f"[{name}: {timer.records} records in {timer.seconds:.3f}s]", file=sys.stderr)
+    return result
+
+def run(repo, args):
+    """Run the requested subcommand, or the interactive menu."""
+    commands = {"import": run_import, "export": run_export, "list": run_list, "simulate": run_simulate,
+                "schedules": run_schedules, "snapshot": run_snapshot, "exposure": run_exposure}
+    if args.command in commands:
+        return run_operation(args.command, args, lambda: commands[args.command](repo, args))
     display_welcome()
-    initialize_test_data(clients, loans)  # Add test data for demo
+    if not repo.client_count():
+        initialize_test_data(repo)  # Add test data for demo
+    options = render.RenderOptions.interactive(args.page_size)
     
     while True:
         display_menu()
-        choice = input("Enter your choice (1-13): ")
+        choice = input("Enter your choice (1-16): ")
         
-        if choice == "1":
-            functions.add_client(clients)
-        elif choice == "2":
-            functions.remove_client(clients, loans)
-        elif choice == "3":
-            functions.edit_client(clients)
-        elif choice == "4":
-            functions.display_clients(clients)
-        elif choice == "5":
-            functions.add_loan(loans, clients)
-        elif choice == "6":
-            functions.remove_loan(loans)
-        elif choice == "7":
-            functions.edit_loan(loans, clients)
-        elif choice == "8":
-            functions.display_loans(loans, clients)
-        elif choice == "9":
-            functions.sort_clients(clients)
-        elif choice == "10":
-            functions.sort_loans(loans)
-        elif choice == "11":
-            functions.calculate_total_loans(loans)
-        elif choice == "12":
-            functions.generate_amortization_schedule(loans, clients)
-        elif choice == "13":
+        if choice in MENU_OPERATIONS:
+            run_operation(MENU_OPERATIONS[choice], args, lambda: dispatch(repo, choice, options))
+        elif choice == "16":
             print("Thank you for using the Bank Loan Management System!")
             break
         else:
             print("Invalid choice. Please try again!!!!")
 
+def dispatch(repo, choice, options):
+    """Carry out one menu choice."""
+    if choice == "1":
+        functions.add_client(repo)
+    elif choice == "2":
+        functions.remove_client(repo)
+    elif choice == "3":
+        functions.edit_client(repo)
+    elif choice == "4":
+        functions.display_clients(repo.list_clients(), options)
+    elif choice == "5":
+        functions.add_loan(repo)
+    elif choice == "6":
+        functions.remove_loan(repo)
+    elif choice == "7":
+        functions.edit_loan(repo)
+    elif choice == "8":
+        functions.display_loans(repo.list_loans(), repo, options)
+    elif choice == "9":
+        functions.sort_clients(repo, options)
+    elif choice == "10":
+        functions.sort_loans(repo, options)
+    elif choice == "11":
+        functions.calculate_total_loans(repo)
+    elif choice == "12":
+        functions.generate_amortization_schedule(repo, options)
+    elif choice == "13":
+        functions.search_clients(repo, options)
+    elif choice == "14":
+        functions.balance_at_month(repo)
+    elif choice == "15":
+        functions.exposure_report(repo, options)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
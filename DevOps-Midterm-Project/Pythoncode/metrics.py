@@ -0,0 +1,236 @@
+"""
+Metrics module for the Bank Loan Management System.
+Contains per-operation latency histograms, Prometheus text export and opt-in profiling.
+"""
+import cProfile
+import io
+import math
+import pstats
+import threading
+import time
+import tracemalloc
+
+# Upper bounds in seconds of the latency histogram buckets (Prometheus "le" labels)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+PROFILE_MODES = ("cpu", "memory")
+
+
+def _label(value):
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class OperationStats:
+    """Call, error and record counts plus a latency histogram for one operation."""
+
+    __slots__ = ("buckets", "calls", "errors", "records", "total", "max", "last")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.calls = self.errors = self.records = 0
+        self.total = self.max = self.last = 0.0
+
+    def observe(self, seconds, records, error):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.calls += 1
+        self.errors += bool(error)
+        self.records += records
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0-1) by interpolating inside its histogram bucket."""
+        if not self.calls:
+            return 0.0
+        rank, seen, lower = q * self.calls, 0, 0.0
+        for bound, count in zip(BUCKETS, self.buckets):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * max(rank - seen, 0) / count
+            seen += count
+            lower = bound
+        return self.max
+
+
+class Timer:
+    """Measures one operation from creation until stop(); also usable as a context manager.
+
+    Records processed while the timer is the innermost one on its thread
+    (see ``Metrics.count_records``) are credited to it, and time spent
+    waiting in ``Metrics.prompt`` is left out so a menu operation measures
+    the work rather than the typing.
+    """
+
+    def __init__(self, registry, operation, records=0):
+        self.registry = registry
+        self.operation = operation
+        self.records = records
+        self.seconds = None
+        self._stack = registry._active_timers()
+        self._stack.append(self)
+        self._idle = registry._idle_seconds()
+        self._start = time.perf_counter()
+
+    def stop(self, error=False):
+        """Record the elapsed time once and return it in seconds."""
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self._start - (self.registry._idle_seconds() - self._idle)
+            if self in self._stack:
+                self._stack.remove(self)
+            self.registry.observe(self.operation, self.seconds, self.records, error)
+        return self.seconds
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(error=exc_type is not None and issubclass(exc_type, Exception))
+        return False
+
+
+class Metrics:
+    """Thread-safe registry of OperationStats keyed by operation name."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def observe(self, operation, seconds, records=0, error=False):
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = OperationStats()
+            stats.observe(seconds, records, error)
+
+    def timed(self, operation, records=0):
+        """Start a Timer for operation."""
+        return Timer(self, operation, records)
+
+    def count_records(self, count):
+        """Credit count processed records to the innermost running timer on this thread."""
+        stack = self._active_timers()
+        if stack:
+            stack[-1].records += count
+
+    def prompt(self, text=""):
+        """input() whose waiting time is not counted against running timers."""
+        start = time.perf_counter()
+        try:
+            return input(text)
+        finally:
+            self._local.idle = self._idle_seconds() + time.perf_counter() - start
+
+    def summary(self):
+        """Return one dict per operation, slowest total time first."""
+        with self._lock:
+            rows = [{
+                "operation": operation,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "records": stats.records,
+                "total_s": stats.total,
+                "mean_ms": stats.total / stats.calls * 1e3,
+                "p50_ms": stats.quantile(0.5) * 1e3,
+                "p95_ms": stats.quantile(0.95) * 1e3,
+                "max_ms": stats.max * 1e3,
+                "last_ms": stats.last * 1e3,
+            } for operation, stats in self._stats.items()]
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def prometheus(self, prefix="loan_operation"):
+        """Return every operation's metrics in the Prometheus text exposition format."""
+        lines = [f"# HELP {prefix}_seconds Latency of loan system operations.",
+                 f"# TYPE {prefix}_seconds histogram"]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for operation, stats in items:
+                label = _label(operation)
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f'{prefix}_seconds_bucket{{operation="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_seconds_sum{{operation="{label}"}} {stats.total!r}')
+                lines.append(f'{prefix}_seconds_count{{operation="{label}"}} {stats.calls}')
+            for field, help_text in (("records", "Records processed by loan system operations."),
+                                     ("errors", "Loan system operations that raised an error.")):
+                lines.append(f"# HELP {prefix}_{field}_total {help_text}")
+                lines.append(f"# TYPE {prefix}_{field}_total counter")
+                for operation, stats in items:
+                    lines.append(f'{prefix}_{field}_total{{operation="{_label(operation)}"}} {getattr(stats, field)}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _idle_seconds(self):
+        return getattr(self._local, "idle", 0.0)
+
+    def _active_timers(self):
+        stack = getattr(self._local, "timers", None)
+        if stack is None:
+            stack = self._local.timers = []
+        return stack
+
+
+metrics = Metrics()
+prompt = metrics.prompt
+
+
+class Capture:
+    """Opt-in cProfile ("cpu") or tracemalloc ("memory") capture around one operation.
+
+    Use start()/stop() or a with block; ``report`` then holds the top
+    ``top`` entries (cumulative time, or allocated bytes by line).
+    """
+
+    def __init__(self, mode="cpu", top=25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Profile mode must be one of {', '.join(PROFILE_MODES)}.")
+        self.mode = mode
+        self.top = top
+        self.report = ""
+        self._profiler = None
+        self._started_tracing = False
+
+    def start(self):
+        if self.mode == "cpu":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.take_snapshot()
+        return self
+
+    def stop(self):
+        """Stop capturing and return the report text."""
+        out = io.StringIO()
+        if self.mode == "cpu":
+            self._profiler.disable()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(self.top)
+        else:
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().compare_to(self._baseline, "lineno")
+            if self._started_tracing:
+                tracemalloc.stop()
+            print(f"Traced memory: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak", file=out)
+            for stat in stats[:self.top]:
+                print(stat, file=out)
+        self.report = out.getvalue()
+        return self.report
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
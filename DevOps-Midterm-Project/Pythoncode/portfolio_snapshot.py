@@ -0,0 +1,245 @@
+"""
+Portfolio snapshot module for the Bank Loan Management System.
+Contains a binary, memory-mapped, read-only snapshot format for clients and loans.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from functools import cached_property
+
+import numpy as np
+
+from aggregates import PortfolioAggregates, breakdown_from_columns
+from client_index import ClientIndex
+from loan_table import COLUMN_DTYPES, LOAN_FIELDS, LOAN_STATUSES, STATUS_CODES
+from repository import validate_status
+
+MAGIC = b"LOANSNP1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+STRING_FIELDS = ("name", "email", "phone")
+_PREAMBLE = struct.Struct("<8sQ")  # Magic, header length
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _encode_strings(values):
+    """Return (offsets, UTF-8 bytes) for a list of strings, Arrow style."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def write_snapshot(repo, path):
+    """Write every client and loan of repo to a snapshot file at path, atomically.
+
+    Works with any repository backend. Loans are stored ordered by ID, plus
+    a row order grouped by client so per-client lookups are a binary search.
+    """
+    clients = sorted(repo.list_clients(), key=lambda client: client["id"])
+    loans = repo.loan_columns()
+    codes = np.asarray(loans["status"])
+    if codes.dtype.kind in "OU":
+        codes = np.array([STATUS_CODES[status] for status in codes.tolist()], dtype=COLUMN_DTYPES["status"])
+    arrays = {f"loan_{field}": np.ascontiguousarray(loans[field], dtype=COLUMN_DTYPES[field])
+              for field in LOAN_FIELDS if field != "status"}
+    arrays["loan_status"] = codes.astype(COLUMN_DTYPES["status"])
+    arrays["loan_by_client"] = np.argsort(arrays["loan_client_id"], kind="stable").astype(np.int64)
+    arrays["loan_client_sorted"] = arrays["loan_client_id"][arrays["loan_by_client"]]
+    arrays["client_id"] = np.array([client["id"] for client in clients], dtype=np.int64)
+    for field in STRING_FIELDS:
+        arrays[f"client_{field}_offsets"], arrays[f"client_{field}_data"] = \
+            _encode_strings([client[field] for client in clients])
+
+    columns, offset = {}, 0
+    for name, array in arrays.items():
+        columns[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "created_ns": time.time_ns(),
+        "clients": len(clients),
+        "loans": len(arrays["loan_id"]),
+        "breakdown": breakdown_from_columns(loans),
+        "columns": columns,
+    }).encode("utf-8")
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + columns[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # Readers keep their mapping of the old file until they reopen
+    return path
+
+
+class PortfolioSnapshot:
+    """Read-only repository view over a memory-mapped snapshot file.
+
+    Opening maps the file and parses a small JSON header, so it takes the
+    same time whatever the portfolio size. Numeric loan columns are numpy
+    views straight into the mapping: no copy is made, and every process
+    mapping the same file shares one copy in the OS page cache. Strings are
+    decoded only when a client is looked up. Provides the read methods the
+    analytics views use; it has no mutation methods.
+    """
+
+    read_only = True
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _PREAMBLE.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a portfolio snapshot.")
+        header = json.loads(self._map[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        if header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {header['format']}.")
+        data_start = _aligned(_PREAMBLE.size + header_length)
+        self._arrays = {name: np.frombuffer(self._map, dtype=spec["dtype"], count=spec["length"],
+                                            offset=data_start + spec["offset"])
+                        for name, spec in header["columns"].items()}
+        self.version = header["created_ns"]
+        self.aggregates = PortfolioAggregates(lambda: header["breakdown"])
+
+    def close(self):
+        """Drop the column views and unmap the file."""
+        self._arrays = {}
+        self.__dict__.pop("_client_index", None)
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Columns handed out still use the mapping; it is released along with them
+
+    def subscribe(self, callback):
+        """A snapshot never changes, so there is nothing to notify."""
+
+    def unsubscribe(self, callback):
+        """A snapshot never changes, so there is nothing to notify."""
+
+    # Clients
+
+    def client_count(self):
+        return len(self._arrays["client_id"])
+
+    def get_client(self, client_id):
+        i = self._client_position(client_id)
+        return self._client(i) if i is not None else None
+
+    def list_clients(self, offset=0, limit=None):
+        """Return clients ordered by ID, optionally only a window of them."""
+        stop = self.client_count() if limit is None else min(self.client_count(), offset + limit)
+        return [self._client(i) for i in range(offset, stop)]
+
+    def search_clients(self, query="", limit=None):
+        """Return clients whose name or email starts with query (case-insensitive), ordered by name."""
+        ids = self._client_index.search(query, self.client_name)
+        return [self.get_client(client_id) for client_id in ids[:limit]]
+
+    def client_name(self, client_id):
+        i = self._client_position(client_id)
+        return self._string("name", i) if i is not None else "Unknown"
+
+    def client_names(self):
+        """Return a {client ID: name} map for resolving many loans at once."""
+        starts = self._arrays["client_name_offsets"].tolist()
+        data = self._arrays["client_name_data"].tobytes()
+        names = data.decode("utf-8") if data.isascii() else None
+        if names is not None:  # ASCII: byte offsets are character offsets, so slice one decoded string
+            return dict(zip(self._arrays["client_id"].tolist(),
+                            (names[a:b] for a, b in zip(starts, starts[1:]))))
+        return dict(zip(self._arrays["client_id"].tolist(),
+                        (data[a:b].decode("utf-8") for a, b in zip(starts, starts[1:]))))
+
+    # Loans
+
+    def loan_count(self, status=None, client_id=None, min_amount=None, max_amount=None):
+        if status is None and client_id is None and min_amount is None and max_amount is None:
+            return len(self._arrays["loan_id"])
+        return int(np.count_nonzero(self._loan_mask(status, client_id, min_amount, max_amount)))
+
+    def get_loan(self, loan_id):
+        ids = self._arrays["loan_id"]
+        i = int(np.searchsorted(ids, loan_id))
+        return self._loan(i) if i < len(ids) and ids[i] == loan_id else None
+
+    def iter_loans(self):
+        """Yield loans ordered by ID."""
+        return (self._loan(i) for i in range(self.loan_count()))
+
+    def list_loans(self):
+        return list(self.iter_loans())
+
+    def loans_for_client(self, client_id):
+        start, stop = np.searchsorted(self._arrays["loan_client_sorted"], [client_id, client_id + 1])
+        return [self._loan(i) for i in self._arrays["loan_by_client"][start:stop].tolist()]
+
+    def loan_columns(self, status=None, client_id=None, min_amount=None, max_amount=None, offset=0, limit=None):
+        """Return matching loans as column arrays ordered by ID, with status names.
+
+        Without filters the numeric columns are read-only views of the
+        mapped file (a page of them with ``offset``/``limit``); with filters
+        they are the selected copies.
+        """
+        columns = {field: self._arrays[f"loan_{field}"] for field in LOAN_FIELDS}
+        mask = self._loan_mask(status, client_id, min_amount, max_amount)
+        if mask is not None:
+            columns = {field: column[mask] for field, column in columns.items()}
+        if offset or limit is not None:
+            window = slice(offset, None if limit is None else offset + limit)
+            columns = {field: column[window] for field, column in columns.items()}
+        columns["status"] = np.asarray(LOAN_STATUSES, dtype=object)[columns["status"]]
+        return columns
+
+    def totals(self):
+        """Return (total amount, total simple interest) of active loans, precomputed at write time."""
+        return self.aggregates.totals()
+
+    # Helpers
+
+    def _loan_mask(self, status, client_id, min_amount, max_amount):
+        """Return the mask of loans matching every filter that is set, or None without filters."""
+        validate_status(status)
+        mask = None
+        for field, condition in (("status", None if status is None else lambda c: c == STATUS_CODES[status]),
+                                 ("client_id", None if client_id is None else lambda c: c == client_id),
+                                 ("amount", None if min_amount is None else lambda c: c >= min_amount),
+                                 ("amount", None if max_amount is None else lambda c: c <= max_amount)):
+            if condition is not None:
+                matches = condition(self._arrays[f"loan_{field}"])
+                mask = matches if mask is None else mask & matches
+        return mask
+
+    @cached_property
+    def _client_index(self):
+        index = ClientIndex()
+        index.add_many(self.list_clients())
+        return index
+
+    def _client_position(self, client_id):
+        ids = self._arrays["client_id"]
+        i = int(np.searchsorted(ids, client_id))
+        return i if i < len(ids) and ids[i] == client_id else None
+
+    def _client(self, i):
+        return {"id": int(self._arrays["client_id"][i]), **{field: self._string(field, i) for field in STRING_FIELDS}}
+
+    def _string(self, field, i):
+        offsets = self._arrays[f"client_{field}_offsets"]
+        return self._arrays[f"client_{field}_data"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def _loan(self, i):
+        loan = {field: self._arrays[f"loan_{field}"][i].item() for field in LOAN_FIELDS}
+        loan["status"] = LOAN_STATUSES[loan["status"]]
+        return loan
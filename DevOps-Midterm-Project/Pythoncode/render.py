@@ -0,0 +1,95 @@
+"""
+Render module for the Bank Loan Management System.
+Contains a buffered, pageable table writer for large CLI listings.
+"""
+import sys
+from itertools import islice
+
+from metrics import metrics, prompt
+
+BATCH_ROWS = 2000
+MORE_PROMPT = "-- More (Enter to continue, q to quit) --"
+
+
+class RenderOptions:
+    """Where and how much of a listing to write.
+
+    ``offset``/``limit`` select a window of rows, ``page_size`` pauses for
+    Enter after that many rows (0 disables paging) and ``out`` is the target
+    stream (stdout by default).
+    """
+
+    def __init__(self, offset=0, limit=None, page_size=0, out=None):
+        if offset < 0 or (limit is not None and limit < 0) or page_size < 0:
+            raise ValueError("Offset, limit and page size must be non-negative.")
+        self.offset = offset
+        self.limit = limit
+        self.page_size = page_size
+        self.out = out
+
+    @classmethod
+    def interactive(cls, page_size):
+        """Options for the menu: page only when stdout is a terminal."""
+        return cls(page_size=page_size if sys.stdout.isatty() else 0)
+
+
+DEFAULT_OPTIONS = RenderOptions()
+
+
+def render_rows(rows, format_row, header=(), options=None):
+    """Write header lines then the selected rows, one buffered write per batch.
+
+    ``rows`` may be any iterable (including a lazy cursor); only the window
+    chosen by the options is consumed and formatted. Returns the number of
+    rows written, which stops early if the user quits at a page prompt.
+    """
+    options = options or DEFAULT_OPTIONS
+    out = options.out or sys.stdout
+    stop = None if options.limit is None else options.offset + options.limit
+    rows = islice(rows, options.offset, stop)
+    batch_rows = options.page_size or BATCH_ROWS
+    written = 0
+    if header:
+        out.write("\n".join(header) + "\n")
+    while True:
+        batch = [format_row(row) for row in islice(rows, batch_rows)]
+        if not batch:
+            break
+        out.write("\n".join(batch) + "\n")
+        written += len(batch)
+        if options.page_size and len(batch) == batch_rows:
+            out.flush()
+            if prompt(MORE_PROMPT).strip().lower().startswith("q"):
+                break
+    out.flush()
+    metrics.count_records(written)
+    return written
+
+
+def client_row(client):
+    """Format one client as a listing line."""
+    return f"{client['id']} | {client['name']} | {client['email']} | {client['phone']}"
+
+
+def loan_formatter(client_names):
+    """Return a loan line formatter that resolves names from a prebuilt {id: name} map."""
+    def loan_row(loan):
+        return (f"{loan['id']} | {client_names.get(loan['client_id'], 'Unknown')} | ${loan['amount']:.2f} | "
+                f"{loan['interest_rate']}% | {loan['term_months']} | {loan['status']}")
+    return loan_row
+
+
+def schedule_row(row):
+    """Format one (month, payment, principal, interest, balance) schedule tuple."""
+    month, payment, principal, interest, balance = row
+    return f"{month:2} | ${payment:.2f} | ${principal:.2f} | ${interest:.2f} | ${balance:.2f}"
+
+
+def exposure_formatter(client_names):
+    """Return a concentration report line formatter that resolves names from a {id: name} map."""
+    def exposure_row(row):
+        return (f"{row['client_id']} | {client_names.get(row['client_id'], 'Unknown')} | "
+                f"{row['loans']} ({row['active_loans']} active) | ${row['principal']:.2f} | {row['avg_rate']:.2f}% | "
+                f"${row['interest']:.2f} | ${row['scheduled_repayment']:.2f} | "
+                f"{row['share']:.2%} | {row['cumulative_share']:.2%}")
+    return exposure_row
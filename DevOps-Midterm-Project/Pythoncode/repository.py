@@ -0,0 +1,398 @@
+"""
+Repository module for the Bank Loan Management System.
+Contains the indexed in-memory store for clients and loans.
+"""
+import math
+from contextlib import nullcontext
+from itertools import islice
+
+import numpy as np
+
+from aggregates import PortfolioAggregates, breakdown_from_columns
+from client_index import ClientIndex
+from loan_index import SortedColumnIndex
+from loan_table import COLUMN_DTYPES, LOAN_FIELDS, LOAN_STATUSES, MAX_ID, STATUS_CODES, LoanTable
+
+SORT_KEYS = ("amount", "interest_rate", "term_months")
+
+
+def open_repository(db_path=None, verify_every=0):
+    """Return an SQLite-backed repository for db_path, or an in-memory one."""
+    if db_path is None:
+        return LoanRepository(verify_every=verify_every)
+    from sqlite_store import SQLiteRepository
+    return SQLiteRepository(db_path, verify_every=verify_every)
+
+
+def validate_client(name, email, phone):
+    """Validate client fields, raising ValueError on the first problem."""
+    if not name:
+        raise ValueError("Name cannot be empty.")
+    if "@" not in email or "." not in email:
+        raise ValueError("Invalid email format.")
+    if not phone:
+        raise ValueError("Phone cannot be empty.")
+
+
+def validate_loan(amount, interest_rate, term_months, status):
+    """Validate loan fields, raising ValueError on the first problem."""
+    if not (math.isfinite(amount) and math.isfinite(interest_rate)):
+        raise ValueError("Amount and interest rate must be finite numbers.")
+    if amount < 0 or interest_rate < 0 or term_months <= 0:
+        raise ValueError("Amount and interest rate must be non-negative, term must be positive.")
+    if status not in LOAN_STATUSES:
+        raise ValueError("Status must be 'active' or 'paid'.")
+
+
+def validate_status(status):
+    """Raise ValueError unless status is None (no filter) or a loan status."""
+    if status is not None and status not in STATUS_CODES:
+        raise ValueError("Status must be 'active' or 'paid'.")
+
+
+def validate_id(record_id, kind):
+    """Raise ValueError unless record_id is a whole number from 1 to MAX_ID."""
+    if isinstance(record_id, bool) or not isinstance(record_id, (int, np.integer)) or not 1 <= record_id <= MAX_ID:
+        raise ValueError(f"{kind} ID must be a whole number from 1 to {MAX_ID}.")
+
+
+def validate_sort_key(key):
+    """Raise ValueError unless key is one of SORT_KEYS."""
+    if key not in SORT_KEYS:
+        raise ValueError(f"Invalid sort key. Choose from: {', '.join(SORT_KEYS)}")
+
+
+def with_status_names(columns):
+    """Replace the numeric status codes in loan columns with status names."""
+    columns["status"] = np.asarray(LOAN_STATUSES, dtype=object)[columns["status"]]
+    return columns
+
+
+class ChangeNotifier:
+    """Mixin that lets other components follow changes to a repository.
+
+    Subscribers are called as ``callback(event, old, new)`` after each change,
+    with plain-dict snapshots of the record before and after (None where it
+    does not apply). Events: client_added, client_updated, client_removed,
+    loan_added, loan_updated, loan_removed. Removing a client emits
+    loan_removed for each of their loans first. ``version`` goes up on every
+    change, so callers can cache derived data and rebuild it only when the
+    version moves.
+    """
+
+    _listeners = ()
+    version = 0
+
+    def subscribe(self, callback):
+        """Call callback(event, old, new) after every change."""
+        self._listeners = (*self._listeners, callback)
+
+    def unsubscribe(self, callback):
+        """Stop calling a previously subscribed callback."""
+        self._listeners = tuple(listener for listener in self._listeners if listener != callback)
+
+    def _notify(self, event, old, new):
+        self.version += 1
+        for listener in self._listeners:
+            listener(event, old, new)
+
+
+class LoanRepository(ChangeNotifier):
+    """In-memory store keyed by ID, with a client_id -> loans secondary index.
+
+    Clients live in a dict; loans live in a columnar LoanTable and are handed
+    out as dict-like row views. IDs are allocated monotonically, so an ID is
+    never handed out twice even after the record it belonged to is deleted.
+    Portfolio totals are kept in ``aggregates`` and updated on every change;
+    ``verify_every`` turns on periodic recomputation (see PortfolioAggregates).
+    ``client_index`` keeps clients searchable by name/email prefix and
+    rejects duplicate emails and phones; ``loan_indexes`` keep loans sorted
+    by each of SORT_KEYS for ordered, top-k and range queries.
+    """
+
+    def __init__(self, verify_every=0):
+        self.clients = {}
+        self.client_index = ClientIndex()
+        self.loans = LoanTable()
+        self.loan_indexes = {key: SortedColumnIndex(COLUMN_DTYPES[key]) for key in SORT_KEYS}
+        self._client_loans = {}
+        self._next_client_id = 1
+        self._next_loan_id = 1
+        self.aggregates = PortfolioAggregates(lambda: breakdown_from_columns(self.loan_columns()), verify_every)
+
+    def batch(self):
+        """Group writes together; a no-op for the in-memory store."""
+        return nullcontext(self)
+
+    # Clients
+
+    def add_client(self, name, email, phone, client_id=None):
+        """Validate and store a new client, returning the stored record."""
+        validate_client(name, email, phone)
+        if client_id is None:
+            client_id = self._next_client_id
+        else:
+            validate_id(client_id, "Client")
+        if client_id in self.clients:
+            raise ValueError(f"Client ID {client_id} already exists.")
+        self.client_index.check(email, phone)
+        client = self._store_client(client_id, name, email, phone)
+        self.client_index.add(client)
+        self._notify("client_added", None, dict(client))
+        return client
+
+    def add_clients(self, rows):
+        """Validate and insert many (name, email, phone) rows."""
+        rows = list(rows)
+        for row in rows:
+            validate_client(*row)
+        self.client_index.check_many(rows)
+        added = [self._store_client(self._next_client_id, *row) for row in rows]
+        self.client_index.add_many(added)
+        for client in added:
+            self._notify("client_added", None, dict(client))
+        return len(rows)
+
+    def load_snapshot(self, clients, loans, next_client_id=1, next_loan_id=1):
+        """Bulk-load client and loan columns into an empty store, keeping their IDs.
+
+        Used to restore snapshots; ``loans["status"]`` may hold names or
+        codes. No change events are sent, only ``version`` moves.
+        """
+        if self.clients or len(self.loans):
+            raise ValueError("A snapshot can only be loaded into an empty store.")
+        rows = zip(*(np.asarray(clients[field]).tolist() for field in ("id", "name", "email", "phone")))
+        self.client_index.add_many([self._store_client(*row) for row in rows])
+        if len(loans["id"]):
+            self._extend_loans(*(loans[field] for field in LOAN_FIELDS))
+        self._next_client_id = max(self._next_client_id, next_client_id)
+        self._next_loan_id = max(self._next_loan_id, next_loan_id)
+        self.version += 1
+
+    def snapshot_columns(self):
+        """Return the store as (client columns, loan columns, next client ID, next loan ID) for load_snapshot."""
+        clients = list(self.clients.values())
+        client_columns = {field: [client[field] for client in clients] for field in ("id", "name", "email", "phone")}
+        return client_columns, self.loan_columns(), self._next_client_id, self._next_loan_id
+
+    def get_client(self, client_id):
+        """Return the client with the given ID, or None."""
+        return self.clients.get(client_id)
+
+    def update_client(self, client_id, **changes):
+        """Validate and apply field changes to an existing client."""
+        client = self._require_client(client_id)
+        updated = {**client, **changes, "id": client_id}
+        validate_client(updated["name"], updated["email"], updated["phone"])
+        self.client_index.check(updated["email"], updated["phone"], client_id)
+        old = dict(client)
+        self.client_index.remove(client)
+        client.update(updated)
+        self.client_index.add(client)
+        self._notify("client_updated", old, dict(client))
+        return client
+
+    def remove_client(self, client_id):
+        """Remove a client and cascade to their loans, returning the removed loans."""
+        client = self._require_client(client_id)
+        removed = [self.loans.delete(loan_id) for loan_id in sorted(self._client_loans.pop(client_id))]
+        del self.clients[client["id"]]
+        self.client_index.remove(client)
+        for loan in removed:
+            self.aggregates.remove(loan)
+            self._unindex_loan(loan)
+            self._notify("loan_removed", loan, None)
+        self._notify("client_removed", client, None)
+        return removed
+
+    def list_clients(self, offset=0, limit=None):
+        """Return clients in insertion order, optionally only a window of them."""
+        if not offset and limit is None:
+            return list(self.clients.values())
+        return list(islice(self.clients.values(), offset, None if limit is None else offset + limit))
+
+    def search_clients(self, query="", limit=None):
+        """Return clients whose name or email starts with query (case-insensitive), ordered by name."""
+        ids = self.client_index.search(query, lambda client_id: self.clients[client_id]["name"])
+        return [self.clients[client_id] for client_id in ids[:limit]]
+
+    def client_count(self):
+        """Return the number of clients."""
+        return len(self.clients)
+
+    def client_name(self, client_id):
+        """Return the client's name, or 'Unknown' if the client does not exist."""
+        client = self.clients.get(client_id)
+        return client["name"] if client else "Unknown"
+
+    def client_names(self):
+        """Return a {client ID: name} map for resolving many loans at once."""
+        return {client_id: client["name"] for client_id, client in self.clients.items()}
+
+    # Loans
+
+    def add_loan(self, client_id, amount, interest_rate, term_months, status, loan_id=None):
+        """Validate and store a new loan for an existing client."""
+        self._require_client(client_id)
+        validate_loan(amount, interest_rate, term_months, status)
+        if loan_id is None:
+            loan_id = self._next_loan_id
+        else:
+            validate_id(loan_id, "Loan")
+        self.loans.append(loan_id, client_id, amount, interest_rate, term_months, status)
+        self._next_loan_id = max(self._next_loan_id, loan_id + 1)
+        self._client_loans[client_id][loan_id] = None
+        loan = self.loans.row(loan_id)
+        values = dict(loan)
+        self.aggregates.add(values)
+        self._index_loan(values)
+        self._notify("loan_added", None, values)
+        return loan
+
+    def add_loans(self, rows):
+        """Validate and insert many (client_id, amount, interest_rate, term_months, status) rows."""
+        rows = list(rows)
+        for client_id, *fields in rows:
+            self._require_client(client_id)
+            validate_loan(*fields)
+        if not rows:
+            return 0
+        ids = np.arange(self._next_loan_id, self._next_loan_id + len(rows))
+        self._extend_loans(ids, *zip(*rows))
+        if self._listeners:
+            for loan_id in ids.tolist():
+                self._notify("loan_added", None, dict(self.loans.row(loan_id)))
+        else:
+            self.version += 1
+        return len(rows)
+
+    def get_loan(self, loan_id):
+        """Return a dict-like view of the loan with the given ID, or None."""
+        return self.loans.row(loan_id)
+
+    def update_loan(self, loan_id, **changes):
+        """Validate and apply field changes to an existing loan."""
+        loan = self._require_loan(loan_id)
+        updated = {**loan, **changes, "id": loan_id}
+        if updated["client_id"] != loan["client_id"]:
+            self._require_client(updated["client_id"])
+        validate_loan(updated["amount"], updated["interest_rate"], updated["term_months"], updated["status"])
+        if updated["client_id"] != loan["client_id"]:
+            del self._client_loans[loan["client_id"]][loan_id]
+            self._client_loans[updated["client_id"]][loan_id] = None
+        old = dict(loan)
+        del updated["id"]
+        loan = self.loans.update(loan_id, **updated)
+        values = dict(loan)
+        self.aggregates.replace(old, values)
+        self._unindex_loan(old)
+        self._index_loan(values)
+        self._notify("loan_updated", old, values)
+        return loan
+
+    def remove_loan(self, loan_id):
+        """Remove a loan by ID, returning the removed record."""
+        loan = self._require_loan(loan_id)
+        del self._client_loans[loan["client_id"]][loan_id]
+        removed = self.loans.delete(loan_id)
+        self.aggregates.remove(removed)
+        self._unindex_loan(removed)
+        self._notify("loan_removed", removed, None)
+        return removed
+
+    def iter_loans(self):
+        """Yield loans ordered by ID."""
+        return iter(self.loans)
+
+    def list_loans(self):
+        """Return all loans ordered by ID."""
+        return list(self.loans)
+
+    def loan_columns(self, status=None, client_id=None, min_amount=None, max_amount=None, offset=0, limit=None):
+        """Return matching loans as column arrays ordered by ID, with status names.
+
+        ``offset``/``limit`` select one page of the matches; only that page is copied.
+        """
+        validate_status(status)
+        mask = self.loans.filter(status, client_id, min_amount, max_amount)
+        return with_status_names(self.loans.columns(self.loans.slots_by_id(mask, offset, limit)))
+
+    def loan_count(self, status=None, client_id=None, min_amount=None, max_amount=None):
+        """Return the number of loans, or of those matching the filters."""
+        validate_status(status)
+        if status is None and client_id is None and min_amount is None and max_amount is None:
+            return len(self.loans)
+        return int(np.count_nonzero(self.loans.filter(status, client_id, min_amount, max_amount)))
+
+    def loans_for_client(self, client_id):
+        """Return the loans of one client, ordered by ID, without scanning the whole book."""
+        return [self.loans.row(loan_id) for loan_id in sorted(self._client_loans.get(client_id, ()))]
+
+    def sorted_loans(self, key):
+        """Return loans ordered by key without reordering the store."""
+        validate_sort_key(key)
+        return [self.loans.row(loan_id) for ids in self.loan_indexes[key].ascending() for loan_id in ids.tolist()]
+
+    def top_loans(self, key, k=10, status=None, largest=True):
+        """Return the k loans with the largest (or smallest) key, optionally of one status."""
+        validate_sort_key(key)
+        ids = self.loan_indexes[key].top(k, largest, self._status_filter(status))
+        return [self.loans.row(loan_id) for loan_id in ids.tolist()]
+
+    def loans_between(self, key, low=None, high=None, status=None):
+        """Return loans with low <= key <= high (either bound optional), ordered by key."""
+        validate_sort_key(key)
+        ids = self.loan_indexes[key].between(low, high)
+        accept = self._status_filter(status)
+        if accept is not None:
+            ids = ids[accept(ids)]
+        return [self.loans.row(loan_id) for loan_id in ids.tolist()]
+
+    def totals(self):
+        """Return (total amount, total simple interest) of active loans in O(1)."""
+        return self.aggregates.totals()
+
+    # Helpers
+
+    def _extend_loans(self, ids, client_ids, *fields):
+        slots = self.loans.extend(ids, client_ids, *fields)
+        self._next_loan_id = max(self._next_loan_id, int(np.max(ids)) + 1)
+        for loan_id, client_id in zip(np.asarray(ids).tolist(), np.asarray(client_ids).tolist()):
+            self._client_loans[client_id][loan_id] = None
+        columns = with_status_names(self.loans.columns(slots))
+        self.aggregates.add_columns(columns)
+        for key, index in self.loan_indexes.items():
+            index.extend(columns[key], columns["id"])
+
+    def _index_loan(self, loan):
+        for key, index in self.loan_indexes.items():
+            index.add(loan[key], loan["id"])
+
+    def _unindex_loan(self, loan):
+        for key, index in self.loan_indexes.items():
+            index.remove(loan[key], loan["id"])
+
+    def _status_filter(self, status):
+        validate_status(status)
+        if status is None:
+            return None
+        return lambda ids: self.loans.status_codes(ids) == STATUS_CODES[status]
+
+    def _store_client(self, client_id, name, email, phone):
+        self._next_client_id = max(self._next_client_id, client_id + 1)
+        client = {"id": client_id, "name": name, "email": email, "phone": phone}
+        self.clients[client_id] = client
+        self._client_loans[client_id] = {}
+        return client
+
+    def _require_client(self, client_id):
+        client = self.clients.get(client_id)
+        if client is None:
+            raise ValueError(f"Client ID {client_id} not found.")
+        return client
+
+    def _require_loan(self, loan_id):
+        loan = self.loans.row(loan_id)
+        if loan is None:
+            raise ValueError(f"Loan ID {loan_id} not found.")
+        return loan
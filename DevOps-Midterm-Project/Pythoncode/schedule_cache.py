@@ -0,0 +1,93 @@
+"""
+Schedule cache module for the Bank Loan Management System.
+Contains a bounded LRU cache of amortization schedules keyed by loan terms.
+"""
+import threading
+from collections import OrderedDict
+
+import amortization
+
+DEFAULT_MAXSIZE = 1024
+
+
+class ScheduleCache:
+    """LRU cache of amortization schedules keyed by (amount, interest_rate, term_months).
+
+    Loans with identical terms share one cached schedule. The cached arrays
+    are read-only so callers cannot corrupt a shared entry. Call
+    ``watch(repo)`` to drop the entry of any loan that is edited or removed.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(loan):
+        """Return the cache key for a loan's terms."""
+        return float(loan["amount"]), float(loan["interest_rate"]), int(loan["term_months"])
+
+    def schedule_for(self, loan):
+        """Return the schedule columns for a loan, computing them only on a miss."""
+        key = self.key(loan)
+        with self._lock:
+            schedule = self._entries.get(key)
+            if schedule is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(schedule)
+            self.misses += 1
+        schedule = amortization.loan_schedule(loan)
+        for column in schedule.values():
+            column.setflags(write=False)
+        with self._lock:
+            self._entries[key] = schedule
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return dict(schedule)
+
+    def invalidate(self, loan):
+        """Drop the entry for a loan's terms, returning whether one was cached."""
+        with self._lock:
+            if self._entries.pop(self.key(loan), None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self):
+        """Drop every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def watch(self, repo):
+        """Invalidate entries whenever a loan in repo is edited or removed."""
+        repo.subscribe(self._on_change)
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _on_change(self, event, old, new):
+        if event in ("loan_updated", "loan_removed"):
+            self.invalidate(old)
+
+
+# Process-wide cache shared by the CLI and every Streamlit session.
+schedule_cache = ScheduleCache()
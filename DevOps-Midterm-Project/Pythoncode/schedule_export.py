@@ -0,0 +1,173 @@
+"""
+Schedule export module for the Bank Loan Management System.
+Contains a chunked, constant-memory export of full-portfolio amortization schedules.
+"""
+import gzip
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+import amortization
+
+SCHEDULE_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_COLUMNS = ("loan_id", *amortization.SCHEDULE_COLUMNS)
+DEFAULT_CHUNK_ROWS = 250_000
+# Level 1 compresses these numeric rows about 6x faster than the default level 6 for ~15% larger files
+GZIP_LEVEL = 1
+# printf templates format a whole chunk in one pass, far faster than csv.writer or json.dumps per row
+ROW_TEMPLATES = {
+    "csv": "%d,%d,%.2f,%.2f,%.2f,%.2f",
+    "jsonl": '{"loan_id":%d,"month":%d,"payment":%.2f,"principal":%.2f,"interest":%.2f,"balance":%.2f}',
+}
+
+
+def detect_schedule_format(path):
+    """Guess the export format from the file name (ignoring a .gz suffix), defaulting to CSV."""
+    name = str(path).lower()
+    name = name[:-3] if name.endswith(".gz") else name
+    if name.endswith(".parquet"):
+        return "parquet"
+    return "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+
+
+def _loan_arrays(loans):
+    return (np.asarray(loans["id"], dtype=np.int64), np.asarray(loans["amount"]),
+            np.asarray(loans["interest_rate"]), np.asarray(loans["term_months"], dtype=np.int64))
+
+
+def _chunk_bounds(terms, chunk_rows):
+    """Yield (start, stop, rows) for runs of whole loans holding about chunk_rows schedule rows."""
+    row_ends = np.cumsum(terms, dtype=np.int64)
+    start = 0
+    while start < len(terms):
+        done_rows = int(row_ends[start - 1]) if start else 0
+        stop = max(start + 1, int(np.searchsorted(row_ends, done_rows + chunk_rows, side="right")))
+        yield start, stop, int(row_ends[stop - 1]) - done_rows
+        start = stop
+
+
+def _schedule_chunk(ids, amounts, rates, terms):
+    chunk = amortization.batch_schedules(amounts, rates, terms)
+    chunk["loan_id"] = ids[chunk.pop("loan_index")]
+    return {column: chunk[column] for column in EXPORT_COLUMNS}
+
+
+def iter_schedule_chunks(loans, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (schedule columns, loans done so far) for runs of whole loans of about chunk_rows rows.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``).
+    Runs are cut on the running total of terms, so memory per chunk stays
+    the same whatever the mix of terms. Columns are EXPORT_COLUMNS.
+    """
+    arrays = _loan_arrays(loans)
+    for start, stop, _ in _chunk_bounds(arrays[3], chunk_rows):
+        yield _schedule_chunk(*(array[start:stop] for array in arrays)), stop
+
+
+def _encode_chunk(ids, amounts, rates, terms, fmt, compress):
+    """Build and format one chunk of schedules as bytes (a gzip member when compressing)."""
+    chunk = _schedule_chunk(ids, amounts, rates, terms)
+    rows = zip(*(chunk[column].tolist() for column in EXPORT_COLUMNS))
+    data = ("\n".join(map(ROW_TEMPLATES[fmt].__mod__, rows)) + "\n").encode("utf-8")
+    return gzip.compress(data, GZIP_LEVEL) if compress else data
+
+
+def _encoded_chunks(loans, fmt, compress, chunk_rows, workers):
+    """Yield (rows, loans done, bytes) in loan order, encoding up to 2 * workers chunks ahead in parallel."""
+    arrays = _loan_arrays(loans)
+    tasks = ((start, stop, rows, [array[start:stop] for array in arrays])
+             for start, stop, rows in _chunk_bounds(arrays[3], chunk_rows))
+    if workers == 1:
+        for _, stop, rows, chunk in tasks:
+            yield rows, stop, _encode_chunk(*chunk, fmt, compress)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for _, stop, rows, chunk in tasks:
+            pending.append((rows, stop, pool.submit(_encode_chunk, *chunk, fmt, compress)))
+            if len(pending) >= 2 * workers:
+                rows, stop, future = pending.popleft()
+                yield rows, stop, future.result()
+        while pending:
+            rows, stop, future = pending.popleft()
+            yield rows, stop, future.result()
+
+
+@contextmanager
+def _binary_sink(path):
+    """Open a binary output, treating '-' as stdout."""
+    if path == "-":
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+    else:
+        with open(path, "wb") as f:
+            yield f
+
+
+def _write_text(loans, path, fmt, compress, chunk_rows, workers):
+    with _binary_sink(path) as out:
+        if fmt == "csv":
+            header = (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+            out.write(gzip.compress(header, GZIP_LEVEL) if compress else header)
+        for rows, done, data in _encoded_chunks(loans, fmt, compress, chunk_rows, workers):
+            out.write(data)  # Concatenated gzip members form one valid .gz stream
+            yield rows, done
+
+
+def _write_parquet(loans, path, compress, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow).") from None
+    if path == "-":
+        raise ValueError("Parquet export needs an output file.")
+    schema = pa.schema([("loan_id", pa.int64()), ("month", pa.int64()),
+                        *((column, pa.float64()) for column in amortization.SCHEDULE_COLUMNS[1:])])
+    with pq.ParquetWriter(path, schema, compression="gzip" if compress else "snappy") as writer:
+        for chunk, done in iter_schedule_chunks(loans, chunk_rows):
+            writer.write_table(pa.table(chunk, schema=schema))  # One row group per chunk
+            yield len(chunk["month"]), done
+
+
+def export_schedules(loans, path, fmt=None, compress=None, chunk_rows=DEFAULT_CHUNK_ROWS, workers=None,
+                     progress=None):
+    """Stream the full schedule of every given loan to path as CSV, JSONL or Parquet.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``).
+    Schedules are generated and written one chunk of about ``chunk_rows``
+    rows at a time, so memory does not grow with the number of loans or
+    months. CSV/JSONL chunks are built, formatted and (with ``compress``)
+    gzipped on ``workers`` processes (default: CPU count) while the parent
+    writes them in order; Parquet needs the optional pyarrow package.
+    ``fmt`` defaults to the file extension and ``compress`` to a ``.gz``
+    suffix. ``progress(summary)`` is called after each chunk. Returns
+    {"loans", "total_loans", "rows", "seconds"}.
+    """
+    fmt = fmt or detect_schedule_format(path)
+    if fmt not in SCHEDULE_FORMATS:
+        raise ValueError(f"Format must be one of {', '.join(SCHEDULE_FORMATS)}.")
+    if chunk_rows <= 0:
+        raise ValueError("Chunk size must be positive.")
+    if compress is None:
+        compress = str(path).lower().endswith(".gz")
+    workers = max(1, workers or os.cpu_count() or 1)
+    if fmt == "parquet":
+        written = _write_parquet(loans, path, compress, chunk_rows)
+    else:
+        written = _write_text(loans, path, fmt, compress, chunk_rows, workers)
+    summary = {"loans": 0, "total_loans": len(loans["id"]), "rows": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    for rows, done in written:
+        summary["rows"] += rows
+        summary["loans"] = done
+        summary["seconds"] = time.perf_counter() - start
+        if progress:
+            progress(summary)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
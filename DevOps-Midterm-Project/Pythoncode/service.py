@@ -0,0 +1,135 @@
+"""
+Service module for the Bank Loan Management System.
+Contains the data-returning business layer used by the JSON API.
+"""
+import threading
+
+import amortization
+from loan_table import LOAN_FIELDS
+from schedule_cache import schedule_cache
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class NotFoundError(LookupError):
+    """Raised when a client or loan ID does not exist."""
+
+
+def _page(offset, limit):
+    offset = max(0, int(offset))
+    limit = min(MAX_LIMIT, max(0, int(limit)))
+    return offset, offset + limit
+
+
+class LoanService:
+    """Business operations over a repository that return plain data instead of printing.
+
+    Validation problems raise ValueError and unknown IDs raise NotFoundError.
+    Writes are serialized by a lock, so the service can be shared between
+    threads as well as between coroutines on one event loop.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self._write_lock = threading.RLock()
+
+    # Clients
+
+    def list_clients(self, offset=0, limit=DEFAULT_LIMIT):
+        """Return one page of clients ordered by ID plus the total count."""
+        start, stop = _page(offset, limit)
+        clients = self.repo.list_clients(start, stop - start)
+        return {"total": self.repo.client_count(), "items": [dict(client) for client in clients]}
+
+    def get_client(self, client_id):
+        """Return one client."""
+        client = self.repo.get_client(client_id)
+        if client is None:
+            raise NotFoundError(f"Client ID {client_id} not found.")
+        return dict(client)
+
+    def create_client(self, name, email, phone):
+        """Validate and add a client, returning the stored record."""
+        with self._write_lock:
+            return dict(self.repo.add_client(str(name).strip(), str(email).strip(), str(phone).strip()))
+
+    def update_client(self, client_id, **changes):
+        """Apply field changes to a client, returning the updated record."""
+        changes = {key: str(changes[key]).strip() for key in ("name", "email", "phone") if key in changes}
+        with self._write_lock:
+            self.get_client(client_id)
+            return dict(self.repo.update_client(client_id, **changes))
+
+    def delete_client(self, client_id):
+        """Remove a client and their loans, returning how many loans went with them."""
+        with self._write_lock:
+            self.get_client(client_id)
+            return {"id": client_id, "removed_loans": len(self.repo.remove_client(client_id))}
+
+    def client_loans(self, client_id):
+        """Return every loan of one client."""
+        self.get_client(client_id)
+        return [dict(loan) for loan in self.repo.loans_for_client(client_id)]
+
+    # Loans
+
+    def list_loans(self, offset=0, limit=DEFAULT_LIMIT, status=None, client_id=None,
+                   min_amount=None, max_amount=None):
+        """Return one page of loans matching the filters plus the total match count."""
+        start, stop = _page(offset, limit)
+        filters = (status, client_id, min_amount, max_amount)
+        columns = self.repo.loan_columns(*filters, offset=start, limit=stop - start)
+        page = [columns[field].tolist() for field in LOAN_FIELDS]
+        return {"total": self.repo.loan_count(*filters), "items": [dict(zip(LOAN_FIELDS, row)) for row in zip(*page)]}
+
+    def get_loan(self, loan_id):
+        """Return one loan."""
+        loan = self.repo.get_loan(loan_id)
+        if loan is None:
+            raise NotFoundError(f"Loan ID {loan_id} not found.")
+        return dict(loan)
+
+    def create_loan(self, client_id, amount, interest_rate, term_months, status="active"):
+        """Validate and add a loan, returning the stored record."""
+        with self._write_lock:
+            self.get_client(int(client_id))
+            loan = self.repo.add_loan(int(client_id), float(amount), float(interest_rate), int(term_months),
+                                      str(status).lower())
+            return dict(loan)
+
+    def update_loan(self, loan_id, **changes):
+        """Apply field changes to a loan, returning the updated record."""
+        converters = {"client_id": int, "amount": float, "interest_rate": float, "term_months": int,
+                      "status": lambda value: str(value).lower()}
+        changes = {key: convert(changes[key]) for key, convert in converters.items() if key in changes}
+        with self._write_lock:
+            self.get_loan(loan_id)
+            if "client_id" in changes:
+                self.get_client(changes["client_id"])
+            return dict(self.repo.update_loan(loan_id, **changes))
+
+    def delete_loan(self, loan_id):
+        """Remove a loan, returning the removed record."""
+        with self._write_lock:
+            self.get_loan(loan_id)
+            return dict(self.repo.remove_loan(loan_id))
+
+    # Reports
+
+    def totals(self):
+        """Return active totals and the per-status breakdown."""
+        total_amount, total_interest = self.repo.totals()
+        return {"total_active_amount": total_amount, "total_active_interest": total_interest,
+                **self.repo.aggregates.summary()}
+
+    def amortization(self, loan_id):
+        """Return a loan's monthly payment and its schedule as row objects."""
+        loan = self.get_loan(loan_id)
+        schedule = schedule_cache.schedule_for(loan)
+        columns = [schedule[column].tolist() for column in amortization.SCHEDULE_COLUMNS]
+        return {
+            "loan_id": loan_id,
+            "monthly_payment": amortization.monthly_payment(loan["amount"], loan["interest_rate"], loan["term_months"]),
+            "schedule": [dict(zip(amortization.SCHEDULE_COLUMNS, row)) for row in zip(*columns)],
+        }
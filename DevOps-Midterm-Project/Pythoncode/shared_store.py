@@ -0,0 +1,155 @@
+"""
+Shared store module for the Bank Loan Management System.
+Contains a reader-writer locked repository facade shared by concurrent sessions, with optimistic edits.
+"""
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from loan_table import LoanRow
+
+# Repository methods that change data and so take the write lock; everything else is a read
+WRITE_METHODS = frozenset({
+    "add_client", "add_clients", "update_client", "remove_client",
+    "add_loan", "add_loans", "update_loan", "remove_loan", "load_snapshot",
+})
+# Methods whose results are live records (or lazy iterators) and are copied before the lock is released
+RECORD_METHODS = frozenset({
+    "get_client", "list_clients", "search_clients", "add_client", "update_client",
+    "get_loan", "iter_loans", "list_loans", "loans_for_client", "sorted_loans", "top_loans", "loans_between",
+    "add_loan", "update_loan",
+})
+
+
+class ConflictError(ValueError):
+    """Raised when a record was changed by someone else since the caller read it."""
+
+
+class ReadWriteLock:
+    """Lock that admits any number of readers or a single writer.
+
+    Readers never wait for each other, only for an active or waiting
+    writer, so a stream of readers cannot starve an edit. Both sides are
+    re-entrant per thread, and the writing thread may also read.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        depth = getattr(self._local, "reads", 0)
+        if depth or self._writer == me:
+            self._local.reads = depth + 1  # Already inside: re-entering must not queue behind a writer
+        else:
+            with self._cond:
+                self._cond.wait_for(lambda: self._writer is None and not self._waiting_writers)
+                self._readers += 1
+            self._local.reads = 1
+        try:
+            yield
+        finally:
+            self._local.reads -= 1
+            if not self._local.reads and self._writer != me:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if getattr(self._local, "reads", 0):
+                    raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+                self._waiting_writers += 1
+                try:
+                    self._cond.wait_for(lambda: self._writer is None and not self._readers)
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+def _detach(result):
+    """Copy live records so callers can use them after the lock is released."""
+    if isinstance(result, (dict, LoanRow)):
+        return dict(result)
+    if result is None:
+        return None
+    return [dict(record) for record in result]
+
+
+class SharedStore:
+    """Thread-safe facade over one repository shared by every session in a process.
+
+    Repository methods are proxied: writes run under the write lock and
+    reads under the shared read lock, and records are copied out before the
+    lock is released. Each record has a version that increases on every
+    edit, so an edit form can pass the version it displayed to
+    ``update_if`` and get ConflictError instead of overwriting a newer
+    edit. Versions start at 0 and only edited, still existing records are
+    tracked, so the bookkeeping does not grow with every record ever stored.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.lock = ReadWriteLock()
+        self._record_versions = {}
+        repo.subscribe(self._on_change)
+
+    @property
+    def version(self):
+        return self.repo.version
+
+    def __getattr__(self, name):
+        attr = getattr(self.repo, name)
+        if not callable(attr):
+            return attr
+        lock = self.lock.write if name in WRITE_METHODS else self.lock.read
+        detach = _detach if name in RECORD_METHODS else None
+
+        @wraps(attr)
+        def locked(*args, **kwargs):
+            with lock():
+                result = attr(*args, **kwargs)
+                return detach(result) if detach else result
+        return locked
+
+    def read_record(self, kind, record_id):
+        """Return (copy of the client or loan, its version) read atomically; the record is None if missing."""
+        with self.lock.read():
+            record = getattr(self.repo, f"get_{kind}")(record_id)
+            return _detach(record), self._record_versions.get((kind, record_id), 0)
+
+    def update_if(self, kind, record_id, expected_version, **changes):
+        """Apply changes to a client or loan only if it is still at expected_version."""
+        with self.lock.write():
+            current = self._record_versions.get((kind, record_id), 0)
+            if current != expected_version:
+                raise ConflictError(f"{kind.capitalize()} ID {record_id} was changed by someone else "
+                                    "since you opened it. Review the current values and save again.")
+            return _detach(getattr(self.repo, f"update_{kind}")(record_id, **changes))
+
+    def _on_change(self, event, old, new):
+        kind, action = event.split("_", 1)
+        key = (kind, (new or old)["id"])
+        if action == "removed":
+            self._record_versions.pop(key, None)
+        elif action == "updated":
+            self._record_versions[key] = self._record_versions.get(key, 0) + 1
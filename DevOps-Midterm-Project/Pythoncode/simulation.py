@@ -0,0 +1,124 @@
+"""
+Simulation module for the Bank Loan Management System.
+Contains a seeded Monte Carlo model of defaults and prepayments run on a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from amortization import annuity_payments, loan_arrays
+
+DEFAULT_PATHS = 1000
+SHARD_PATHS = 50
+LOAN_CHUNK = 20_000
+# Uniforms drawn per path at a time; months are batched up to this many so few loans still mean few calls
+DRAW_BLOCK = 1 << 16
+LOSS_PERCENTILES = (50, 95, 99)
+CASH_FLOW_BANDS = (5, 50, 95)
+
+_shared = {}
+
+
+def _monthly_probability(annual_percent):
+    """Convert an annual event rate in percent to a constant monthly probability."""
+    return -np.expm1(np.log1p(-annual_percent / 100) / 12)
+
+
+def _init_worker(amounts, monthly_rates, terms):
+    """Keep the loan arrays in each worker so tasks only carry a seed."""
+    _shared.update(amounts=amounts, monthly_rates=monthly_rates, terms=terms)
+
+
+def _simulate_shard(path_seeds, monthly_default, monthly_prepay, recovery):
+    """Run one path per seed over every loan and return (loss per path, cash per path and month).
+
+    Loans are sorted by term (longest first) so the loans still running in
+    month m are a prefix. Each month draws one uniform per path and live loan
+    and splits it into default (balance lost less recovery), prepayment
+    (scheduled payment plus the rest of the balance) or a scheduled payment.
+    Every path draws from its own generator, so a path's result does not
+    depend on which shard it runs in.
+    """
+    amounts, monthly_rates, terms = _shared["amounts"], _shared["monthly_rates"], _shared["terms"]
+    rngs = [np.random.default_rng(seed) for seed in path_seeds]
+    n_paths = len(rngs)
+    horizon = int(terms[0]) if len(terms) else 0
+    losses = np.zeros(n_paths)
+    cash = np.zeros((n_paths, horizon))
+    for start in range(0, len(terms), LOAN_CHUNK):
+        chunk_terms = terms[start:start + LOAN_CHUNK]
+        rates = monthly_rates[start:start + LOAN_CHUNK]
+        payments = annuity_payments(amounts[start:start + LOAN_CHUNK], rates, chunk_terms)
+        balance = np.broadcast_to(amounts[start:start + LOAN_CHUNK], (n_paths, len(chunk_terms))).copy()
+        alive = np.searchsorted(-chunk_terms, -np.arange(1, int(chunk_terms[0]) + 1), side="right")
+        offsets = np.concatenate(([0], np.cumsum(alive)))
+        for m, k in enumerate(alive):
+            bal = balance[:, :k]
+            if m == 0 or offsets[m] >= block_end:
+                block_start = offsets[m]
+                block_end = offsets[max(m + 1, np.searchsorted(offsets, block_start + DRAW_BLOCK, side="right") - 1)]
+                block = np.empty((n_paths, block_end - block_start), dtype=np.float32)
+                for rng, row in zip(rngs, block):
+                    rng.random(row.size, dtype=np.float32, out=row)
+            draw = block[:, offsets[m] - block_start:offsets[m + 1] - block_start]
+            defaulted = draw < monthly_default
+            prepaid = ~defaulted & (draw < monthly_default + monthly_prepay)
+            interest = bal * rates[:k]
+            principal = np.minimum(payments[:k] - interest, bal)
+            last = chunk_terms[:k] == m + 1
+            principal[:, last] = bal[:, last]  # Close out each loan exactly on its final payment
+            flow = interest + principal
+            remaining = bal - principal
+            defaulted_balance = (bal * defaulted).sum(axis=1)
+            cash[:, m] += (flow.sum(axis=1) - (flow * defaulted).sum(axis=1)
+                           + (remaining * prepaid).sum(axis=1) + recovery * defaulted_balance)
+            losses += (1 - recovery) * defaulted_balance
+            np.multiply(remaining, ~(defaulted | prepaid), out=bal)
+    return losses, cash
+
+
+def simulate_portfolio(loans, n_paths=DEFAULT_PATHS, seed=0, default_rate=2.0, prepay_rate=6.0,
+                       recovery_rate=40.0, workers=None):
+    """Simulate monthly defaults and prepayments for a set of loans.
+
+    ``loans`` is a dict of loan columns (as returned by ``loan_columns()``);
+    rates are annual percentages. Every path is seeded from its own
+    ``SeedSequence`` child and paths are run in shards of ``SHARD_PATHS``,
+    so results depend only on ``seed`` and ``n_paths``, never on
+    ``workers`` or the shard size. Returns expected and
+    percentile loss plus monthly cash-flow mean and percentile bands.
+    """
+    if not (0 <= default_rate < 100 and 0 <= prepay_rate < 100 and 0 <= recovery_rate <= 100):
+        raise ValueError("Default and prepayment rates must be in [0, 100), recovery in [0, 100].")
+    if n_paths <= 0:
+        raise ValueError("Number of paths must be positive.")
+    amounts, monthly_rates, terms = loan_arrays(loans["amount"], loans["interest_rate"], loans["term_months"])
+    order = np.argsort(-terms, kind="stable")
+    arrays = (amounts[order], monthly_rates[order], terms[order])
+
+    path_seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    shards = [path_seeds[start:start + SHARD_PATHS] for start in range(0, n_paths, SHARD_PATHS)]
+    params = (_monthly_probability(default_rate), _monthly_probability(prepay_rate), recovery_rate / 100)
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if workers == 1:
+        _init_worker(*arrays)
+        shards = [_simulate_shard(shard, *params) for shard in shards]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=arrays) as pool:
+            shards = list(pool.map(_simulate_shard, shards, *([p] * len(shards) for p in params)))
+
+    losses = np.concatenate([loss for loss, _ in shards])
+    cash = np.concatenate([flow for _, flow in shards])
+    return {
+        "paths": n_paths,
+        "loans": len(terms),
+        "principal": float(amounts.sum()),
+        "expected_loss": float(losses.mean()),
+        "loss_percentiles": dict(zip(LOSS_PERCENTILES, np.percentile(losses, LOSS_PERCENTILES).tolist())),
+        "cash_flow": {
+            "month": np.arange(1, cash.shape[1] + 1),
+            "mean": cash.mean(axis=0),
+            **{f"p{q}": band for q, band in zip(CASH_FLOW_BANDS, np.percentile(cash, CASH_FLOW_BANDS, axis=0))},
+        },
+    }
@@ -0,0 +1,465 @@
+"""
+SQLite storage module for the Bank Loan Management System.
+Contains a persistent drop-in replacement for the in-memory repository.
+"""
+import logging
+import math
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+
+from aggregates import PortfolioAggregates, empty_breakdown
+from client_index import PREFIX_END, email_key, name_key, phone_key
+from loan_table import COLUMN_DTYPES, LOAN_FIELDS
+from repository import (SORT_KEYS, ChangeNotifier, validate_client, validate_id, validate_loan, validate_sort_key,
+                        validate_status)
+
+# Range of an SQLite INTEGER; IDs outside it cannot be stored, so lookups of them find nothing
+SQLITE_INT_MIN, SQLITE_INT_MAX = -2**63, 2**63 - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    name_key TEXT NOT NULL DEFAULT '',
+    email_key TEXT NOT NULL DEFAULT '',
+    phone_key TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS loans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER NOT NULL REFERENCES clients(id),
+    amount REAL NOT NULL,
+    interest_rate REAL NOT NULL,
+    term_months INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clients_email ON clients(email);
+CREATE INDEX IF NOT EXISTS idx_loans_client_id ON loans(client_id);
+CREATE INDEX IF NOT EXISTS idx_loans_status ON loans(status);
+CREATE INDEX IF NOT EXISTS idx_loans_amount ON loans(amount);
+CREATE INDEX IF NOT EXISTS idx_loans_interest_rate ON loans(interest_rate);
+CREATE INDEX IF NOT EXISTS idx_loans_term_months ON loans(term_months);
+"""
+CLIENT_KEY_COLUMNS = ("name_key", "email_key", "phone_key")
+CLIENT_KEY_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_clients_name_key ON clients(name_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_email_key ON clients(email_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_phone_key ON clients(phone_key);
+"""
+
+# Statements are kept as constants so sqlite3's per-connection cache reuses
+# the compiled form on every call.
+INSERT_CLIENT = ("INSERT INTO clients (id, name, email, phone, name_key, email_key, phone_key) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)")
+SELECT_CLIENT = "SELECT id, name, email, phone FROM clients WHERE id = ?"
+UPDATE_CLIENT = ("UPDATE clients SET name = ?, email = ?, phone = ?, name_key = ?, email_key = ?, phone_key = ? "
+                 "WHERE id = ?")
+CLIENT_BY_EMAIL = "SELECT id FROM clients WHERE email_key = ?"
+CLIENT_BY_PHONE = "SELECT id FROM clients WHERE phone_key = ?"
+SEARCH_CLIENTS = ("SELECT id, name, email, phone FROM clients "
+                  "WHERE (name_key >= ? AND name_key < ?) OR (email_key >= ? AND email_key < ?) "
+                  "ORDER BY name_key, id LIMIT ?")
+CLIENTS_BY_NAME = "SELECT id, name, email, phone FROM clients ORDER BY name_key, id LIMIT ?"
+DELETE_CLIENT = "DELETE FROM clients WHERE id = ?"
+LIST_CLIENTS = "SELECT id, name, email, phone FROM clients ORDER BY id"
+PAGE_CLIENTS = f"{LIST_CLIENTS} LIMIT ? OFFSET ?"
+COUNT_CLIENTS = "SELECT COUNT(*) FROM clients"
+CLIENT_NAMES = "SELECT id, name FROM clients"
+INSERT_LOAN = ("INSERT INTO loans (id, client_id, amount, interest_rate, term_months, status) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+SELECT_LOAN = "SELECT id, client_id, amount, interest_rate, term_months, status FROM loans WHERE id = ?"
+UPDATE_LOAN = ("UPDATE loans SET client_id = ?, amount = ?, interest_rate = ?, term_months = ?, status = ? "
+               "WHERE id = ?")
+DELETE_LOAN = "DELETE FROM loans WHERE id = ?"
+SELECT_LOANS = "SELECT id, client_id, amount, interest_rate, term_months, status FROM loans"
+LIST_LOANS = f"{SELECT_LOANS} ORDER BY id"
+CLIENT_LOANS = ("SELECT id, client_id, amount, interest_rate, term_months, status FROM loans "
+                "WHERE client_id = ? ORDER BY id")
+DELETE_CLIENT_LOANS = "DELETE FROM loans WHERE client_id = ?"
+COUNT_LOANS = "SELECT COUNT(*) FROM loans"
+STATUS_BREAKDOWN = ("SELECT status, COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(amount * interest_rate / 100), 0) "
+                    "FROM loans GROUP BY status")
+SORTED_LOANS = {key: f"{SELECT_LOANS} ORDER BY {key}, id" for key in SORT_KEYS}
+# "+status" keeps the planner on the sort-key index instead of idx_loans_status, so
+# top-k and range queries walk the key index and stop early rather than sort.
+TOP_LOANS = {
+    (key, largest, filtered): (f"{SELECT_LOANS} {'WHERE +status = ? ' if filtered else ''}"
+                               f"ORDER BY {key} {'DESC' if largest else 'ASC'}, id {'DESC' if largest else 'ASC'} LIMIT ?")
+    for key in SORT_KEYS for largest in (True, False) for filtered in (True, False)
+}
+LOANS_BETWEEN = {
+    (key, filtered): (f"{SELECT_LOANS} WHERE {key} BETWEEN ? AND ? {'AND +status = ? ' if filtered else ''}"
+                      f"ORDER BY {key}, id")
+    for key in SORT_KEYS for filtered in (True, False)
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _client_keys(name, email, phone):
+    return name_key(name), email_key(email), phone_key(phone)
+
+
+def _fits_integer(value):
+    """Whether value can be bound as an SQLite INTEGER; larger Python ints raise OverflowError."""
+    return not isinstance(value, int) or SQLITE_INT_MIN <= value <= SQLITE_INT_MAX
+
+
+def _loan_filter(status, client_id, min_amount, max_amount):
+    """Return (WHERE clause, parameters) for the loan filters that are set, or None if nothing can match."""
+    validate_status(status)
+    if not _fits_integer(client_id):
+        return None
+    conditions = []
+    params = []
+    for clause, value in (("status = ?", status), ("client_id = ?", client_id),
+                          ("amount >= ?", None if min_amount is None else float(min_amount)),
+                          ("amount <= ?", None if max_amount is None else float(max_amount))):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    return (f" WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+class SQLiteRepository(ChangeNotifier):
+    """Repository backed by an SQLite database in WAL mode.
+
+    Exposes the same methods as LoanRepository. Single writes commit on their
+    own; wrap bulk changes in ``with repo.batch():`` to commit them together.
+    Change events and aggregate updates are held back until the outermost
+    transaction commits, and dropped if it rolls back, so subscribers never
+    see rows that were not stored.
+    Totals are loaded once at open and then maintained in ``aggregates``;
+    use ``verify_every`` to catch drift from writers in other processes.
+    """
+
+    def __init__(self, path, verify_every=0):
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False,
+                                     cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_client_keys()
+        self._batch_depth = 0
+        self._pending = []
+        self.aggregates = PortfolioAggregates(self.status_breakdown, verify_every)
+
+    def _migrate_client_keys(self):
+        """Add and fill the normalized key columns on databases created before they existed."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(clients)")}
+        if not columns.issuperset(CLIENT_KEY_COLUMNS):
+            self._conn.execute("BEGIN IMMEDIATE")
+            for column in CLIENT_KEY_COLUMNS:
+                self._conn.execute(f"ALTER TABLE clients ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            self._conn.executemany(
+                "UPDATE clients SET name_key = ?, email_key = ?, phone_key = ? WHERE id = ?",
+                [(name_key(row["name"]), email_key(row["email"]), phone_key(row["phone"]), row["id"])
+                 for row in self._conn.execute(LIST_CLIENTS)])
+            self._conn.execute("COMMIT")
+        try:
+            self._conn.executescript(CLIENT_KEY_INDEXES)
+        except sqlite3.IntegrityError:
+            # Older data may already hold duplicates; keep lookups indexed and check on write instead
+            logger.warning("Duplicate client emails or phones in %s; uniqueness is enforced for new writes only",
+                           self.path)
+            self._conn.executescript(CLIENT_KEY_INDEXES.replace("UNIQUE ", ""))
+
+    def close(self):
+        """Close the underlying connection."""
+        self._conn.close()
+
+    @contextmanager
+    def batch(self):
+        """Group every write inside the block into one transaction."""
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth = 0
+            self._pending = []
+            self._conn.execute("ROLLBACK")
+            raise
+        self._batch_depth = 0
+        self._conn.execute("COMMIT")
+        pending, self._pending = self._pending, []
+        for apply, args in pending:
+            apply(*args)
+
+    def _after_commit(self, apply, *args):
+        """Call apply(*args) now, or when the open transaction commits (never, if it rolls back)."""
+        if self._batch_depth:
+            self._pending.append((apply, args))
+        else:
+            apply(*args)
+
+    def _notify(self, event, old, new):
+        self._after_commit(super()._notify, event, old, new)
+
+    def _bump_version(self):
+        self.version += 1
+
+    # Clients
+
+    def add_client(self, name, email, phone, client_id=None):
+        """Validate and store a new client, returning the stored record."""
+        validate_client(name, email, phone)
+        if client_id is not None:
+            validate_id(client_id, "Client")
+        if client_id is not None and self.get_client(client_id):
+            raise ValueError(f"Client ID {client_id} already exists.")
+        self._check_unique(email, phone)
+        with self.batch():
+            cursor = self._conn.execute(INSERT_CLIENT, (client_id, name, email, phone, *_client_keys(name, email, phone)))
+        client = {"id": cursor.lastrowid, "name": name, "email": email, "phone": phone}
+        self._notify("client_added", None, dict(client))
+        return client
+
+    def add_clients(self, rows):
+        """Validate and insert many (name, email, phone) rows in one transaction."""
+        rows = list(rows)
+        for name, email, phone in rows:
+            validate_client(name, email, phone)
+        if self._listeners:
+            with self.batch():
+                for row in rows:
+                    self.add_client(*row)
+            return len(rows)
+        try:
+            with self.batch():
+                self._conn.executemany(INSERT_CLIENT, ((None, *row, *_client_keys(*row)) for row in rows))
+        except sqlite3.IntegrityError:
+            raise ValueError("Duplicate email or phone among the new clients or with an existing client.") from None
+        self._after_commit(self._bump_version)
+        return len(rows)
+
+    def get_client(self, client_id):
+        """Return the client with the given ID, or None."""
+        if not _fits_integer(client_id):
+            return None
+        row = self._conn.execute(SELECT_CLIENT, (client_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update_client(self, client_id, **changes):
+        """Validate and apply field changes to an existing client."""
+        old = self._require_client(client_id)
+        client = {**old, **changes, "id": client_id}
+        validate_client(client["name"], client["email"], client["phone"])
+        self._check_unique(client["email"], client["phone"], client_id)
+        fields = (client["name"], client["email"], client["phone"])
+        with self.batch():
+            self._conn.execute(UPDATE_CLIENT, (*fields, *_client_keys(*fields), client_id))
+        self._notify("client_updated", old, dict(client))
+        return client
+
+    def remove_client(self, client_id):
+        """Remove a client and cascade to their loans, returning the removed loans."""
+        client = self._require_client(client_id)
+        with self.batch():
+            removed = self.loans_for_client(client_id)
+            self._conn.execute(DELETE_CLIENT_LOANS, (client_id,))
+            self._conn.execute(DELETE_CLIENT, (client_id,))
+        for loan in removed:
+            self._after_commit(self.aggregates.remove, loan)
+            self._notify("loan_removed", loan, None)
+        self._notify("client_removed", client, None)
+        return removed
+
+    def list_clients(self, offset=0, limit=None):
+        """Return clients ordered by ID, optionally only a window of them (LIMIT/OFFSET in SQL)."""
+        if not offset and limit is None:
+            return [dict(row) for row in self._conn.execute(LIST_CLIENTS)]
+        return [dict(row) for row in self._conn.execute(PAGE_CLIENTS, (-1 if limit is None else limit, offset))]
+
+    def search_clients(self, query="", limit=None):
+        """Return clients whose name or email starts with query (case-insensitive), ordered by name."""
+        limit = -1 if limit is None else limit
+        prefix = query.strip().casefold()
+        if not prefix:
+            return [dict(row) for row in self._conn.execute(CLIENTS_BY_NAME, (limit,))]
+        bounds = (prefix, prefix + PREFIX_END)
+        return [dict(row) for row in self._conn.execute(SEARCH_CLIENTS, (*bounds, *bounds, limit))]
+
+    def client_count(self):
+        """Return the number of clients."""
+        return self._conn.execute(COUNT_CLIENTS).fetchone()[0]
+
+    def client_name(self, client_id):
+        """Return the client's name, or 'Unknown' if the client does not exist."""
+        client = self.get_client(client_id)
+        return client["name"] if client else "Unknown"
+
+    def client_names(self):
+        """Return a {client ID: name} map for resolving many loans at once."""
+        return dict(self._conn.execute(CLIENT_NAMES).fetchall())
+
+    # Loans
+
+    def add_loan(self, client_id, amount, interest_rate, term_months, status, loan_id=None):
+        """Validate and store a new loan for an existing client."""
+        self._require_client(client_id)
+        validate_loan(amount, interest_rate, term_months, status)
+        if loan_id is not None:
+            validate_id(loan_id, "Loan")
+        if loan_id is not None and self.get_loan(loan_id):
+            raise ValueError(f"Loan ID {loan_id} already exists.")
+        with self.batch():
+            cursor = self._conn.execute(INSERT_LOAN, (loan_id, client_id, amount, interest_rate, term_months, status))
+        loan = {
+            "id": cursor.lastrowid,
+            "client_id": client_id,
+            "amount": amount,
+            "interest_rate": interest_rate,
+            "term_months": term_months,
+            "status": status
+        }
+        self._after_commit(self.aggregates.add, loan)
+        self._notify("loan_added", None, dict(loan))
+        return loan
+
+    def add_loans(self, rows):
+        """Validate and insert many (client_id, amount, interest_rate, term_months, status) rows at once."""
+        rows = list(rows)
+        for client_id, amount, interest_rate, term_months, status in rows:
+            validate_loan(amount, interest_rate, term_months, status)
+        with self.batch():
+            for client_id in {row[0] for row in rows}:
+                self._require_client(client_id)
+            if self._listeners:
+                for row in rows:
+                    self.add_loan(*row)
+                return len(rows)
+            self._conn.executemany(INSERT_LOAN, ((None, *row) for row in rows))
+        self._after_commit(self._bump_version)
+        if rows:
+            self._after_commit(self.aggregates.add_columns, dict(zip(LOAN_FIELDS[1:], zip(*rows))))
+        return len(rows)
+
+    def get_loan(self, loan_id):
+        """Return the loan with the given ID, or None."""
+        if not _fits_integer(loan_id):
+            return None
+        row = self._conn.execute(SELECT_LOAN, (loan_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update_loan(self, loan_id, **changes):
+        """Validate and apply field changes to an existing loan."""
+        old = self._require_loan(loan_id)
+        loan = {**old, **changes, "id": loan_id}
+        self._require_client(loan["client_id"])
+        validate_loan(loan["amount"], loan["interest_rate"], loan["term_months"], loan["status"])
+        with self.batch():
+            self._conn.execute(UPDATE_LOAN, (loan["client_id"], loan["amount"], loan["interest_rate"],
+                                             loan["term_months"], loan["status"], loan_id))
+        self._after_commit(self.aggregates.replace, old, loan)
+        self._notify("loan_updated", old, dict(loan))
+        return loan
+
+    def remove_loan(self, loan_id):
+        """Remove a loan by ID, returning the removed record."""
+        loan = self._require_loan(loan_id)
+        with self.batch():
+            self._conn.execute(DELETE_LOAN, (loan_id,))
+        self._after_commit(self.aggregates.remove, loan)
+        self._notify("loan_removed", loan, None)
+        return loan
+
+    def iter_loans(self):
+        """Yield loans ordered by ID, streamed from the database cursor."""
+        for row in self._conn.execute(LIST_LOANS):
+            yield dict(row)
+
+    def list_loans(self):
+        """Return all loans ordered by ID."""
+        return list(self.iter_loans())
+
+    def loan_columns(self, status=None, client_id=None, min_amount=None, max_amount=None, offset=0, limit=None):
+        """Return matching loans as column arrays ordered by ID, filtered and paged in SQL."""
+        where, params = _loan_filter(status, client_id, min_amount, max_amount) or (" WHERE 0", [])
+        page = ""
+        if offset or limit is not None:
+            page = " LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset]
+        rows = self._conn.execute(f"{SELECT_LOANS}{where} ORDER BY id{page}", params).fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(LOAN_FIELDS)
+        return {
+            field: np.array(column, dtype=object if field == "status" else COLUMN_DTYPES[field])
+            for field, column in zip(LOAN_FIELDS, values)
+        }
+
+    def loan_count(self, status=None, client_id=None, min_amount=None, max_amount=None):
+        """Return the number of loans, or of those matching the filters."""
+        where, params = _loan_filter(status, client_id, min_amount, max_amount) or (" WHERE 0", [])
+        return self._conn.execute(f"{COUNT_LOANS}{where}", params).fetchone()[0]
+
+    def loans_for_client(self, client_id):
+        """Return the loans of one client using the client_id index."""
+        if not _fits_integer(client_id):
+            return []
+        return [dict(row) for row in self._conn.execute(CLIENT_LOANS, (client_id,))]
+
+    def sorted_loans(self, key):
+        """Yield loans ordered by key, streamed from the database cursor."""
+        validate_sort_key(key)
+        for row in self._conn.execute(SORTED_LOANS[key]):
+            yield dict(row)
+
+    def top_loans(self, key, k=10, status=None, largest=True):
+        """Return the k loans with the largest (or smallest) key, optionally of one status."""
+        validate_sort_key(key)
+        validate_status(status)
+        params = (status, k) if status is not None else (k,)
+        return [dict(row) for row in self._conn.execute(TOP_LOANS[key, largest, status is not None], params)]
+
+    def loans_between(self, key, low=None, high=None, status=None):
+        """Return loans with low <= key <= high (either bound optional), ordered by key."""
+        validate_sort_key(key)
+        validate_status(status)
+        bounds = (-math.inf if low is None else float(low), math.inf if high is None else float(high))
+        params = (*bounds, status) if status is not None else bounds
+        return [dict(row) for row in self._conn.execute(LOANS_BETWEEN[key, status is not None], params)]
+
+    def totals(self):
+        """Return (total amount, total simple interest) of active loans in O(1)."""
+        return self.aggregates.totals()
+
+    def status_breakdown(self):
+        """Return per-status loan count, principal and simple interest, computed in SQL."""
+        breakdown = empty_breakdown()
+        for status, count, principal, interest in self._conn.execute(STATUS_BREAKDOWN):
+            breakdown[status] = {"count": count, "principal": principal, "interest": interest}
+        return breakdown
+
+    # Helpers
+
+    def _check_unique(self, email, phone, client_id=None):
+        """Raise ValueError if another client already uses this email or phone."""
+        for label, value, statement, key in (("Email", email, CLIENT_BY_EMAIL, email_key),
+                                             ("Phone", phone, CLIENT_BY_PHONE, phone_key)):
+            for (owner,) in self._conn.execute(statement, (key(value),)):
+                if owner != client_id:
+                    raise ValueError(f"{label} {value} is already used by client ID {owner}.")
+
+    def _require_client(self, client_id):
+        client = self.get_client(client_id)
+        if client is None:
+            raise ValueError(f"Client ID {client_id} not found.")
+        return client
+
+    def _require_loan(self, loan_id):
+        loan = self.get_loan(loan_id)
+        if loan is None:
+            raise ValueError(f"Loan ID {loan_id} not found.")
+        return loan
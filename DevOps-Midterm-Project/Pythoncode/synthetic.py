@@ -0,0 +1,52 @@
+"""
+Synthetic data module for the Bank Loan Management System.
+Contains a seeded generator of realistic client/loan portfolios.
+"""
+import numpy as np
+
+from loan_table import LOAN_STATUSES
+
+TERM_CHOICES = np.array([12, 24, 36, 48, 60, 84, 120, 180, 240, 360])
+TERM_WEIGHTS = np.array([0.08, 0.10, 0.16, 0.12, 0.18, 0.08, 0.08, 0.06, 0.06, 0.08])
+ACTIVE_SHARE = 0.8
+LOANS_PER_CLIENT = 3
+
+
+def generate_portfolio(n_loans, n_clients=None, seed=0):
+    """Return (client columns, loan columns) for a reproducible synthetic book.
+
+    Amounts are log-normal around 20k, rates roughly normal around 6%
+    (clipped to 0-25%, with ~2% interest-free loans), terms follow a typical
+    consumer/mortgage mix, and about 80% of loans are active. Client IDs start
+    at 1 and every loan references an existing client.
+    """
+    rng = np.random.default_rng(seed)
+    n_clients = n_clients or max(1, n_loans // LOANS_PER_CLIENT)
+    client_ids = np.arange(1, n_clients + 1)
+    clients = {
+        "id": client_ids,
+        "name": np.char.add("Client ", client_ids.astype(str)),
+        "email": np.char.add(np.char.add("client", client_ids.astype(str)), "@example.com"),
+        "phone": np.char.add("050-", np.char.zfill((client_ids % 10_000_000).astype(str), 7)),
+    }
+    rates = np.clip(rng.normal(6.0, 2.5, n_loans), 0.0, 25.0).round(2)
+    rates[rng.random(n_loans) < 0.02] = 0.0
+    loans = {
+        "id": np.arange(1, n_loans + 1),
+        "client_id": rng.integers(1, n_clients + 1, n_loans),
+        "amount": rng.lognormal(np.log(20_000), 0.9, n_loans).round(2),
+        "interest_rate": rates,
+        "term_months": rng.choice(TERM_CHOICES, n_loans, p=TERM_WEIGHTS),
+        "status": np.where(rng.random(n_loans) < ACTIVE_SHARE, LOAN_STATUSES[0], LOAN_STATUSES[1]),
+    }
+    return clients, loans
+
+
+def populate(repo, n_loans, n_clients=None, seed=0):
+    """Fill repo with a synthetic portfolio using its bulk insert methods."""
+    clients, loans = generate_portfolio(n_loans, n_clients, seed)
+    with repo.batch():
+        repo.add_clients(zip(clients["name"].tolist(), clients["email"].tolist(), clients["phone"].tolist()))
+        repo.add_loans(zip(loans["client_id"].tolist(), loans["amount"].tolist(), loans["interest_rate"].tolist(),
+                           loans["term_months"].tolist(), loans["status"].tolist()))
+    return repo
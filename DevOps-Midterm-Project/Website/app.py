@@ -5,13 +5,131 @@ Provides a web-based UI for managing clients and loans.
 import streamlit as st
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'python_app')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Pythoncode')))
+import numpy as np
 import pandas as pd
+import amortization
+from contextlib import contextmanager, nullcontext
+from exposure import MONEY_MEASURES, book_for
+from metrics import PROFILE_MODES, Capture, metrics
+from portfolio_snapshot import PortfolioSnapshot
+from repository import open_repository
+from schedule_cache import schedule_cache
+from shared_store import ConflictError, SharedStore
 
-# Initialize session state for clients and loans
-if "clients" not in st.session_state:
-    st.session_state.clients = []
-    st.session_state.loans = []
+
+# Views re-run automatically when another session changes the data
+LIVE_VIEWS = {"view_clients", "view_loans", "calculate_loans", "cash_flow", "rate_shock", "position", "exposure"}
+
+
+@st.cache_resource
+def open_shared_store(db_path):
+    """Create the one store shared by every session (browser tab) of this process."""
+    repo = open_repository(db_path)
+    schedule_cache.watch(repo)
+    book_for(repo)  # Build the exposure rollups before any session can write
+    return SharedStore(repo)
+
+
+@st.cache_resource(max_entries=1)
+def open_snapshot(path, modified_ns):
+    """Map a portfolio snapshot once per process; a replaced file (new mtime) is mapped afresh."""
+    return PortfolioSnapshot(path)
+
+
+# Set LOAN_SNAPSHOT_PATH to serve a read-only snapshot (written by `main.py snapshot`) shared by all
+# worker processes; otherwise all sessions share one locked store (LOAN_DB_PATH persists it in SQLite)
+snapshot_path = os.environ.get("LOAN_SNAPSHOT_PATH")
+if snapshot_path:
+    repo = open_snapshot(snapshot_path, os.stat(snapshot_path).st_mtime_ns)
+else:
+    repo = open_shared_store(os.environ.get("LOAN_DB_PATH"))
+read_only = getattr(repo, "read_only", False)
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+def cached_frame(name, build):
+    """Return the DataFrame from build(), rebuilding it only after the store changes."""
+    cache = st.session_state.setdefault("frame_cache", {})
+    entry = cache.get(name)
+    if entry is None or entry[0] != repo.version:
+        with metrics.timed(f"app.build.{name.split(':')[0]}") as timer:
+            entry = cache[name] = (repo.version, build())
+            timer.records = len(entry[1])
+    return entry[1]
+
+
+def exposure_book():
+    """Return (per-client exposure book, context manager factory to read it under) for the current store."""
+    if read_only:
+        return book_for(repo), nullcontext
+    return book_for(repo.repo), repo.lock.read
+
+
+@contextmanager
+def timed_view(action):
+    """Time the selected view and profile it if asked from the metrics panel; both stop even if the view fails."""
+    if not action:
+        yield
+        return
+    capture = Capture(st.session_state.get("profile_mode", "cpu")) if st.session_state.get("profile_next") else None
+    with metrics.timed(f"app.{action}"):
+        if capture is None:
+            yield
+            return
+        capture.start()
+        try:
+            yield
+        finally:
+            st.session_state.last_profile = (action, capture.stop())
+            st.session_state.profile_next = False
+
+
+def loans_page_frame(filters, offset, limit):
+    """Fetch one page of matching loans from the store, with client names joined for that page only."""
+    df = pd.DataFrame(repo.loan_columns(*filters, offset=offset, limit=limit))
+    client_names = {client_id: repo.client_name(client_id) for client_id in df["client_id"].unique().tolist()}
+    df["client_name"] = df["client_id"].map(client_names)
+    return df
+
+
+def page_controls(total, key):
+    """Render paging controls for total rows and return the (offset, limit) of the selected page."""
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    pages = -(-total // page_size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = page_col.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    return (page - 1) * page_size, page_size
+
+
+def show_rows(page_df, start, total):
+    """Send one page of rows to the browser with a caption placing it among total rows."""
+    st.dataframe(page_df, hide_index=True)
+    metrics.count_records(len(page_df))
+    st.caption(f"Showing rows {start + 1}-{start + len(page_df)} of {total}")
+
+
+def show_page(df, key):
+    """Render one page of df with paging controls; only that page is sent to the browser."""
+    if df.empty:
+        st.write("No matching rows.")
+        return
+    start, page_size = page_controls(len(df), key)
+    show_rows(df.iloc[start:start + page_size], start, len(df))
+
+
+@st.fragment(run_every=2)
+def follow_changes():
+    """Poll the shared store and refresh live views when another session has changed it."""
+    if repo.version == st.session_state.get("seen_version", repo.version):
+        return
+    st.session_state.seen_version = repo.version
+    if st.session_state.get("selected_action") in LIVE_VIEWS:
+        st.rerun()
+    st.toast("Data was changed in another session.")
 
 
 st.markdown("""
@@ -30,6 +148,9 @@ st.markdown("""
 # Welcome screen
 st.title("Bank Loan Management System")
 st.markdown("Welcome to the web interface for managing clients and loans!")
+if read_only:
+    st.info(f"Serving a read-only snapshot ({repo.client_count()} clients, {repo.loan_count()} loans); "
+            "editing is disabled.")
 
 # Sidebar with uniform buttons using columns
 with st.sidebar:
@@ -37,235 +158,379 @@ with st.sidebar:
     
     if st.button("View Clients", key="view_clients"):
         st.session_state.selected_action = "view_clients"
-    if st.button("Add Client", key="add_client"):
+    if st.button("Add Client", key="add_client", disabled=read_only):
         st.session_state.selected_action = "add_client"
-    if st.button("Edit Client", key="edit_client"):
+    if st.button("Edit Client", key="edit_client", disabled=read_only):
         st.session_state.selected_action = "edit_client"
-    if st.button("Remove Client", key="remove_client"):
+    if st.button("Remove Client", key="remove_client", disabled=read_only):
         st.session_state.selected_action = "remove_client"
     if st.button("View Loans", key="view_loans"):
         st.session_state.selected_action = "view_loans"
-    if st.button("Add Loan", key="add_loan"):
+    if st.button("Add Loan", key="add_loan", disabled=read_only):
         st.session_state.selected_action = "add_loan"
-    if st.button("Edit Loan", key="edit_loan"):
+    if st.button("Edit Loan", key="edit_loan", disabled=read_only):
         st.session_state.selected_action = "edit_loan"
-    if st.button("Remove Loan", key="remove_loan"):
+    if st.button("Remove Loan", key="remove_loan", disabled=read_only):
         st.session_state.selected_action = "remove_loan"
     if st.button("Calculate Total Loans", key="calculate_loans"):
         st.session_state.selected_action = "calculate_loans"
     if st.button("Generate Amortization Schedule", key="amortization"):
         st.session_state.selected_action = "amortization"
+    if st.button("Cash Flow Projection", key="cash_flow"):
+        st.session_state.selected_action = "cash_flow"
+    if st.button("Rate Shock Scenarios", key="rate_shock"):
+        st.session_state.selected_action = "rate_shock"
+    if st.button("Balance at Month", key="position"):
+        st.session_state.selected_action = "position"
+    if st.button("Client Exposure", key="exposure"):
+        st.session_state.selected_action = "exposure"
+    st.checkbox("Show performance metrics", key="show_metrics")
+    if not read_only:
+        follow_changes()
 
 # Main area content based on selected action
 if "selected_action" not in st.session_state:
     st.session_state.selected_action = None
 
-if st.session_state.selected_action == "view_clients":
-    st.subheader("All Clients")
-    if st.session_state.clients:
-        df = pd.DataFrame(st.session_state.clients)
-        st.table(df)
-    else:
-        st.write("No clients in the system.")
-
-elif st.session_state.selected_action == "add_client":
-    st.subheader("Add a New Client")
-    with st.form("add_client_form"):
-        name = st.text_input("Client Name")
-        email = st.text_input("Client Email")
-        phone = st.text_input("Client Phone")
-        submitted = st.form_submit_button("Add Client")
-        if submitted:
-            try:
-                if not name:
-                    raise ValueError("Name cannot be empty.")
-                if "@" not in email or "." not in email:
-                    raise ValueError("Invalid email format.")
-                if not phone:
-                    raise ValueError("Phone cannot be empty.")
-                client = {
-                    "id": len(st.session_state.clients) + 1,
-                    "name": name,
-                    "email": email,
-                    "phone": phone
-                }
-                st.session_state.clients.append(client)
-                st.success(f"Client '{name}' added successfully!")
-                st.session_state.selected_action = None  # Reset after action
-            except ValueError as e:
-                st.error(f"Error: {e}")
+# Time the selected view (and profile it when requested from the metrics panel)
+with timed_view(st.session_state.selected_action):
+    if st.session_state.selected_action == "view_clients":
+        st.subheader("All Clients")
+        if repo.client_count():
+            query = st.text_input("Search by name or email prefix")
+            if query.strip():
+                show_page(pd.DataFrame(repo.search_clients(query), columns=["id", "name", "email", "phone"]), "clients")
+            else:
+                show_page(cached_frame("clients", lambda: pd.DataFrame(repo.list_clients())), "clients")
+        else:
+            st.write("No clients in the system.")
 
-elif st.session_state.selected_action == "edit_client":
-    st.subheader("Edit a Client")
-    client_id = st.number_input("Enter Client ID to edit", min_value=1, step=1)
-    client = next((c for c in st.session_state.clients if c["id"] == client_id), None)
-    if client:
-        with st.form("edit_client_form"):
-            name = st.text_input("Client Name", value=client["name"])
-            email = st.text_input("Client Email", value=client["email"])
-            phone = st.text_input("Client Phone", value=client["phone"])
-            submitted = st.form_submit_button("Update Client")
+    elif st.session_state.selected_action == "add_client":
+        st.subheader("Add a New Client")
+        with st.form("add_client_form"):
+            name = st.text_input("Client Name")
+            email = st.text_input("Client Email")
+            phone = st.text_input("Client Phone")
+            submitted = st.form_submit_button("Add Client")
             if submitted:
                 try:
-                    if "@" not in email or "." not in email:
-                        raise ValueError("Invalid email format.")
-                    client["name"] = name
-                    client["email"] = email
-                    client["phone"] = phone
-                    st.success(f"Client ID {client_id} updated successfully!")
+                    repo.add_client(name, email, phone)
+                    st.success(f"Client '{name}' added successfully!")
                     st.session_state.selected_action = None  # Reset after action
                 except ValueError as e:
                     st.error(f"Error: {e}")
-    else:
-        st.error(f"Client ID {client_id} not found.")
-        if st.button("Back"):
-            st.session_state.selected_action = None
 
-elif st.session_state.selected_action == "remove_client":
-    st.subheader("Remove a Client")
-    client_id = st.number_input("Enter Client ID to remove", min_value=1, step=1)
-    if st.button("Confirm Client Removal"):
-        client = next((c for c in st.session_state.clients if c["id"] == client_id), None)
+    elif st.session_state.selected_action == "edit_client":
+        st.subheader("Edit a Client")
+        client_id = st.number_input("Enter Client ID to edit", min_value=1, step=1)
+        client, version = repo.read_record("client", client_id)
         if client:
-            st.session_state.loans[:] = [loan for loan in st.session_state.loans if loan["client_id"] != client_id]
-            st.session_state.clients.remove(client)
-            st.success(f"Client ID {client_id} and their loans removed successfully!")
-            st.session_state.selected_action = None  # Reset after action
+            # Save against the version the form was showing before this run, so concurrent edits are detected
+            seen = st.session_state.get("edit_client_seen")
+            expected = seen[1] if seen and seen[0] == client_id else version
+            st.session_state.edit_client_seen = (client_id, version)
+            with st.form("edit_client_form"):
+                name = st.text_input("Client Name", value=client["name"])
+                email = st.text_input("Client Email", value=client["email"])
+                phone = st.text_input("Client Phone", value=client["phone"])
+                submitted = st.form_submit_button("Update Client")
+                if submitted:
+                    try:
+                        repo.update_if("client", client_id, expected, name=name, email=email, phone=phone)
+                        st.success(f"Client ID {client_id} updated successfully!")
+                        st.session_state.selected_action = None  # Reset after action
+                        del st.session_state.edit_client_seen
+                    except ConflictError as e:
+                        st.warning(str(e))
+                    except ValueError as e:
+                        st.error(f"Error: {e}")
         else:
             st.error(f"Client ID {client_id} not found.")
-    if st.button("Back"):
-        st.session_state.selected_action = None
-
-elif st.session_state.selected_action == "view_loans":
-    st.subheader("All Loans")
-    if st.session_state.loans:
-        df = pd.DataFrame(st.session_state.loans)
-        df["client_name"] = [next((c["name"] for c in st.session_state.clients if c["id"] == loan["client_id"]), "Unknown") for loan in st.session_state.loans]
-        st.table(df)
-    else:
-        st.write("No loans in the system.")
-
-elif st.session_state.selected_action == "add_loan":
-    st.subheader("Add a New Loan")
-    with st.form("add_loan_form"):
-        client_id = st.number_input("Client ID", min_value=1, step=1)
-        amount = st.number_input("Loan Amount", min_value=0.0, step=100.0)
-        interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, step=0.1)
-        term_months = st.number_input("Term (Months)", min_value=1, step=1)
-        status = st.selectbox("Status", ["active", "paid"])
-        submitted = st.form_submit_button("Add Loan")
-        if submitted:
+            if st.button("Back"):
+                st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "remove_client":
+        st.subheader("Remove a Client")
+        client_id = st.number_input("Enter Client ID to remove", min_value=1, step=1)
+        if st.button("Confirm Client Removal"):
             try:
-                client = next((c for c in st.session_state.clients if c["id"] == client_id), None)
-                if not client:
-                    raise ValueError(f"Client ID {client_id} not found.")
-                loan = {
-                    "id": len(st.session_state.loans) + 1,
-                    "client_id": client_id,
-                    "amount": amount,
-                    "interest_rate": interest_rate,
-                    "term_months": term_months,
-                    "status": status
-                }
-                st.session_state.loans.append(loan)
-                st.success(f"Loan ID {loan['id']} added successfully for {client['name']}!")
+                repo.remove_client(client_id)
+                st.success(f"Client ID {client_id} and their loans removed successfully!")
                 st.session_state.selected_action = None  # Reset after action
             except ValueError as e:
                 st.error(f"Error: {e}")
+        if st.button("Back"):
+            st.session_state.selected_action = None
 
-elif st.session_state.selected_action == "edit_loan":
-    st.subheader("Edit a Loan")
-    loan_id = st.number_input("Enter Loan ID to edit", min_value=1, step=1)
-    loan = next((l for l in st.session_state.loans if l["id"] == loan_id), None)
-    if loan:
-        with st.form("edit_loan_form"):
-            amount = st.number_input("Loan Amount", value=loan["amount"], min_value=0.0, step=100.0)
-            interest_rate = st.number_input("Interest Rate (%)", value=loan["interest_rate"], min_value=0.0, step=0.1)
-            term_months = st.number_input("Term (Months)", value=loan["term_months"], min_value=1, step=1)
-            status = st.selectbox("Status", ["active", "paid"], index=0 if loan["status"] == "active" else 1)
-            submitted = st.form_submit_button("Update Loan")
+    elif st.session_state.selected_action == "view_loans":
+        st.subheader("All Loans")
+        if repo.loan_count():
+            status_col, client_col, min_col, max_col = st.columns(4)
+            status = status_col.selectbox("Status", ["all", "active", "paid"])
+            client_id = client_col.number_input("Client ID (0 = all)", min_value=0, step=1)
+            min_amount = min_col.number_input("Min amount", min_value=0.0, step=100.0)
+            max_amount = max_col.number_input("Max amount (0 = no limit)", min_value=0.0, step=100.0)
+            # Filtering and paging run in the store, so a page never loads the whole portfolio
+            filters = (None if status == "all" else status, int(client_id) or None, min_amount or None,
+                       max_amount or None)
+            total = repo.loan_count(*filters)
+            if total:
+                start, page_size = page_controls(total, "loans")
+                show_rows(loans_page_frame(filters, start, page_size), start, total)
+            else:
+                st.write("No matching rows.")
+        else:
+            st.write("No loans in the system.")
+
+    elif st.session_state.selected_action == "add_loan":
+        st.subheader("Add a New Loan")
+        with st.form("add_loan_form"):
+            client_id = st.number_input("Client ID", min_value=1, step=1)
+            amount = st.number_input("Loan Amount", min_value=0.0, step=100.0)
+            interest_rate = st.number_input("Interest Rate (%)", min_value=0.0, step=0.1)
+            term_months = st.number_input("Term (Months)", min_value=1, step=1)
+            status = st.selectbox("Status", ["active", "paid"])
+            submitted = st.form_submit_button("Add Loan")
             if submitted:
                 try:
-                    loan["amount"] = amount
-                    loan["interest_rate"] = interest_rate
-                    loan["term_months"] = term_months
-                    loan["status"] = status
-                    st.success(f"Loan ID {loan_id} updated successfully!")
+                    loan = repo.add_loan(client_id, amount, interest_rate, term_months, status)
+                    st.success(f"Loan ID {loan['id']} added successfully for {repo.client_name(client_id)}!")
                     st.session_state.selected_action = None  # Reset after action
                 except ValueError as e:
                     st.error(f"Error: {e}")
-    else:
-        st.error(f"Loan ID {loan_id} not found.")
-        if st.button("Back"):
-            st.session_state.selected_action = None
 
-elif st.session_state.selected_action == "remove_loan":
-    st.subheader("Remove a Loan")
-    loan_id = st.number_input("Enter Loan ID to remove", min_value=1, step=1)
-    if st.button("Confirm Loan Removal"):
-        loan = next((l for l in st.session_state.loans if l["id"] == loan_id), None)
+    elif st.session_state.selected_action == "edit_loan":
+        st.subheader("Edit a Loan")
+        loan_id = st.number_input("Enter Loan ID to edit", min_value=1, step=1)
+        loan, version = repo.read_record("loan", loan_id)
         if loan:
-            st.session_state.loans.remove(loan)
-            st.success(f"Loan ID {loan_id} removed successfully!")
-            st.session_state.selected_action = None  # Reset after action
+            seen = st.session_state.get("edit_loan_seen")
+            expected = seen[1] if seen and seen[0] == loan_id else version
+            st.session_state.edit_loan_seen = (loan_id, version)
+            with st.form("edit_loan_form"):
+                amount = st.number_input("Loan Amount", value=loan["amount"], min_value=0.0, step=100.0)
+                interest_rate = st.number_input("Interest Rate (%)", value=loan["interest_rate"], min_value=0.0, step=0.1)
+                term_months = st.number_input("Term (Months)", value=loan["term_months"], min_value=1, step=1)
+                status = st.selectbox("Status", ["active", "paid"], index=0 if loan["status"] == "active" else 1)
+                submitted = st.form_submit_button("Update Loan")
+                if submitted:
+                    try:
+                        repo.update_if("loan", loan_id, expected, amount=amount, interest_rate=interest_rate,
+                                       term_months=term_months, status=status)
+                        st.success(f"Loan ID {loan_id} updated successfully!")
+                        st.session_state.selected_action = None  # Reset after action
+                        del st.session_state.edit_loan_seen
+                    except ConflictError as e:
+                        st.warning(str(e))
+                    except ValueError as e:
+                        st.error(f"Error: {e}")
         else:
             st.error(f"Loan ID {loan_id} not found.")
-    if st.button("Back"):
-        st.session_state.selected_action = None
-
-elif st.session_state.selected_action == "calculate_loans":
-    st.subheader("Calculate Total Loan Amounts")
-    if st.button("Calculate"):
-        total_amount = sum(loan["amount"] for loan in st.session_state.loans if loan["status"] == "active")
-        total_interest = sum(loan["amount"] * (loan["interest_rate"] / 100) for loan in st.session_state.loans if loan["status"] == "active")
-        st.write(f"Total active loan amount: ${total_amount:.2f}")
-        st.write(f"Total interest on active loans: ${total_interest:.2f}")
+            if st.button("Back"):
+                st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "remove_loan":
+        st.subheader("Remove a Loan")
+        loan_id = st.number_input("Enter Loan ID to remove", min_value=1, step=1)
+        if st.button("Confirm Loan Removal"):
+            try:
+                repo.remove_loan(loan_id)
+                st.success(f"Loan ID {loan_id} removed successfully!")
+                st.session_state.selected_action = None  # Reset after action
+            except ValueError as e:
+                st.error(f"Error: {e}")
         if st.button("Back"):
             st.session_state.selected_action = None
 
-elif st.session_state.selected_action == "amortization":
-    st.subheader("Generate Amortization Schedule")
-    loan_id = st.number_input("Enter Loan ID", min_value=1, step=1)
-    if st.button("Generate Schedule"):
-        loan = next((l for l in st.session_state.loans if l["id"] == loan_id), None)
-        if loan:
-            client = next((c for c in st.session_state.clients if c["id"] == loan["client_id"]), None)
-            client_name = client["name"] if client else "Unknown"
-            principal = loan["amount"]
-            annual_rate = loan["interest_rate"] / 100
-            monthly_rate = annual_rate / 12
-            term_months = loan["term_months"]
-            
-            # Calculate monthly payment
-            monthly_payment = principal * (monthly_rate * (1 + monthly_rate) ** term_months) / ((1 + monthly_rate) ** term_months - 1)
-            
-            # Generate schedule
-            schedule = []
-            balance = principal
-            for month in range(1, term_months + 1):
-                interest = balance * monthly_rate
-                principal_payment = monthly_payment - interest
-                balance -= principal_payment
-                schedule.append({
-                    "Month": month,
-                    "Payment": round(monthly_payment, 2),
-                    "Principal": round(principal_payment, 2),
-                    "Interest": round(interest, 2),
-                    "Balance": round(balance, 2) if balance > 0 else 0
-                })
+    elif st.session_state.selected_action == "calculate_loans":
+        st.subheader("Calculate Total Loan Amounts")
+        if st.button("Calculate"):
+            total_amount, total_interest = repo.totals()
+            st.write(f"Total active loan amount: ${total_amount:.2f}")
+            st.write(f"Total interest on active loans: ${total_interest:.2f}")
+            breakdown = pd.DataFrame.from_dict(repo.aggregates.by_status, orient="index")
+            st.table(breakdown.rename(columns=str.capitalize))
+            if st.button("Back"):
+                st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "amortization":
+        st.subheader("Generate Amortization Schedule")
+        loan_id = st.number_input("Enter Loan ID", min_value=1, step=1)
+        if st.button("Generate Schedule"):
+            st.session_state.schedule_loan_id = loan_id
+        # Keep the schedule on screen while the user pages through it
+        if st.session_state.get("schedule_loan_id") == loan_id:
+            loan = repo.get_loan(loan_id)
+            if loan:
+                client_name = repo.client_name(loan["client_id"])
+                schedule = schedule_cache.schedule_for(loan)
+                monthly_payment = amortization.monthly_payment(loan["amount"], loan["interest_rate"], loan["term_months"])
             
-            st.write(f"Amortization Schedule for Loan ID {loan_id} ({client_name})")
-            st.write(f"Loan Amount: ${principal:.2f}, Interest Rate: {loan['interest_rate']}%, Term: {term_months} months")
-            df = pd.DataFrame(schedule)
-            st.table(df)
-            st.write(f"Total Payment: ${monthly_payment * term_months:.2f}")
+                st.write(f"Amortization Schedule for Loan ID {loan_id} ({client_name})")
+                st.write(f"Loan Amount: ${loan['amount']:.2f}, Interest Rate: {loan['interest_rate']}%, Term: {loan['term_months']} months")
+                df = pd.DataFrame({column.capitalize(): values for column, values in schedule.items()}).round(2)
+                show_page(df, "schedule")
+                st.write(f"Total Payment: ${monthly_payment * loan['term_months']:.2f}")
+                stats = schedule_cache.stats()
+                st.caption(f"Schedule cache: {stats['hits']} hits, {stats['misses']} misses, "
+                           f"{stats['evictions']} evictions, {stats['size']}/{stats['maxsize']} entries")
+            else:
+                st.error(f"Loan ID {loan_id} not found.")
+            if st.button("Back"):
+                st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "cash_flow":
+        st.subheader("Portfolio Cash Flow Projection")
+        by_client = st.checkbox("Break down by client")
+        if repo.aggregates.by_status["active"]["count"]:
+            projection = amortization.portfolio_cash_flow(repo.loan_columns(status="active"), by_client=by_client)
+            df = pd.DataFrame({column.capitalize(): projection[column] for column in amortization.SCHEDULE_COLUMNS}).round(2)
+            st.line_chart(df.set_index("Month")[["Principal", "Interest"]])
+            st.line_chart(df.set_index("Month")["Balance"])
+            st.dataframe(df, hide_index=True)
+            if by_client:
+                breakdown = projection["by_client"]
+                names = [repo.client_name(client_id) for client_id in breakdown["client_id"].tolist()]
+                collected = pd.DataFrame(breakdown["principal"] + breakdown["interest"], columns=names, index=df["Month"])
+                st.write("Expected collections per client (principal + interest)")
+                st.dataframe(collected.round(2))
         else:
-            st.error(f"Loan ID {loan_id} not found.")
+            st.write("No active loans in the system.")
+        if st.button("Back"):
+            st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "rate_shock":
+        st.subheader("Interest Rate Shock Scenarios")
+        low_col, high_col, step_col, month_col = st.columns(4)
+        low = low_col.number_input("From (bp)", value=-300, step=25)
+        high = high_col.number_input("To (bp)", value=300, step=25)
+        step = step_col.number_input("Step (bp)", min_value=1, value=25, step=5)
+        at_month = month_col.number_input("Balance after month", min_value=0, value=12, step=1)
+        if repo.aggregates.by_status["active"]["count"] and low <= high:
+            shocks = np.arange(low, high + 1, step)
+
+            def build_shock_frame():
+                grid = amortization.rate_shock_grid(repo.loan_columns(status="active"), shocks, at_month)
+                return pd.DataFrame({column.replace("_", " ").capitalize(): values for column, values in grid.items()})
+
+            df = cached_frame(f"rate_shock:{low}:{high}:{step}:{at_month}", build_shock_frame)
+            st.line_chart(df.set_index("Shock bp")[["Payment change", "Total interest change", "Balance change"]])
+            st.dataframe(df.round(2), hide_index=True)
+
+            loan_id = st.number_input("Show a single loan (Loan ID, 0 for none)", min_value=0, step=1)
+            loan = repo.get_loan(loan_id) if loan_id else None
+            if loan:
+                grid = amortization.rate_shock_grid({field: [loan[field]] for field in ("id", "amount", "interest_rate", "term_months")},
+                                                    shocks, at_month, per_loan=True)["loans"]
+                st.dataframe(pd.DataFrame({"Shock bp": shocks, **{measure.replace("_", " ").capitalize(): grid[measure][:, 0]
+                                                                   for measure in amortization.SHOCK_MEASURES}}).round(2),
+                             hide_index=True)
+            elif loan_id:
+                st.error(f"Loan ID {loan_id} not found.")
+        elif low > high:
+            st.error("The lowest shock must not exceed the highest.")
+        else:
+            st.write("No active loans in the system.")
+        if st.button("Back"):
+            st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "position":
+        st.subheader("Balance and Payoff at a Month")
+        loan_col, month_col = st.columns(2)
+        loan_id = loan_col.number_input("Loan ID (0 = every active loan)", min_value=0, step=1)
+        month = month_col.number_input("After payments", min_value=0, value=12, step=1)
+        labels = {"payment": "Monthly payment", "balance": "Balance (payoff amount)", "interest_paid": "Interest paid",
+                  "principal_paid": "Principal repaid", "remaining_interest": "Interest saved by payoff"}
+        if loan_id:
+            loan = repo.get_loan(loan_id)
+            if loan:
+                position = amortization.loan_position(loan, month)
+                st.caption(f"Loan ID {loan_id} ({repo.client_name(loan['client_id'])}) after "
+                           f"{position['month']} of {loan['term_months']} payments")
+                for column, measure in zip(st.columns(len(labels)), amortization.POSITION_MEASURES):
+                    column.metric(labels[measure], f"${position[measure]:,.2f}")
+            else:
+                st.error(f"Loan ID {loan_id} not found.")
+        elif repo.aggregates.by_status["active"]["count"]:
+            def build_position_frame():
+                position = amortization.portfolio_position(repo.loan_columns(status="active"), month)
+                position.pop("totals")
+                return pd.DataFrame(position).rename(columns=labels).round(2)
+
+            df = cached_frame(f"position:{month}", build_position_frame)
+            for column, label in zip(st.columns(len(labels)), labels.values()):
+                column.metric(label, f"${df[label].sum():,.2f}")
+            show_page(df, "position")
+        else:
+            st.write("No active loans in the system.")
+        if st.button("Back"):
+            st.session_state.selected_action = None
+
+    elif st.session_state.selected_action == "exposure":
+        st.subheader("Client Exposure and Concentration")
+        count_col, by_col = st.columns(2)
+        count = count_col.number_input("Top clients", min_value=1, value=10, step=1)
+        by = by_col.selectbox("Rank by", MONEY_MEASURES, format_func=lambda measure: measure.replace("_", " ").capitalize())
+        labels = {"client_id": "Client ID", "loans": "Loans", "active_loans": "Active loans", "principal": "Active principal",
+                  "avg_rate": "Avg rate (%)", "interest": "Scheduled interest", "scheduled_repayment": "Scheduled repayment",
+                  "share": "Share (%)", "cumulative_share": "Cumulative (%)"}
+        book, lock = exposure_book()
+        with lock():
+            report = book.concentration(count, by)
+        if report["clients"]:
+            total_col, share_col, hhi_col = st.columns(3)
+            total_col.metric(f"Portfolio {by.replace('_', ' ')}", f"${report['total']:,.2f}")
+            share_col.metric(f"Top {len(report['top'])} share", f"{report['top_share']:.2%}")
+            hhi_col.metric("Herfindahl index", f"{report['hhi']:.4f}",
+                           help="Sum of squared client shares: near 0 is diversified, 1 is a single client")
+            df = pd.DataFrame(report["top"])[list(labels)]
+            df[["share", "cumulative_share"]] *= 100
+            df.insert(1, "Client", [repo.client_name(client_id) for client_id in df["client_id"].tolist()])
+            st.dataframe(df.rename(columns=labels).round(2), hide_index=True)
+
+            client_id = st.number_input("Client ID for details (0 = none)", min_value=0, step=1)
+            client = repo.get_client(client_id) if client_id else None
+            if client:
+                with lock():
+                    row = book.client(client_id)
+                st.caption(f"Exposure of {client['name']} (ID {client_id}): {row['loans']} loans, "
+                           f"{row['active_loans']} active")
+                for column, measure in zip(st.columns(4), ("principal", "avg_rate", "interest", "scheduled_repayment")):
+                    value = f"{row[measure]:.2f}%" if measure == "avg_rate" else f"${row[measure]:,.2f}"
+                    column.metric(labels[measure].replace(" (%)", ""), value)
+                loans = pd.DataFrame(repo.loans_for_client(client_id), columns=["id", "amount", "interest_rate",
+                                                                                "term_months", "status"])
+                st.dataframe(loans.rename(columns={"id": "Loan ID", "amount": "Amount", "interest_rate": "Interest rate",
+                                                   "term_months": "Term (months)", "status": "Status"}), hide_index=True)
+            elif client_id:
+                st.error(f"Client ID {client_id} not found.")
+        else:
+            st.write("No loans in the system.")
         if st.button("Back"):
             st.session_state.selected_action = None
 
 if st.session_state.selected_action is None:
     st.write("Select an action from the sidebar to begin.")
+st.session_state.seen_version = repo.version  # This run shows everything up to here
+
+if st.session_state.get("show_metrics"):
+    with st.expander("Performance metrics", expanded=True):
+        rows = metrics.summary()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).round(3), hide_index=True)
+        else:
+            st.write("No operations recorded yet.")
+        mode_col, profile_col = st.columns(2)
+        mode_col.selectbox("Profile mode", PROFILE_MODES, key="profile_mode",
+                           help="cpu: cProfile by cumulative time; memory: tracemalloc allocations by line")
+        profile_col.checkbox("Profile the next action", key="profile_next")
+        if "last_profile" in st.session_state:
+            profiled, report = st.session_state.last_profile
+            st.text(f"Profile of app.{profiled}:\n{report}")
+        text = metrics.prometheus()
+        st.download_button("Download Prometheus metrics", text, file_name="metrics.prom", mime="text/plain")
+        if st.button("Reset metrics"):
+            metrics.reset()
 
 if __name__ == "__main__":
     pass  # Streamlit runs via `streamlit run app.py`
\ No newline at end of file
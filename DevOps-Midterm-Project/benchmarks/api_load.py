@@ -0,0 +1,83 @@
+"""
+Load generator for the Bank Loan Management System JSON API.
+Drives keep-alive connections against a running api.py and reports req/s and latency.
+
+Usage:
+    python ../Pythoncode/api.py --port 8000 &
+    python api_load.py --port 8000 --connections 32 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+READ_PATHS = ("/totals", "/loans?limit=20", "/clients?limit=20")
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one keep-alive request and return (status, decoded body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: load\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = next(int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length:"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def worker(host, port, count, write_share, latencies, errors, seed):
+    """Issue count requests over one connection, mixing reads, loan creation and lookups."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    status, client = await request(reader, writer, "POST", "/clients", {
+        "name": f"Load {seed}", "email": f"load{seed}@example.com", "phone": f"050-{seed:07d}"})
+    loan_ids = []
+    for _ in range(count):
+        start = time.perf_counter()
+        if rng.random() < write_share:
+            status, body = await request(reader, writer, "POST", "/loans", {
+                "client_id": client["id"], "amount": round(rng.uniform(1_000, 100_000), 2),
+                "interest_rate": round(rng.uniform(0, 12), 2), "term_months": rng.choice((12, 36, 60, 120))})
+            if status == 201:
+                loan_ids.append(body["id"])
+        elif loan_ids and rng.random() < 0.5:
+            status, _ = await request(reader, writer, "GET", f"/loans/{rng.choice(loan_ids)}/amortization")
+        else:
+            status, _ = await request(reader, writer, "GET", rng.choice(READ_PATHS))
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append(status)
+    writer.close()
+
+
+async def run(args):
+    latencies, errors = [], []
+    per_connection = args.requests // args.connections
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, args.port, per_connection, args.write_share, latencies, errors, i)
+                           for i in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1e3, [50, 95, 99])
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"Latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}")
+    print(f"Errors: {len(errors)}")
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the loan JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000, help="total requests across all connections")
+    parser.add_argument("--write-share", type=float, default=0.2, help="fraction of requests that create loans")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Benchmark harness for the Bank Loan Management System.
+Times the core operations on seeded synthetic portfolios and compares runs.
+
+Usage:
+    python bench.py --sizes 1e3,1e4,1e5 -o results.json
+    python bench.py --sizes 1e5 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Pythoncode')))
+import numpy as np
+
+import amortization
+from exposure import ExposureBook
+from repository import SORT_KEYS, open_repository
+from synthetic import populate
+
+SAMPLES = 2000
+
+
+def percentiles(latencies):
+    """Return p50/p95/p99 latency in microseconds."""
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1e6, [50, 95, 99])
+    return {"p50_us": round(float(p50), 3), "p95_us": round(float(p95), 3), "p99_us": round(float(p99), 3)}
+
+
+def measure(fn, calls, records_per_call=1):
+    """Time fn over calls invocations, then rerun once under tracemalloc for peak memory."""
+    latencies = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn(0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    total = sum(latencies)
+    return {
+        "calls": calls,
+        "records": calls * records_per_call,
+        "seconds": round(total, 6),
+        "throughput_per_s": round(calls * records_per_call / total, 1) if total else None,
+        **percentiles(latencies),
+        "peak_mem_bytes": peak,
+    }
+
+
+def bench_size(n_loans, backend, seed):
+    """Run every benchmark against a fresh portfolio of n_loans loans."""
+    db = ":memory:" if backend == "sqlite" else None
+    results = {}
+    start = time.perf_counter()
+    repo = populate(open_repository(db), n_loans, seed=seed)
+    results["load"] = {"seconds": round(time.perf_counter() - start, 6),
+                       "throughput_per_s": round(n_loans / (time.perf_counter() - start), 1)}
+
+    rng = np.random.default_rng(seed)
+    loan_ids = rng.integers(1, n_loans + 1, SAMPLES).tolist()
+    results["lookup"] = measure(lambda i: repo.get_loan(loan_ids[i]), SAMPLES)
+
+    def add_remove_cascade(i):
+        client = repo.add_client("Bench Client", "bench@example.com", "050-0000000")
+        for _ in range(5):
+            repo.add_loan(client["id"], 10_000.0, 5.0, 36, "active")
+        repo.remove_client(client["id"])
+    results["add_remove_cascade"] = measure(add_remove_cascade, min(SAMPLES, 500), records_per_call=6)
+
+    for key in SORT_KEYS:
+        results[f"sort_{key}"] = measure(lambda i: list(repo.sorted_loans(key)), 3, records_per_call=n_loans)
+    results["top10_active"] = measure(lambda i: repo.top_loans("amount", 10, "active"), SAMPLES)
+    results["rate_range"] = measure(lambda i: repo.loans_between("interest_rate", 5.0, 5.05), 200)
+    results["totals"] = measure(lambda i: repo.totals(), SAMPLES)
+
+    loans = [repo.get_loan(loan_id) for loan_id in loan_ids[:200]]
+    results["amortization_single"] = measure(lambda i: amortization.loan_schedule(loans[i]), len(loans))
+    results["balance_at_month_single"] = measure(lambda i: amortization.loan_position(loans[i], 12), len(loans))
+
+    active = repo.loan_columns(status="active")
+    rows = int(active["term_months"].sum())
+
+    def portfolio_amortization(i):
+        for _ in amortization.iter_batch_schedules(active["amount"], active["interest_rate"], active["term_months"]):
+            pass
+    results["amortization_portfolio"] = measure(portfolio_amortization, 1, records_per_call=rows)
+    results["cash_flow_projection"] = measure(lambda i: amortization.portfolio_cash_flow(active), 1,
+                                              records_per_call=len(active["amount"]))
+    results["balance_at_month_portfolio"] = measure(lambda i: amortization.portfolio_position(active, 12), 3,
+                                                    records_per_call=len(active["amount"]))
+    results["rate_shock_grid"] = measure(lambda i: amortization.rate_shock_grid(active), 1,
+                                         records_per_call=len(active["amount"]) * len(amortization.DEFAULT_SHOCKS_BP))
+    results["exposure_build"] = measure(lambda i: ExposureBook.from_columns(repo.loan_columns()), 3,
+                                        records_per_call=n_loans)
+    book = ExposureBook.from_columns(repo.loan_columns())
+    results["exposure_top10"] = measure(lambda i: book.concentration(10), 20)
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Print per-operation throughput ratios and return the regressions beyond threshold."""
+    regressions = []
+    for size, ops in current["results"].items():
+        for op, stats in ops.items():
+            base = baseline.get("results", {}).get(size, {}).get(op)
+            if not base or not base.get("throughput_per_s") or not stats.get("throughput_per_s"):
+                continue
+            ratio = stats["throughput_per_s"] / base["throughput_per_s"]
+            flag = ""
+            if ratio < 1 - threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, op, ratio))
+            print(f"{size:>10} {op:<24} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the loan core on synthetic portfolios")
+    parser.add_argument("--sizes", default="1e3,1e4,1e5", help="comma-separated loan counts (1e3 to 1e7)")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare throughput against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    current = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for size in (int(float(s)) for s in args.sizes.split(",")):
+        print(f"Benchmarking {size} loans ({args.backend})...", file=sys.stderr)
+        current["results"][str(size)] = bench_size(size, args.backend, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+"""
+Test configuration for the Bank Loan Management System.
+Contains the import path setup shared by every test module.
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Pythoncode')))
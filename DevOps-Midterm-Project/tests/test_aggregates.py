@@ -0,0 +1,91 @@
+"""
+Aggregates tests for the Bank Loan Management System.
+Contains checks that running portfolio totals match a from-scratch recomputation.
+"""
+import random
+
+import pytest
+
+from aggregates import PortfolioAggregates, breakdown_from_columns
+from loan_table import LOAN_STATUSES
+from repository import LoanRepository
+from sqlite_store import SQLiteRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        yield LoanRepository()
+    else:
+        repo = SQLiteRepository(str(tmp_path / "loans.db"))
+        yield repo
+        repo.close()
+
+
+def _assert_matches_scratch(repo):
+    fresh = breakdown_from_columns(repo.loan_columns())
+    for status in LOAN_STATUSES:
+        running = repo.aggregates.by_status[status]
+        assert running["count"] == fresh[status]["count"]
+        assert running["principal"] == pytest.approx(fresh[status]["principal"], rel=1e-9, abs=1e-6)
+        assert running["interest"] == pytest.approx(fresh[status]["interest"], rel=1e-9, abs=1e-6)
+    assert repo.totals() == (repo.aggregates.by_status["active"]["principal"],
+                             repo.aggregates.by_status["active"]["interest"])
+
+
+def test_running_totals_follow_every_change(repo):
+    rng = random.Random(7)
+    for i in range(20):
+        repo.add_client(f"Client {i}", f"c{i}@example.com", f"050-{i:07d}")
+    for step in range(600):
+        loans = repo.loan_columns()["id"].tolist()
+        clients = [client["id"] for client in repo.list_clients()]
+        kind = rng.random()
+        if kind < 0.4 or not loans:
+            repo.add_loan(rng.choice(clients), round(rng.uniform(100, 90_000), 2), round(rng.uniform(0, 15), 2),
+                          rng.choice([12, 36, 60]), rng.choice(LOAN_STATUSES))
+        elif kind < 0.45:
+            repo.add_loans([(rng.choice(clients), 1000.0 * (j + 1), 4.5, 24, rng.choice(LOAN_STATUSES))
+                            for j in range(3)])
+        elif kind < 0.8:
+            repo.update_loan(rng.choice(loans), **rng.choice([{"amount": round(rng.uniform(1, 5_000), 2)},
+                                                             {"interest_rate": round(rng.uniform(0, 30), 2)},
+                                                             {"status": rng.choice(LOAN_STATUSES)}]))
+        elif kind < 0.97:
+            repo.remove_loan(rng.choice(loans))
+        else:
+            repo.remove_client(rng.choice(clients))
+            repo.add_client(f"Again {step}", f"again{step}@example.com", f"052-{step:07d}")
+        if step % 50 == 0:
+            _assert_matches_scratch(repo)
+    _assert_matches_scratch(repo)
+    assert repo.aggregates.verify() == []
+
+
+def test_rejected_changes_leave_totals_alone(repo):
+    repo.add_client("Dana", "dana@example.com", "050-1111111")
+    repo.add_loan(1, 1000.0, 5.0, 12, "active")
+    before = repo.aggregates.summary()
+    for bad in (lambda: repo.add_loan(1, -1.0, 5.0, 12, "active"),
+                lambda: repo.update_loan(1, status="late"),
+                lambda: repo.remove_loan(99),
+                lambda: repo.add_loans([(1, 10.0, 1.0, 12, "active"), (2, 1.0, 1.0, 1, "paid")])):
+        with pytest.raises(ValueError):
+            bad()
+    assert repo.aggregates.summary() == before
+    _assert_matches_scratch(repo)
+
+
+def test_verify_reports_and_repairs_drift(caplog):
+    loans = {"amount": [1000.0, 500.0], "interest_rate": [10.0, 0.0], "status": ["active", "paid"]}
+    aggregates = PortfolioAggregates(lambda: breakdown_from_columns(loans), verify_every=3)
+    assert aggregates.totals() == (1000.0, 100.0)
+    aggregates.by_status["active"]["principal"] += 0.5
+    aggregates.add({"amount": 1.0, "interest_rate": 0.0, "status": "paid"})
+    aggregates.remove({"amount": 1.0, "interest_rate": 0.0, "status": "paid"})
+    assert aggregates.totals()[0] == 1000.5
+    aggregates.replace({"amount": 500.0, "interest_rate": 0.0, "status": "paid"},
+                       {"amount": 500.0, "interest_rate": 0.0, "status": "paid"})
+    assert aggregates.totals() == (1000.0, 100.0)
+    assert "Aggregate drift in active principal" in caplog.text
+    assert aggregates.verify() == []
@@ -0,0 +1,169 @@
+"""
+Amortization tests for the Bank Loan Management System.
+Contains checks of the vectorized annuity engine against a month-by-month scalar reference.
+"""
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from amortization import (POSITION_MEASURES, batch_schedules, iter_batch_schedules, loan_position, loan_schedule,
+                          monthly_payment, portfolio_cash_flow, portfolio_position, rate_shock_grid)
+
+# (amount, annual rate in percent, term in months): zero rate, one-month term, tiny rate, long and odd terms
+LOANS = [(10_000.0, 5.0, 12), (2_500.0, 0.0, 24), (800.0, 7.5, 1), (50_000.0, 1e-7, 60),
+         (250_000.0, 6.25, 360), (0.0, 4.0, 6), (1_234.56, 19.99, 37)]
+
+
+def reference_schedule(amount, annual_rate, term):
+    """Plain loop over the months, as the original CLI computed it.
+
+    The payment formula is evaluated in exact fractions: in floats it loses
+    most of its digits for tiny rates.
+    """
+    rate = annual_rate / 1200
+    exact = Fraction(annual_rate) / 1200
+    growth = (1 + exact) ** term
+    payment = amount / term if rate == 0 else float(Fraction(amount) * exact * growth / (growth - 1))
+    rows, balance = [], amount
+    for month in range(1, term + 1):
+        interest = balance * rate
+        principal = payment - interest
+        balance -= principal
+        rows.append((month, payment, principal, interest, max(balance, 0.0) if month < term else 0.0))
+    return rows
+
+
+def _columns(loans, ids=None):
+    amounts, rates, terms = zip(*loans) if loans else ((), (), ())
+    return {"id": np.arange(1, len(loans) + 1) if ids is None else np.asarray(ids),
+            "client_id": np.array([1 + i % 3 for i in range(len(loans))], dtype=np.int64),
+            "amount": np.array(amounts, dtype=np.float64), "interest_rate": np.array(rates, dtype=np.float64),
+            "term_months": np.array(terms, dtype=np.int64)}
+
+
+def _close(actual, expected, amount):
+    assert np.allclose(actual, expected, rtol=1e-9, atol=1e-7 * max(amount, 1.0))
+
+
+@pytest.mark.parametrize("loan", LOANS)
+def test_monthly_payment_matches_reference(loan):
+    assert monthly_payment(*loan) == pytest.approx(reference_schedule(*loan)[0][1], rel=1e-9, abs=1e-12)
+
+
+def test_monthly_payment_is_vectorized():
+    payments = monthly_payment(*map(list, zip(*LOANS)))
+    assert payments.shape == (len(LOANS),)
+    assert payments.tolist() == pytest.approx([reference_schedule(*loan)[0][1] for loan in LOANS], rel=1e-9)
+
+
+@pytest.mark.parametrize("loan", LOANS)
+def test_loan_schedule_matches_reference(loan):
+    schedule = loan_schedule(dict(zip(("amount", "interest_rate", "term_months"), loan)))
+    expected = np.array(reference_schedule(*loan))
+    assert schedule["month"].tolist() == expected[:, 0].tolist()
+    for i, column in enumerate(("payment", "principal", "interest", "balance"), 1):
+        _close(schedule[column], expected[:, i], loan[0])
+
+
+def test_batch_schedules_keep_input_order():
+    schedules = batch_schedules(*map(list, zip(*LOANS)))
+    expected = [(i, *row) for i, loan in enumerate(LOANS) for row in reference_schedule(*loan)]
+    expected = np.array(expected)
+    assert schedules["loan_index"].tolist() == expected[:, 0].tolist()
+    assert schedules["month"].tolist() == expected[:, 1].tolist()
+    for i, column in enumerate(("payment", "principal", "interest", "balance"), 2):
+        _close(schedules[column], expected[:, i], 250_000.0)
+    chunked = list(iter_batch_schedules(*map(list, zip(*LOANS)), chunk_loans=3))
+    assert len(chunked) == 3
+    for column, values in schedules.items():
+        assert np.concatenate([chunk[column] for chunk in chunked]).tolist() == values.tolist()
+
+
+def test_empty_and_invalid_input():
+    schedules = batch_schedules([], [], [])
+    assert all(len(values) == 0 for values in schedules.values())
+    assert list(iter_batch_schedules([], [], [])) == []
+    with pytest.raises(ValueError):
+        batch_schedules([1000.0], [5.0], [0])
+    with pytest.raises(ValueError):
+        monthly_payment(-1.0, 5.0, 12)
+
+
+def test_portfolio_cash_flow_sums_the_schedules():
+    loans = _columns(LOANS)
+    flow = portfolio_cash_flow(loans, by_client=True)
+    horizon = max(term for _, _, term in LOANS)
+    expected = np.zeros((horizon, 4))
+    per_client = np.zeros((horizon, 3, 3))
+    for i, loan in enumerate(LOANS):
+        for month, payment, principal, interest, balance in reference_schedule(*loan):
+            expected[month - 1] += (payment, principal, interest, balance)
+            per_client[month - 1, :, i % 3] += (principal, interest, balance)
+    assert flow["month"].tolist() == list(range(1, horizon + 1))
+    for i, column in enumerate(("payment", "principal", "interest", "balance")):
+        _close(flow[column], expected[:, i], 250_000.0)
+    assert flow["balance"][-1] == pytest.approx(0.0, abs=1e-6)
+    assert flow["by_client"]["client_id"].tolist() == [1, 2, 3]
+    for i, column in enumerate(("principal", "interest", "balance")):
+        _close(flow["by_client"][column], per_client[:, i], 250_000.0)
+    empty = portfolio_cash_flow(_columns([]))
+    assert all(len(empty[column]) == 0 for column in ("month", "payment", "balance"))
+
+
+@pytest.mark.parametrize("loan", LOANS)
+@pytest.mark.parametrize("month", [0, 1, 7, 12, 400])
+def test_loan_position_matches_reference(loan, month):
+    rows = reference_schedule(*loan)
+    paid = min(month, loan[2])
+    position = loan_position(dict(zip(("amount", "interest_rate", "term_months"), loan)), month)
+    expected = {
+        "month": paid,
+        "payment": rows[0][1],
+        "balance": rows[paid - 1][4] if paid else loan[0],
+        "interest_paid": sum(row[3] for row in rows[:paid]),
+        "principal_paid": sum(row[2] for row in rows[:paid]),
+        "remaining_interest": sum(row[3] for row in rows[paid:]),
+    }
+    for measure, value in expected.items():
+        assert position[measure] == pytest.approx(value, rel=1e-9, abs=1e-7 * max(loan[0], 1.0))
+
+
+def test_portfolio_position_matches_loan_position():
+    loans = _columns(LOANS, ids=[10, 20, 30, 40, 50, 60, 70])
+    position = portfolio_position(loans, 12)
+    assert position["id"].tolist() == [10, 20, 30, 40, 50, 60, 70]
+    singles = [loan_position(dict(zip(("amount", "interest_rate", "term_months"), loan)), 12) for loan in LOANS]
+    for measure in POSITION_MEASURES:
+        _close(position[measure], [single[measure] for single in singles], 250_000.0)
+        assert position["totals"][measure] == pytest.approx(sum(single[measure] for single in singles), rel=1e-9)
+    empty = portfolio_position(_columns([]), 12)
+    assert empty["totals"] == {measure: 0.0 for measure in POSITION_MEASURES}
+    with pytest.raises(ValueError):
+        portfolio_position(loans, -1)
+
+
+def test_rate_shock_grid_matches_repriced_loans():
+    loans = _columns(LOANS)
+    shocks = [-300, -25, 0, 150]
+    grid = rate_shock_grid(loans, shocks, at_month=12, per_loan=True, chunk_loans=2)
+
+    def repriced(shift):
+        rows = [reference_schedule(amount, max(rate + shift / 100, 0.0), term) for amount, rate, term in LOANS]
+        return np.array([(r[0][1], r[0][1] * len(r) - amount, r[min(12, len(r)) - 1][4])
+                         for r, (amount, _, _) in zip(rows, LOANS)])
+
+    base = repriced(0).sum(axis=0)
+    assert grid["shock_bp"].tolist() == shocks
+    for row, shift in enumerate(shocks):
+        per_loan = repriced(shift)
+        for i, measure in enumerate(("payment", "total_interest", "balance")):
+            _close(grid["loans"][measure][row], per_loan[:, i], 250_000.0)
+            assert grid[measure][row] == pytest.approx(per_loan[:, i].sum(), rel=1e-9)
+            assert grid[f"{measure}_change"][row] == pytest.approx(per_loan[:, i].sum() - base[i], abs=1e-4)
+    assert grid["payment_change"][2] == 0.0
+    single = rate_shock_grid(loans, shocks, at_month=12)
+    for measure in ("payment", "total_interest", "balance"):
+        assert single[measure] == pytest.approx(grid[measure], rel=1e-12)
+    empty = rate_shock_grid(_columns([]), shocks)
+    assert empty["payment"].tolist() == [0.0] * len(shocks)
@@ -0,0 +1,92 @@
+"""
+JSON API tests for the Bank Loan Management System.
+Contains regression tests that bad requests get an error status instead of crashing the server.
+"""
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from api import LoanAPI
+from repository import LoanRepository
+from service import LoanService
+from sqlite_store import SQLiteRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def api(request, tmp_path):
+    repo = LoanRepository() if request.param == "memory" else SQLiteRepository(str(tmp_path / "loans.db"))
+    repo.add_client("Dana", "dana@example.com", "050-1111111")
+    repo.add_loan(1, 1000.0, 5.0, 12, "active")
+    yield LoanAPI(LoanService(repo))
+    if request.param == "sqlite":
+        repo.close()
+
+
+def _loan_body(**changes):
+    loan = {"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "active"}
+    return json.dumps({**loan, **changes}).encode()
+
+
+@pytest.mark.parametrize("target", ["/loans?status=foo", "/loans?status=foo&limit=5", "/loans?offset=x"])
+def test_bad_loan_filters_are_rejected(api, target):
+    status, payload = api.dispatch("GET", target, b"")
+    assert status == HTTPStatus.BAD_REQUEST
+    assert payload["error"]
+
+
+@pytest.mark.parametrize("changes", [{"term_months": 1e400}, {"term_months": "12.5"}, {"amount": "1e400"},
+                                     {"status": "late"}, {"client_id": None}])
+def test_bad_loan_bodies_are_rejected(api, changes):
+    status, payload = api.dispatch("POST", "/loans", _loan_body(**changes))
+    assert status == HTTPStatus.BAD_REQUEST
+    assert payload["error"]
+    assert api.dispatch("GET", "/loans", b"")[1]["total"] == 1
+
+
+def test_patch_with_overflowing_term_is_rejected(api):
+    status, _ = api.dispatch("PATCH", "/loans/1", json.dumps({"term_months": 1e400}).encode())
+    assert status == HTTPStatus.BAD_REQUEST
+    assert api.dispatch("GET", "/loans/1", b"")[1]["term_months"] == 12
+
+
+def test_good_requests_still_work(api):
+    assert api.dispatch("POST", "/loans", _loan_body(status="paid"))[0] == HTTPStatus.CREATED
+    status, payload = api.dispatch("GET", "/loans?status=paid", b"")
+    assert status == HTTPStatus.OK
+    assert [loan["id"] for loan in payload["items"]] == [2]
+
+
+async def _exchange(api, requests):
+    """Send raw requests to a live server and return everything it answers before closing."""
+    server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+    async with server:
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(requests)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    return response
+
+
+def test_live_server_answers_bad_requests(api):
+    requests = (b"GET /loans?status=foo HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"POST /loans HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s"
+                b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+    body = _loan_body(term_months=1e400)
+    response = asyncio.run(_exchange(api, requests % (len(body), body)))
+    assert response.count(b"HTTP/1.1 400 Bad Request") == 2
+    assert response.endswith(b'{"status": "ok"}')
+
+
+def test_unexpected_errors_return_500(api, caplog):
+    def broken():
+        raise RuntimeError("boom")
+
+    api.service.totals = broken
+    response = asyncio.run(_exchange(api, b"GET /totals HTTP/1.1\r\nHost: x\r\n\r\n"))
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error")
+    assert b"Connection: close" in response
+    assert "Unhandled error" in caplog.text
@@ -0,0 +1,125 @@
+"""
+Backend parity tests for the Bank Loan Management System.
+Contains a randomized check that the in-memory and SQLite stores behave identically.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from loan_table import LOAN_STATUSES
+from repository import SORT_KEYS, LoanRepository
+from sqlite_store import SQLiteRepository
+
+OPERATIONS = 3000
+# IDs no store can hold: below 1, or too large for an SQLite INTEGER
+BAD_IDS = (0, -1, 2**63, 2**64)
+
+
+def _plain(value):
+    """Turn records, record lists and columns into plain comparable values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if hasattr(value, "keys"):
+        return dict(value)
+    if isinstance(value, (list, tuple)) or hasattr(value, "__next__"):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _outcome(call, *args, **kwargs):
+    try:
+        return "ok", _plain(call(*args, **kwargs))
+    except ValueError as e:
+        return "error", type(e).__name__
+
+
+def _random_loan(rng):
+    amount = rng.choice([rng.uniform(100, 50_000), rng.uniform(100, 50_000), -1.0])
+    return (round(amount, 2), round(rng.uniform(0, 20), 2), rng.choice([6, 12, 24, 36, 60, 0]),
+            rng.choice(LOAN_STATUSES + ("late",)))
+
+
+def _random_id(rng, high):
+    return rng.randint(1, high) if rng.random() < 0.97 else rng.choice(BAD_IDS)
+
+
+def _random_step(rng):
+    """Return (method name, args, kwargs) of one random write or query."""
+    client_id = _random_id(rng, 60)
+    loan_id = _random_id(rng, 500)
+    name = rng.choice(["Dana", "Eli", "Noa", "Omer", "Yael", ""]) + f" {rng.randrange(50)}"
+    email = f"user{rng.randrange(120)}@example.com"
+    phone = f"050-{rng.randrange(120):07d}"
+    key = rng.choice(SORT_KEYS)
+    status = rng.choice([None, *LOAN_STATUSES, "foo"])
+    kind = rng.random()
+    if kind < 0.12:
+        return "add_client", (name, email, phone), {}
+    if kind < 0.16:
+        return "update_client", (client_id,), rng.choice([{"name": name}, {"email": email}, {"phone": phone}])
+    if kind < 0.19:
+        return "remove_client", (client_id,), {}
+    if kind < 0.45:
+        explicit = {"loan_id": loan_id} if rng.random() < 0.2 else {}
+        return "add_loan", (client_id, *_random_loan(rng)), explicit
+    if kind < 0.48:
+        return "add_loans", ([(rng.randint(1, 60), *_random_loan(rng)[:3], "active") for _ in range(3)],), {}
+    if kind < 0.58:
+        amount, rate, term, new_status = _random_loan(rng)
+        changes = rng.choice([{"amount": amount}, {"interest_rate": rate}, {"term_months": term},
+                              {"status": new_status}, {"client_id": client_id}])
+        return "update_loan", (loan_id,), changes
+    if kind < 0.65:
+        return "remove_loan", (loan_id,), {}
+    queries = [
+        ("get_client", (client_id,), {}),
+        ("get_loan", (loan_id,), {}),
+        ("list_clients", (), {"offset": rng.randrange(40), "limit": rng.randrange(1, 20)}),
+        ("search_clients", (name[:rng.randrange(4)],), {"limit": 10}),
+        ("client_count", (), {}),
+        ("loan_count", (status, rng.choice([None, client_id])), {}),
+        ("loan_columns", (status, None, rng.choice([None, 5_000.0]), None),
+         {"offset": rng.randrange(50), "limit": rng.choice([None, 25])}),
+        ("loans_for_client", (client_id,), {}),
+        ("sorted_loans", (key,), {}),
+        ("top_loans", (key,), {"k": rng.randint(1, 15), "status": status, "largest": rng.random() < 0.5}),
+        ("loans_between", (key,), {"low": rng.choice([None, 12, 1_000.0]), "high": rng.choice([None, 36, 20_000.0]),
+                                   "status": status}),
+        ("client_names", (), {}),
+    ]
+    return rng.choice(queries)
+
+
+@pytest.fixture
+def backends(tmp_path):
+    sqlite_repo = SQLiteRepository(str(tmp_path / "loans.db"))
+    yield LoanRepository(), sqlite_repo
+    sqlite_repo.close()
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_random_operations_match(backends, seed):
+    memory, sqlite = backends
+    events = {id(memory): [], id(sqlite): []}
+    for repo in backends:
+        repo.subscribe(lambda event, old, new, log=events[id(repo)]: log.append((event, _plain(old), _plain(new))))
+    rng = random.Random(seed)
+    for step in range(OPERATIONS):
+        method, args, kwargs = _random_step(rng)
+        in_batch = rng.random() < 0.1
+        outcomes = []
+        for repo in backends:
+            if in_batch:
+                with repo.batch():
+                    outcomes.append(_outcome(getattr(repo, method), *args, **kwargs))
+            else:
+                outcomes.append(_outcome(getattr(repo, method), *args, **kwargs))
+        assert outcomes[0] == outcomes[1], f"step {step}: {method}{args} {kwargs}"
+        assert memory.totals() == pytest.approx(sqlite.totals()), f"step {step}: totals after {method}"
+    assert events[id(memory)] == events[id(sqlite)]
+    assert memory.client_count() > 10 and memory.loan_count() > 20
+    assert _plain(memory.loan_columns()) == _plain(sqlite.loan_columns())
+    assert _plain(memory.list_clients()) == _plain(sqlite.list_clients())
@@ -0,0 +1,78 @@
+"""
+Bulk import tests for the Bank Loan Management System.
+Contains tests that bad rows are rejected without stopping or corrupting an import.
+"""
+import io
+
+import pytest
+
+from bulk import import_records, read_records
+from repository import LoanRepository
+from sqlite_store import SQLiteRepository
+
+CLIENTS_CSV = """id,name,email,phone
+1,Dana Levi,dana@example.com,050-1111111
+2,,nobody@example.com,050-2222222
+x,Bad Id,badid@example.com,050-3333333
+-4,Negative,negative@example.com,050-4444444
+5,Eli Cohen,eli@example.com,050-5555555
+6,Copy,dana@example.com,050-6666666
+"""
+
+LOANS_JSONL = """{"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "active"}
+{"client_id": 1, "amount": -5, "interest_rate": 5, "term_months": 12, "status": "active"}
+{"client_id": 99, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "active"}
+{"client_id": 1, "amount": 1e400, "interest_rate": 5, "term_months": 12, "status": "active"}
+{"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 1e400, "status": "active"}
+{"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "late"}
+{"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "paid", "id": 100000000000}
+{"client_id": 1, "amount": 1000, "interest_rate": 5, "term_months": 12, "status": "paid", "id": 2.5}
+{"amount": 1000, "interest_rate": 5, "term_months": 12, "status": "active"}
+[1, 1000, 5, 12, "active"]
+{"client_id": 1, "amount": 1000,
+{"client_id": 5, "amount": 2500.5, "interest_rate": 0, "term_months": 24, "status": "paid", "id": 40}
+"""
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        yield LoanRepository()
+    else:
+        repo = SQLiteRepository(str(tmp_path / "loans.db"))
+        yield repo
+        repo.close()
+
+
+def _import(repo, text, fmt, kind):
+    rejected = []
+    summary = import_records(repo, read_records(io.StringIO(text), fmt), kind, chunk_size=4,
+                             on_reject=lambda line, record, error: rejected.append((line, str(error))))
+    return summary, rejected
+
+
+def test_bad_client_rows_are_rejected(repo):
+    summary, rejected = _import(repo, CLIENTS_CSV, "csv", "clients")
+    assert summary == {"accepted": 2, "rejected": 4}
+    assert [line for line, _ in rejected] == [3, 4, 5, 7]
+    assert "ID" in rejected[1][1] and "ID" in rejected[2][1]
+    assert [client["id"] for client in repo.list_clients()] == [1, 5]
+
+
+def test_bad_loan_rows_are_rejected(repo):
+    _import(repo, CLIENTS_CSV, "csv", "clients")
+    summary, rejected = _import(repo, LOANS_JSONL, "jsonl", "loans")
+    assert summary == {"accepted": 2, "rejected": 10}
+    assert [line for line, _ in rejected] == list(range(2, 12))
+    assert all(message for _, message in rejected)
+    loans = [dict(loan) for loan in repo.iter_loans()]
+    assert [(loan["id"], loan["client_id"], loan["amount"]) for loan in loans] == [(1, 1, 1000.0), (40, 5, 2500.5)]
+    assert repo.loan_count() == 2
+    assert repo.totals()[0] == pytest.approx(1000.0)
+
+
+def test_store_stays_usable_after_rejections(repo):
+    _import(repo, CLIENTS_CSV, "csv", "clients")
+    _import(repo, LOANS_JSONL, "jsonl", "loans")
+    assert repo.add_loan(1, 500.0, 3.0, 6, "active")["id"] == 41
+    assert repo.add_client("Noa", "noa@example.com", "050-7777777")["id"] == 6
@@ -0,0 +1,120 @@
+"""
+Client index tests for the Bank Loan Management System.
+Contains tests of the chunked prefix index and client uniqueness checks.
+"""
+import random
+
+import pytest
+
+from client_index import ClientIndex, PrefixIndex
+
+WORDS = ["al", "alma", "alon", "b", "bar", "barak", "dana", "dan", "eli", "élise", "ELI", "zoe", ""]
+
+
+def _small_index():
+    index = PrefixIndex()
+    index.CHUNK = 2  # Split after 4 entries so every test crosses chunk boundaries
+    return index
+
+
+def _check_layout(index, expected):
+    assert [entry for chunk in index._chunks for entry in chunk] == expected
+    assert index._maxes == [chunk[-1] for chunk in index._chunks]
+    assert all(0 < len(chunk) <= 2 * index.CHUNK for chunk in index._chunks)
+    assert len(index) == len(expected)
+
+
+def _expected_ids(entries, prefix):
+    return [client_id for key, client_id in entries if key.startswith(prefix)]
+
+
+def test_chunk_splits_at_the_boundary():
+    index = _small_index()
+    for client_id in range(1, 5):
+        index.add("same", client_id)
+    assert len(index._chunks) == 1
+    index.add("same", 5)
+    assert [len(chunk) for chunk in index._chunks] == [2, 3]
+    _check_layout(index, [("same", client_id) for client_id in range(1, 6)])
+    assert index.ids("sa") == [1, 2, 3, 4, 5]
+
+
+def test_removing_duplicate_keys_removes_only_that_client():
+    index = _small_index()
+    for client_id in range(1, 10):
+        index.add("dup", client_id)
+    index.add("dupe", 10)
+    index.remove("dup", 4)
+    index.remove("dup", 4)
+    index.remove("dup", 99)
+    index.remove("missing", 1)
+    assert index.ids("dup") == [1, 2, 3, 5, 6, 7, 8, 9, 10]
+    for client_id in (1, 2, 3, 5):
+        index.remove("dup", client_id)
+    _check_layout(index, [("dup", 6), ("dup", 7), ("dup", 8), ("dup", 9), ("dupe", 10)])
+    assert index.ids("dupe") == [10]
+
+
+def test_random_changes_match_a_sorted_list():
+    rng = random.Random(3)
+    index = _small_index()
+    entries = []
+    for step in range(2000):
+        if entries and rng.random() < 0.45:
+            entry = rng.choice(entries)
+            entries.remove(entry)
+            index.remove(*entry)
+        elif rng.random() < 0.02:
+            new = [(rng.choice(WORDS) + str(rng.randrange(3)), 10_000 + step * 10 + i) for i in range(7)]
+            entries.extend(new)
+            index.extend(new)
+        else:
+            entry = (rng.choice(WORDS) + str(rng.randrange(3)), step)
+            entries.append(entry)
+            index.add(*entry)
+        entries.sort()
+        if step % 100 == 0:
+            _check_layout(index, entries)
+    _check_layout(index, entries)
+    for prefix in ["", "a", "al", "alma", "b", "dan", "é", "z", "zz", "\U0010ffff"]:
+        assert index.ids(prefix) == _expected_ids(entries, prefix)
+    for entry in list(entries):
+        index.remove(*entry)
+    assert index.ids() == [] and index._chunks == [] and index._maxes == []
+
+
+def _client(client_id, name, email, phone):
+    return {"id": client_id, "name": name, "email": email, "phone": phone}
+
+
+def test_search_after_removals():
+    index = ClientIndex()
+    clients = {name: _client(i, name, f"{name.split()[0].lower()}{i}@example.com", f"050-{i:07d}")
+               for i, name in enumerate(["Dana Levi", "Dan Cohen", "Daniel Bar", "Eli Dan", "Noa"], 1)}
+    index.add_many(list(clients.values())[:3])
+    for name in ("Eli Dan", "Noa"):
+        index.add(clients[name])
+    names = {client["id"]: client["name"] for client in clients.values()}
+    assert index.search("dan", names.get) == [2, 1, 3]
+    assert index.search("eli", names.get) == [4]
+    index.remove(clients["Dana Levi"])
+    assert index.search("dan", names.get) == [2, 3]
+    assert index.search("dana", names.get) == []
+    assert index.search("", names.get) == [2, 3, 4, 5]
+    index.add({**clients["Dana Levi"], "name": "Zed"})
+    names[1] = "Zed"
+    assert index.search("dan", names.get) == [2, 3, 1]
+
+
+def test_uniqueness_checks_follow_removals():
+    index = ClientIndex()
+    index.add(_client(1, "Dana", "Dana@Example.com ", "050-111 1111"))
+    with pytest.raises(ValueError):
+        index.check("dana@example.com", "052-0000000")
+    with pytest.raises(ValueError):
+        index.check("other@example.com", "(050) 1111111")
+    index.check("dana@example.com", "050-1111111", client_id=1)
+    with pytest.raises(ValueError):
+        index.check_many([("A", "a@example.com", "1"), ("B", "A@example.com", "2")])
+    index.remove(_client(1, "Dana", "Dana@Example.com ", "050-111 1111"))
+    index.check("dana@example.com", "0501111111")
@@ -0,0 +1,120 @@
+"""
+Exposure tests for the Bank Loan Management System.
+Contains checks of the per-client exposure book and the concentration report.
+"""
+import random
+
+import pytest
+
+from exposure import EXPOSURE_MEASURES, ExposureBook
+from repository import LoanRepository
+
+
+def _assert_same_book(book, expected):
+    assert sorted(book.by_client) == sorted(expected.by_client)
+    for client_id in expected.by_client:
+        row, fresh = book.client(client_id), expected.client(client_id)
+        for measure in EXPOSURE_MEASURES:
+            assert row[measure] == pytest.approx(fresh[measure], rel=1e-9, abs=1e-6), (client_id, measure)
+
+
+def test_incremental_book_matches_grouped_build():
+    rng = random.Random(11)
+    repo = LoanRepository()
+    for i in range(15):
+        repo.add_client(f"Client {i}", f"c{i}@example.com", f"050-{i:07d}")
+    book = ExposureBook.watch(repo)
+    for step in range(800):
+        loans = repo.loan_columns()["id"].tolist()
+        clients = [client["id"] for client in repo.list_clients()]
+        kind = rng.random()
+        if kind < 0.45 or not loans:
+            repo.add_loan(rng.choice(clients), round(rng.uniform(100, 50_000), 2), rng.choice([0.0, 3.5, 12.0]),
+                          rng.choice([1, 12, 60]), rng.choice(["active", "active", "paid"]))
+        elif kind < 0.8:
+            repo.update_loan(rng.choice(loans), **rng.choice([{"amount": round(rng.uniform(1, 9_000), 2)},
+                                                             {"status": rng.choice(["active", "paid"])},
+                                                             {"client_id": rng.choice(clients)},
+                                                             {"term_months": rng.choice([6, 24])}]))
+        elif kind < 0.98:
+            repo.remove_loan(rng.choice(loans))
+        else:
+            repo.remove_client(rng.choice(clients))
+            repo.add_client(f"New {step}", f"new{step}@example.com", f"052-{step:07d}")
+        if step % 100 == 0:
+            _assert_same_book(book, ExposureBook.from_columns(repo.loan_columns()))
+    _assert_same_book(book, ExposureBook.from_columns(repo.loan_columns()))
+    assert book.totals()["loans"] == repo.loan_count()
+
+
+def test_removing_every_loan_empties_the_book():
+    repo = LoanRepository()
+    repo.add_client("Dana", "dana@example.com", "050-1111111")
+    book = ExposureBook.watch(repo)
+    repo.add_loan(1, 1000.0, 3.3, 7, "active")
+    repo.add_loan(1, 500.0, 0.0, 12, "paid")
+    repo.remove_client(1)
+    assert book.by_client == {}
+    assert book.client(1)["scheduled_repayment"] == 0.0
+    assert book.totals()["loans"] == 0
+
+
+@pytest.fixture
+def small_book():
+    """Four clients whose figures are easy to work out by hand.
+
+    Client 1: 600 at 0% (repays 600). Client 2: 300 at 0% (repays 300).
+    Client 3: 100 at 0% plus a paid 1,000 loan that does not count.
+    Client 4: 1,000 at 12% for one month, i.e. one payment of 1,010.
+    """
+    book = ExposureBook()
+    for client_id, amount, rate, term, status in [(1, 600.0, 0.0, 12, "active"), (2, 300.0, 0.0, 6, "active"),
+                                                  (3, 100.0, 0.0, 1, "active"), (3, 1000.0, 5.0, 12, "paid"),
+                                                  (4, 1000.0, 12.0, 1, "active")]:
+        book.add({"client_id": client_id, "amount": amount, "interest_rate": rate, "term_months": term,
+                  "status": status})
+    return book
+
+
+def test_hand_computed_client_rows(small_book):
+    row = small_book.client(4)
+    assert row["interest"] == pytest.approx(10.0)
+    assert row["scheduled_repayment"] == pytest.approx(1010.0)
+    assert row["avg_rate"] == pytest.approx(12.0)
+    row = small_book.client(3)
+    assert (row["loans"], row["active_loans"], row["principal"], row["avg_rate"]) == (2, 1, 100.0, 0.0)
+    totals = small_book.totals()
+    assert totals["principal"] == pytest.approx(2000.0)
+    assert totals["avg_rate"] == pytest.approx(6.0)
+    columns = {"id": [1, 2, 3, 4, 5], "client_id": [1, 2, 3, 3, 4], "amount": [600.0, 300.0, 100.0, 1000.0, 1000.0],
+               "interest_rate": [0.0, 0.0, 0.0, 5.0, 12.0], "term_months": [12, 6, 1, 12, 1],
+               "status": ["active", "active", "active", "paid", "active"]}
+    _assert_same_book(small_book, ExposureBook.from_columns(columns))
+
+
+def test_concentration_shares_and_hhi(small_book):
+    report = small_book.concentration(2, by="principal")
+    assert report["total"] == pytest.approx(2000.0)
+    assert report["clients"] == 4
+    assert [row["client_id"] for row in report["top"]] == [4, 1]
+    assert [row["share"] for row in report["top"]] == pytest.approx([0.5, 0.3])
+    assert [row["cumulative_share"] for row in report["top"]] == pytest.approx([0.5, 0.8])
+    assert report["top_share"] == pytest.approx(0.8)
+    assert report["hhi"] == pytest.approx(0.5**2 + 0.3**2 + 0.15**2 + 0.05**2)
+
+    report = small_book.concentration(10)
+    assert report["by"] == "scheduled_repayment"
+    assert report["total"] == pytest.approx(2010.0)
+    assert [row["client_id"] for row in report["top"]] == [4, 1, 2, 3]
+    assert report["top_share"] == pytest.approx(1.0)
+    shares = [1010 / 2010, 600 / 2010, 300 / 2010, 100 / 2010]
+    assert report["hhi"] == pytest.approx(sum(share**2 for share in shares))
+
+
+def test_concentration_rejects_bad_measures(small_book):
+    with pytest.raises(ValueError):
+        small_book.concentration(3, by="loans")
+    with pytest.raises(ValueError):
+        small_book.top(0)
+    empty = ExposureBook().concentration(3)
+    assert (empty["total"], empty["hhi"], empty["top"]) == (0.0, 0.0, [])
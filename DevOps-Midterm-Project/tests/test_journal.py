@@ -0,0 +1,107 @@
+"""
+Journal tests for the Bank Loan Management System.
+Contains tests of journal replay and snapshot compaction across restarts.
+"""
+import os
+
+from journal import SEGMENT_PREFIX, SNAPSHOT_PREFIX, Journal, read_entries
+from repository import LoanRepository
+
+
+def _state(repo):
+    clients, loans, next_client_id, next_loan_id = repo.snapshot_columns()
+    return (clients, {field: column.tolist() for field, column in loans.items()},
+            next_client_id, next_loan_id, repo.totals())
+
+
+def _mutate(repo, rounds):
+    """Make 7 changes per round: two clients, two loans (one updated) and a cascading client removal."""
+    for i in range(rounds):
+        first = repo.add_client(f"Client {i}", f"c{i}@example.com", f"050-{i:07d}")
+        second = repo.add_client(f"Other {i}", f"o{i}@example.com", f"052-{i:07d}")
+        loan = repo.add_loan(first["id"], 1000.0 + i, 4.5, 12 + i, "active")
+        repo.update_loan(loan["id"], status="paid", amount=2000.0 + i)
+        repo.add_loan(second["id"], 500.0, 0.0, 24, "active")
+        repo.remove_client(second["id"])
+
+
+def _files(directory, prefix):
+    return sorted(name for name in os.listdir(directory) if name.startswith(prefix))
+
+
+def _reopen(directory, **options):
+    repo = LoanRepository()
+    journal = Journal(directory, **options)
+    replayed = journal.open(repo)
+    return repo, journal, replayed
+
+
+def test_replay_restores_store_after_restart(tmp_path):
+    repo, journal, replayed = _reopen(str(tmp_path))
+    assert replayed == 0
+    _mutate(repo, 4)
+    repo.update_client(1, phone="054-0000001")
+    expected = _state(repo)
+    journal.close()
+
+    restored, journal, replayed = _reopen(str(tmp_path))
+    assert replayed == 4 * 7 + 1
+    assert _state(restored) == expected
+    assert restored.add_loan(1, 100.0, 1.0, 6, "active")["id"] == 9
+    journal.close()
+
+
+def test_snapshot_compaction_survives_restart(tmp_path):
+    directory = str(tmp_path)
+    repo, journal, _ = _reopen(directory, snapshot_every=10)
+    _mutate(repo, 7)
+    expected = _state(repo)
+    journal.close()
+
+    assert _files(directory, SNAPSHOT_PREFIX) == [f"{SNAPSHOT_PREFIX}{40:012d}.npz"]
+    assert _files(directory, SEGMENT_PREFIX) == [f"{SEGMENT_PREFIX}{40:012d}.jsonl"]
+
+    restored, journal, replayed = _reopen(directory, snapshot_every=10)
+    assert replayed == 7 * 7 - 40
+    assert _state(restored) == expected
+    restored.add_loan(1, 100.0, 1.0, 6, "active")
+    expected = _state(restored)
+    journal.close()
+
+    assert _files(directory, SNAPSHOT_PREFIX) == [f"{SNAPSHOT_PREFIX}{50:012d}.npz"]
+
+    restored, journal, replayed = _reopen(directory, snapshot_every=10)
+    assert replayed == 0
+    assert _state(restored) == expected
+    journal.close()
+
+
+def test_keep_history_keeps_every_entry(tmp_path):
+    directory = str(tmp_path)
+    repo, journal, _ = _reopen(directory, snapshot_every=10, keep_history=True)
+    _mutate(repo, 5)
+    journal.close()
+    assert len(_files(directory, SNAPSHOT_PREFIX)) == 1
+    assert len(_files(directory, SEGMENT_PREFIX)) == 4
+    assert [entry["seq"] for entry in read_entries(directory)] == list(range(1, 36))
+
+
+def test_torn_tail_is_dropped_on_restart(tmp_path):
+    directory = str(tmp_path)
+    repo, journal, _ = _reopen(directory)
+    _mutate(repo, 1)
+    expected = _state(repo)
+    journal.close()
+    with open(os.path.join(directory, _files(directory, SEGMENT_PREFIX)[-1]), "ab") as f:
+        f.write(b'{"seq":8,"event":"client_add')
+
+    restored, journal, replayed = _reopen(directory)
+    assert replayed == 7
+    assert _state(restored) == expected
+    restored.add_client("Late", "late@example.com", "053-0000000")
+    journal.close()
+
+    restored, journal, replayed = _reopen(directory)
+    assert replayed == 8
+    assert restored.get_client(3)["name"] == "Late"
+    journal.close()
@@ -0,0 +1,116 @@
+"""
+Loan index tests for the Bank Loan Management System.
+Contains tests of the chunked sorted column index used for ordered, top-k and range queries.
+"""
+import random
+
+import numpy as np
+import pytest
+
+import loan_index
+from loan_index import SortedColumnIndex
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(loan_index, "CHUNK", 4)  # Split after 8 pairs so every test crosses chunk boundaries
+
+
+def _even(ids):
+    return ids % 2 == 0
+
+
+def _pairs(index):
+    return [(value, loan_id) for values, ids in zip(index._values, index._ids) for value, loan_id in zip(values, ids)]
+
+
+def _check_layout(index, expected):
+    assert _pairs(index) == sorted(expected)
+    assert index._maxes == [(values[-1], ids[-1]) for values, ids in zip(index._values, index._ids)]
+    assert all(0 < len(ids) <= 2 * loan_index.CHUNK for ids in index._ids)
+    assert len(index) == len(expected)
+
+
+def test_chunk_splits_at_the_boundary():
+    index = SortedColumnIndex(np.int32)
+    for loan_id in range(1, 9):
+        index.add(12, loan_id)
+    assert len(index._ids) == 1
+    index.add(12, 9)
+    assert [len(ids) for ids in index._ids] == [4, 5]
+    _check_layout(index, [(12, loan_id) for loan_id in range(1, 10)])
+    assert np.concatenate(list(index.ascending())).tolist() == list(range(1, 10))
+
+
+def test_removing_duplicate_values_removes_only_that_loan():
+    index = SortedColumnIndex()
+    pairs = [(100.0, loan_id) for loan_id in range(1, 13)] + [(50.0, 13), (150.0, 14)]
+    for value, loan_id in pairs:
+        index.add(value, loan_id)
+    index.remove(100.0, 6)
+    index.remove(100.0, 6)
+    index.remove(100.0, 99)
+    index.remove(101.0, 7)
+    pairs.remove((100.0, 6))
+    _check_layout(index, pairs)
+    for loan_id in (1, 2, 3, 4, 5, 7, 8):
+        index.remove(100.0, loan_id)
+        pairs.remove((100.0, loan_id))
+    _check_layout(index, pairs)
+    assert index.between(100.0, 100.0).tolist() == [9, 10, 11, 12]
+
+
+def test_top_with_accept_filter():
+    index = SortedColumnIndex()
+    for loan_id in range(1, 41):
+        index.add(float(loan_id % 10), loan_id)
+    assert index.top(3).tolist() == [39, 29, 19]
+    assert index.top(5, accept=_even).tolist() == [38, 28, 18, 8, 36]
+    assert index.top(5, largest=False, accept=_even).tolist() == [10, 20, 30, 40, 2]
+    assert index.top(100, accept=_even).tolist() == sorted(range(2, 41, 2), key=lambda i: (-(i % 10), -i))
+    assert index.top(5, accept=lambda ids: ids > 1000).tolist() == []
+    assert index.top(0).tolist() == []
+    assert SortedColumnIndex().top(3).tolist() == []
+
+
+def test_between_with_open_bounds():
+    index = SortedColumnIndex(np.int32)
+    index.extend(np.repeat([12, 24, 36, 60], 5), np.arange(1, 21))
+    assert index.between().tolist() == list(range(1, 21))
+    assert index.between(low=36).tolist() == list(range(11, 21))
+    assert index.between(high=24).tolist() == list(range(1, 11))
+    assert index.between(13, 59).tolist() == list(range(6, 16))
+    assert index.between(12.5, 23.5).tolist() == []
+    assert index.between(61).tolist() == []
+    assert index.between(high=11).tolist() == []
+    assert SortedColumnIndex().between(1, 2).tolist() == []
+
+
+def test_random_changes_match_a_sorted_list():
+    rng = random.Random(5)
+    index = SortedColumnIndex()
+    pairs, next_id = [], 1
+    for step in range(3000):
+        if pairs and rng.random() < 0.45:
+            pair = rng.choice(pairs)
+            pairs.remove(pair)
+            index.remove(*pair)
+        elif rng.random() < 0.01:
+            values = [float(rng.randrange(30)) for _ in range(40)]
+            index.extend(values, range(next_id, next_id + 40))
+            pairs.extend(zip(values, range(next_id, next_id + 40)))
+            next_id += 40
+        else:
+            pairs.append((float(rng.randrange(30)), next_id))
+            index.add(*pairs[-1])
+            next_id += 1
+        if step % 250 == 0:
+            _check_layout(index, pairs)
+    _check_layout(index, pairs)
+    ordered = sorted(pairs)
+    for low, high in [(None, None), (None, 10.0), (10.0, None), (5.0, 5.0), (7.5, 20.5), (40.0, None)]:
+        expected = [loan_id for value, loan_id in ordered
+                    if (low is None or value >= low) and (high is None or value <= high)]
+        assert index.between(low, high).tolist() == expected
+    assert index.top(25, accept=_even).tolist() == [i for _, i in reversed(ordered) if i % 2 == 0][:25]
+    assert index.top(25, largest=False, accept=_even).tolist() == [i for _, i in ordered if i % 2 == 0][:25]
@@ -0,0 +1,104 @@
+"""
+Loan table tests for the Bank Loan Management System.
+Contains tests of slot reuse, the ID index and ID validation.
+"""
+import pytest
+
+from loan_table import FREE, MAX_ID, LoanTable
+from repository import LoanRepository
+
+
+def _add(table, loan_id, amount=1000.0):
+    return table.append(loan_id, 1, amount, 5.0, 12, "active")
+
+
+def test_deleted_slot_is_reused():
+    table = LoanTable(capacity=4)
+    slots = [_add(table, loan_id) for loan_id in (1, 2, 3)]
+    table.delete(2)
+    assert _add(table, 7) == slots[1]
+    assert len(table) == 3
+    assert [row["id"] for row in table] == [1, 3, 7]
+
+
+def test_extend_reuses_free_slots_before_growing():
+    table = LoanTable(capacity=4)
+    for loan_id in (1, 2, 3, 4):
+        _add(table, loan_id)
+    table.delete(1)
+    table.delete(3)
+    slots = table.extend([10, 11, 12], [1, 1, 1], [1.0, 2.0, 3.0], [0.0] * 3, [12] * 3, ["paid"] * 3)
+    assert sorted(slots.tolist()[:2]) == [0, 2]
+    assert slots[2] == 4
+    assert [row["id"] for row in table] == [2, 4, 10, 11, 12]
+    assert table.row(12)["amount"] == 3.0
+
+
+def test_id_index_follows_appends_and_deletes():
+    table = LoanTable(capacity=2)
+    _add(table, 5000, amount=42.0)
+    assert 5000 in table
+    assert table.row(5000)["amount"] == 42.0
+    table.delete(5000)
+    assert 5000 not in table
+    assert table.row(5000) is None
+    assert table._slot_of_id[5000] == FREE
+    with pytest.raises(ValueError):
+        table.delete(5000)
+
+
+def test_stale_row_view_does_not_show_reused_slot():
+    table = LoanTable()
+    _add(table, 1)
+    row = table.row(1)
+    table.delete(1)
+    _add(table, 2)
+    with pytest.raises(KeyError):
+        row["amount"]
+
+
+def test_duplicate_ids_are_rejected():
+    table = LoanTable()
+    _add(table, 1)
+    with pytest.raises(ValueError):
+        _add(table, 1)
+    with pytest.raises(ValueError):
+        table.extend([2, 2], [1, 1], [1.0, 1.0], [0.0, 0.0], [12, 12], ["active", "active"])
+    assert len(table) == 1
+
+
+def test_lookups_outside_the_index_are_misses():
+    table = LoanTable()
+    _add(table, 1)
+    for loan_id in (-1, 0, 10**12):
+        assert loan_id not in table
+        assert table.row(loan_id) is None
+
+
+@pytest.mark.parametrize("loan_id", [-1, 0, MAX_ID + 1])
+def test_invalid_ids_leave_table_unchanged(loan_id):
+    table = LoanTable(capacity=2)
+    _add(table, 1)
+    index_size = len(table._slot_of_id)
+    with pytest.raises(ValueError):
+        _add(table, loan_id)
+    with pytest.raises(ValueError):
+        table.extend([2, loan_id], [1, 1], [1.0, 1.0], [0.0, 0.0], [12, 12], ["active", "active"])
+    assert len(table) == 1
+    assert table._size == 1
+    assert not table._free
+    assert len(table._slot_of_id) == index_size
+    assert [row["id"] for row in table] == [1]
+
+
+@pytest.mark.parametrize("loan_id", [-1, 0, MAX_ID + 1, 10**10, 2.5, True, "3"])
+def test_repository_rejects_invalid_explicit_ids(loan_id):
+    repo = LoanRepository()
+    client = repo.add_client("Dana", "dana@example.com", "050-1234567")
+    with pytest.raises(ValueError):
+        repo.add_loan(client["id"], 1000.0, 5.0, 12, "active", loan_id=loan_id)
+    with pytest.raises(ValueError):
+        repo.add_client("Eli", "eli@example.com", "050-7654321", client_id=loan_id)
+    assert repo.loan_count() == 0
+    assert repo.client_count() == 1
+    assert repo.add_loan(client["id"], 1000.0, 5.0, 12, "active")["id"] == 1
@@ -0,0 +1,122 @@
+"""
+Portfolio snapshot tests for the Bank Loan Management System.
+Contains round-trip tests of the memory-mapped snapshot file against its source repository.
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from loan_table import LOAN_STATUSES
+from portfolio_snapshot import _PREAMBLE, ALIGNMENT, FORMAT_VERSION, MAGIC, PortfolioSnapshot, write_snapshot
+from repository import LoanRepository
+from sqlite_store import SQLiteRepository
+
+NAMES = ["Dana Levi", "Yossi Cohen", "Zoë Müller", "Ana", "Ben", "Chen Wei", "Noa", "Omar"]
+FILTERS = [
+    {},
+    {"status": "active"},
+    {"status": "paid", "min_amount": 5_000.0},
+    {"client_id": 3},
+    {"client_id": 999},
+    {"min_amount": 1_000.0, "max_amount": 20_000.0},
+]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    repo = LoanRepository() if request.param == "memory" else SQLiteRepository(str(tmp_path / "loans.db"))
+    rng = random.Random(5)
+    for i, name in enumerate(NAMES):
+        repo.add_client(name, f"client{i}@example.com", f"050-{i:07d}")
+    for _ in range(300):
+        repo.add_loan(rng.randint(1, len(NAMES)), round(rng.uniform(100, 90_000), 2), round(rng.uniform(0, 15), 2),
+                      rng.choice([12, 36, 60, 360]), rng.choice(LOAN_STATUSES))
+    for loan_id in rng.sample(range(1, 301), 40):
+        repo.remove_loan(loan_id)  # Leave gaps in the IDs
+    repo.remove_client(len(NAMES))
+    yield repo
+    if request.param == "sqlite":
+        repo.close()
+
+
+@pytest.fixture
+def snapshot(repo, tmp_path):
+    snapshot = PortfolioSnapshot(write_snapshot(repo, str(tmp_path / "portfolio.snap")))
+    yield snapshot
+    snapshot.close()
+
+
+def _header(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, header_length = _PREAMBLE.unpack_from(data)
+    return magic, json.loads(data[_PREAMBLE.size:_PREAMBLE.size + header_length]), header_length, len(data)
+
+
+def test_header_describes_the_portfolio(repo, snapshot):
+    magic, header, header_length, size = _header(snapshot.path)
+    assert magic == MAGIC
+    assert header["format"] == FORMAT_VERSION
+    assert header["clients"] == repo.client_count()
+    assert header["loans"] == repo.loan_count()
+    data_start = -(-(_PREAMBLE.size + header_length) // ALIGNMENT) * ALIGNMENT
+    for name, spec in header["columns"].items():
+        assert (data_start + spec["offset"]) % ALIGNMENT == 0, name
+        assert data_start + spec["offset"] + spec["length"] * np.dtype(spec["dtype"]).itemsize <= size, name
+
+
+def test_columns_are_aligned_read_only_views(snapshot):
+    for name, column in snapshot._arrays.items():
+        assert column.ctypes.data % ALIGNMENT == 0, name
+        assert not column.flags.writeable, name
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_loan_columns_match_source(repo, snapshot, filters):
+    expected, actual = repo.loan_columns(**filters), snapshot.loan_columns(**filters)
+    assert actual.keys() == expected.keys()
+    for field in expected:
+        np.testing.assert_array_equal(actual[field], np.asarray(expected[field]), err_msg=field)
+    assert snapshot.loan_count(**filters) == repo.loan_count(**filters)
+
+
+def test_loan_pages_match_source(repo, snapshot):
+    for offset, limit in ((0, 10), (25, 50), (250, 100)):
+        expected = repo.loan_columns(status="active", offset=offset, limit=limit)
+        actual = snapshot.loan_columns(status="active", offset=offset, limit=limit)
+        np.testing.assert_array_equal(actual["id"], np.asarray(expected["id"]))
+
+
+def test_totals_match_source(repo, snapshot):
+    assert snapshot.totals() == pytest.approx(repo.totals(), rel=1e-12)
+    for status in LOAN_STATUSES:
+        assert snapshot.aggregates.by_status[status] == pytest.approx(repo.aggregates.by_status[status], rel=1e-12)
+
+
+def test_clients_and_single_loans_match_source(repo, snapshot):
+    assert snapshot.list_clients() == repo.list_clients()
+    assert snapshot.list_clients(offset=2, limit=3) == repo.list_clients(offset=2, limit=3)
+    assert snapshot.client_names() == {client["id"]: client["name"] for client in repo.list_clients()}
+    assert snapshot.client_name(3) == "Zoë Müller"
+    assert snapshot.get_client(len(NAMES)) is None
+    assert snapshot.client_name(len(NAMES)) == "Unknown"
+    for loan_id in (1, 2, 150, 300, 301):
+        expected = repo.get_loan(loan_id)
+        assert snapshot.get_loan(loan_id) == (dict(expected) if expected is not None else None)
+    for client_id in range(1, len(NAMES) + 1):
+        assert sorted(loan["id"] for loan in snapshot.loans_for_client(client_id)) == \
+            sorted(loan["id"] for loan in repo.loans_for_client(client_id))
+
+
+def test_unknown_status_is_rejected(snapshot):
+    with pytest.raises(ValueError, match="Status must be"):
+        snapshot.loan_columns(status="foo")
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.snap"
+    path.write_bytes(b"NOTASNAP" + bytes(64))
+    with pytest.raises(ValueError, match="not a portfolio snapshot"):
+        PortfolioSnapshot(str(path))
@@ -0,0 +1,88 @@
+"""
+Schedule cache tests for the Bank Loan Management System.
+Contains tests of invalidation on loan changes and LRU eviction.
+"""
+import numpy as np
+import pytest
+
+from amortization import loan_schedule
+from repository import LoanRepository
+from schedule_cache import ScheduleCache
+
+
+def _loan(amount, rate=5.0, term=12):
+    return {"amount": amount, "interest_rate": rate, "term_months": term}
+
+
+@pytest.fixture
+def watched():
+    repo = LoanRepository()
+    repo.add_client("Dana", "dana@example.com", "050-1111111")
+    cache = ScheduleCache(maxsize=8)
+    cache.watch(repo)
+    return repo, cache
+
+
+def test_cached_schedule_is_dropped_after_update(watched):
+    repo, cache = watched
+    loan = repo.add_loan(1, 1000.0, 5.0, 12, "active")
+    cache.schedule_for(loan)
+    cache.schedule_for(loan)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    repo.update_loan(loan["id"], amount=2000.0)
+    assert cache.stats()["size"] == 0
+    assert cache.invalidations == 1
+    schedule = cache.schedule_for(repo.get_loan(loan["id"]))
+    assert cache.misses == 2
+    assert np.array_equal(schedule["payment"], loan_schedule(_loan(2000.0))["payment"])
+
+
+def test_cached_schedule_is_dropped_after_removal(watched):
+    repo, cache = watched
+    loan = repo.add_loan(1, 1000.0, 5.0, 12, "active")
+    cache.schedule_for(loan)
+    cache.schedule_for(_loan(3000.0))
+    repo.remove_loan(loan["id"])
+    assert cache.stats()["size"] == 1
+    assert cache.invalidate(_loan(1000.0)) is False
+    repo.add_loan(1, 3000.0, 5.0, 12, "active")
+    repo.remove_client(1)
+    assert cache.stats()["size"] == 0
+    assert cache.invalidations == 2
+
+
+def test_status_changes_and_additions_keep_entries(watched):
+    repo, cache = watched
+    loan = repo.add_loan(1, 1000.0, 5.0, 12, "active")
+    cache.schedule_for(loan)
+    repo.add_loan(1, 1000.0, 5.0, 12, "paid")
+    assert cache.stats()["size"] == 1
+    repo.update_loan(loan["id"], status="paid")
+    assert cache.stats()["size"] == 0  # The old terms are dropped even though only the status changed
+
+
+def test_oldest_entry_is_evicted_at_capacity():
+    cache = ScheduleCache(maxsize=3)
+    for amount in (100.0, 200.0, 300.0):
+        cache.schedule_for(_loan(amount))
+    cache.schedule_for(_loan(100.0))  # Now the most recently used
+    cache.schedule_for(_loan(400.0))
+    assert cache.stats()["size"] == 3
+    assert cache.evictions == 1
+    assert list(cache._entries) == [ScheduleCache.key(_loan(amount)) for amount in (300.0, 100.0, 400.0)]
+    misses = cache.misses
+    cache.schedule_for(_loan(100.0))
+    assert cache.misses == misses
+    cache.schedule_for(_loan(200.0))
+    assert cache.misses == misses + 1
+    assert ScheduleCache.key(_loan(300.0)) not in cache._entries
+
+
+def test_cached_arrays_cannot_be_modified():
+    cache = ScheduleCache()
+    schedule = cache.schedule_for(_loan(1000.0))
+    with pytest.raises(ValueError):
+        schedule["balance"][0] = 0.0
+    schedule["balance"] = None
+    assert cache.schedule_for(_loan(1000.0))["balance"] is not None
@@ -0,0 +1,70 @@
+"""
+Schedule export tests for the Bank Loan Management System.
+Contains round-trip tests of the chunked (and gzip-member) schedule export.
+"""
+import csv
+import gzip
+import json
+
+import numpy as np
+import pytest
+
+from amortization import SCHEDULE_COLUMNS, batch_schedules
+from schedule_export import EXPORT_COLUMNS, detect_schedule_format, export_schedules
+
+LOANS = {
+    "id": np.array([3, 8, 9, 15, 21]),
+    "amount": np.array([10_000.0, 2_500.0, 800.0, 120_000.0, 0.0]),
+    "interest_rate": np.array([5.0, 0.0, 7.5, 6.25, 4.0]),
+    "term_months": np.array([12, 24, 1, 360, 6]),
+}
+
+
+def _expected_rows():
+    schedules = batch_schedules(LOANS["amount"], LOANS["interest_rate"], LOANS["term_months"])
+    loan_ids = LOANS["id"][schedules["loan_index"]]
+    return [(int(loan_id), int(month), *(round(float(value), 2) for value in values))
+            for loan_id, month, *values in zip(loan_ids, schedules["month"],
+                                               *(schedules[column] for column in SCHEDULE_COLUMNS[1:]))]
+
+
+def _read_rows(path, fmt):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        records = list(csv.DictReader(f)) if fmt == "csv" else [json.loads(line) for line in f]
+    return [(int(record["loan_id"]), int(record["month"]),
+             *(round(float(record[column]), 2) for column in SCHEDULE_COLUMNS[1:])) for record in records]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_gzip_export_round_trips(tmp_path, fmt, workers):
+    path = tmp_path / f"schedules.{fmt}.gz"
+    progress = []
+    summary = export_schedules(LOANS, str(path), chunk_rows=50, workers=workers,
+                               progress=lambda s: progress.append(dict(s)))
+    expected = _expected_rows()
+    assert summary["rows"] == len(expected) == int(LOANS["term_months"].sum())
+    assert summary["loans"] == summary["total_loans"] == 5
+    assert len(progress) > 2  # Several chunks, i.e. several concatenated gzip members
+    assert [entry["loans"] for entry in progress] == sorted(entry["loans"] for entry in progress)
+    with open(path, "rb") as f:
+        assert f.read().count(b"\x1f\x8b\x08") >= len(progress)
+    rows = _read_rows(path, fmt)
+    assert [row[:2] for row in rows] == [row[:2] for row in expected]
+    assert np.allclose([row[2:] for row in rows], [row[2:] for row in expected], atol=0.011)
+
+
+def test_uncompressed_export_and_format_detection(tmp_path):
+    path = tmp_path / "schedules.csv"
+    export_schedules(LOANS, str(path), chunk_rows=1_000, workers=1)
+    with open(path, encoding="utf-8") as f:
+        assert f.readline().strip() == ",".join(EXPORT_COLUMNS)
+        assert sum(1 for _ in f) == int(LOANS["term_months"].sum())
+    assert detect_schedule_format("OUT.JSONL.GZ") == "jsonl"
+    assert detect_schedule_format("out.parquet.gz") == "parquet"
+    assert detect_schedule_format("out.gz") == "csv"
+    assert detect_schedule_format("out.csv") == "csv"
+    with pytest.raises(ValueError):
+        export_schedules(LOANS, str(path), fmt="xml")
+    with pytest.raises(ValueError):
+        export_schedules(LOANS, str(path), chunk_rows=0)
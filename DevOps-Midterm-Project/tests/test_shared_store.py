@@ -0,0 +1,174 @@
+"""
+Shared store tests for the Bank Loan Management System.
+Contains tests of the reader-writer lock and optimistic update_if edits.
+"""
+import threading
+import time
+
+import pytest
+
+from repository import LoanRepository
+from shared_store import ConflictError, ReadWriteLock, SharedStore
+
+TIMEOUT = 5
+
+
+def _start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_until(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_inside = threading.Barrier(3, timeout=TIMEOUT)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [_start(reader) for _ in range(2)]
+    both_inside.wait()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_writer_excludes_readers_and_writers():
+    lock = ReadWriteLock()
+    entered = []
+
+    def reader():
+        with lock.read():
+            entered.append("read")
+
+    def writer():
+        with lock.write():
+            entered.append("write")
+
+    with lock.write():
+        threads = [_start(reader), _start(writer)]
+        time.sleep(0.05)
+        assert entered == []
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert sorted(entered) == ["read", "write"]
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = ReadWriteLock()
+    order = []
+
+    def writer():
+        with lock.write():
+            order.append("write")
+
+    def reader():
+        with lock.read():
+            order.append("read")
+
+    with lock.read():
+        writer_thread = _start(writer)
+        _wait_until(lambda: lock._waiting_writers == 1)
+        reader_thread = _start(reader)
+        time.sleep(0.05)
+        assert order == []
+    writer_thread.join(TIMEOUT)
+    reader_thread.join(TIMEOUT)
+    assert order == ["write", "read"]
+
+
+def test_lock_is_reentrant_and_refuses_upgrades():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                with lock.write():
+                    pass
+    with lock.write():
+        pass
+    assert lock._readers == 0 and lock._writer is None
+
+
+def test_update_if_detects_conflicting_edit():
+    store = SharedStore(LoanRepository())
+    client = store.add_client("Dana", "dana@example.com", "050-1111111")
+    loan = store.add_loan(client["id"], 1000.0, 5.0, 12, "active")
+
+    _, version = store.read_record("loan", loan["id"])
+    _, same_version = store.read_record("loan", loan["id"])
+    assert version == same_version
+    store.update_if("loan", loan["id"], version, amount=1500.0)
+    with pytest.raises(ConflictError):
+        store.update_if("loan", loan["id"], same_version, amount=900.0)
+    assert store.get_loan(loan["id"])["amount"] == 1500.0
+
+    _, new_version = store.read_record("loan", loan["id"])
+    assert new_version > version
+    assert store.update_if("loan", loan["id"], new_version, status="paid")["status"] == "paid"
+
+
+def test_update_if_applies_to_clients_and_missing_records_read_as_none():
+    store = SharedStore(LoanRepository())
+    client = store.add_client("Dana", "dana@example.com", "050-1111111")
+    _, version = store.read_record("client", client["id"])
+    store.update_client(client["id"], phone="050-2222222")
+    with pytest.raises(ConflictError):
+        store.update_if("client", client["id"], version, name="Dana Levi")
+    assert store.get_client(client["id"])["name"] == "Dana"
+    assert store.read_record("loan", 99) == (None, 0)
+
+
+def test_records_are_copied_out_of_the_lock():
+    store = SharedStore(LoanRepository())
+    client = store.add_client("Dana", "dana@example.com", "050-1111111")
+    loan = store.add_loan(client["id"], 1000.0, 5.0, 12, "active")
+    assert type(loan) is dict
+    loan["amount"] = 1.0
+    assert store.get_loan(loan["id"])["amount"] == 1000.0
+    assert all(type(row) is dict for row in store.iter_loans())
+
+
+def test_concurrent_writers_do_not_lose_updates():
+    store = SharedStore(LoanRepository())
+    client = store.add_client("Dana", "dana@example.com", "050-1111111")
+
+    def add_loans():
+        for _ in range(200):
+            store.add_loan(client["id"], 100.0, 1.0, 12, "active")
+            store.loan_count()
+
+    threads = [_start(add_loans) for _ in range(4)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert store.loan_count() == 800
+    assert sorted(loan["id"] for loan in store.iter_loans()) == list(range(1, 801))
+
+
+def test_versions_of_removed_records_are_dropped():
+    store = SharedStore(LoanRepository())
+    for i in range(3):
+        store.add_client(f"Client {i}", f"c{i}@example.com", f"050-{i:07d}")
+        store.add_loan(i + 1, 1000.0, 5.0, 12, "active")
+    assert store._record_versions == {}
+    store.update_loan(1, amount=1500.0)
+    store.update_client(2, name="Renamed")
+    store.update_loan(2, amount=900.0)
+    assert store.read_record("loan", 1)[1] == 1
+    store.remove_loan(1)
+    store.remove_client(2)
+    assert store._record_versions == {}
+    assert store.read_record("loan", 1) == (None, 0)
+    with pytest.raises(ValueError):
+        store.update_if("loan", 2, 1, amount=1.0)
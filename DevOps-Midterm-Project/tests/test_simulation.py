@@ -0,0 +1,69 @@
+"""
+Simulation tests for the Bank Loan Management System.
+Contains seeded reproducibility tests of the Monte Carlo default and prepayment model.
+"""
+import numpy as np
+import pytest
+
+import simulation
+from simulation import simulate_portfolio
+
+LOANS = {
+    "id": np.arange(1, 7),
+    "amount": np.array([10_000.0, 2_500.0, 800.0, 120_000.0, 45_000.0, 7_300.0]),
+    "interest_rate": np.array([5.0, 0.0, 7.5, 6.25, 4.0, 12.0]),
+    "term_months": np.array([12, 24, 1, 60, 36, 24]),
+}
+PATHS = 37  # Not a multiple of any shard size used below, so the last shard is short
+
+
+def _run(**kwargs):
+    return simulate_portfolio(LOANS, n_paths=PATHS, seed=11, default_rate=20.0, prepay_rate=15.0, **kwargs)
+
+
+def _assert_same(left, right):
+    assert left["expected_loss"] == right["expected_loss"]
+    assert left["loss_percentiles"] == right["loss_percentiles"]
+    assert left["cash_flow"].keys() == right["cash_flow"].keys()
+    for column, values in left["cash_flow"].items():
+        np.testing.assert_array_equal(values, right["cash_flow"][column])
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return _run(workers=1)
+
+
+def test_same_seed_same_result_across_worker_counts(reference):
+    _assert_same(_run(workers=2), reference)
+
+
+@pytest.mark.parametrize("shard_paths", [1, 4, 50])
+def test_same_seed_same_result_across_shard_sizes(monkeypatch, reference, shard_paths):
+    monkeypatch.setattr(simulation, "SHARD_PATHS", shard_paths)
+    _assert_same(_run(workers=1), reference)
+
+
+def test_draw_block_size_does_not_change_result(monkeypatch, reference):
+    monkeypatch.setattr(simulation, "DRAW_BLOCK", 3)
+    _assert_same(_run(workers=1), reference)
+
+
+def test_different_seed_gives_different_result(reference):
+    other = simulate_portfolio(LOANS, n_paths=PATHS, seed=12, default_rate=20.0, prepay_rate=15.0, workers=1)
+    assert other["expected_loss"] != reference["expected_loss"]
+
+
+def test_losses_and_cash_flow_are_consistent(reference):
+    assert reference["paths"] == PATHS
+    assert reference["loans"] == len(LOANS["id"])
+    assert 0 < reference["expected_loss"] < reference["principal"]
+    assert len(reference["cash_flow"]["month"]) == LOANS["term_months"].max()
+    bands = reference["cash_flow"]
+    assert np.all(bands["p5"] <= bands["p50"]) and np.all(bands["p50"] <= bands["p95"])
+
+
+def test_no_defaults_or_prepayments_pays_the_schedule():
+    result = simulate_portfolio(LOANS, n_paths=3, default_rate=0.0, prepay_rate=0.0, workers=1)
+    assert result["expected_loss"] == 0
+    assert result["cash_flow"]["mean"].sum() >= LOANS["amount"].sum()